@@ -0,0 +1 @@
+from .install import AptCacherNgInstaller
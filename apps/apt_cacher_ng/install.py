@@ -0,0 +1,44 @@
+"""apt-cacher-ng установщик."""
+import sys
+sys.path.insert(0, str(__file__).rsplit("/", 3)[0])
+from apps.base import AppInstaller, InstallResult
+from apps.registry import AppRegistry
+
+@AppRegistry.register
+class AptCacherNgInstaller(AppInstaller):
+    name = "apt_cacher_ng"
+    description = "APT Package Cache (apt-cacher-ng)"
+    default_cores = 1
+    default_memory = 512
+    default_disk = 30
+    parameters = [
+        {"name": "port", "type": "int", "default": 3142, "description": "Порт прокси"},
+    ]
+    
+    def validate(self) -> bool:
+        return True
+    
+    def install(self) -> None:
+        # Без вопроса debconf о туннелировании https (apt-get без терминала)
+        self.system.run([
+            "sh", "-c",
+            "echo 'apt-cacher-ng apt-cacher-ng/tunnelenable boolean false' | debconf-set-selections"
+        ])
+        self.system.apt_update()
+        self.system.apt_install(["apt-cacher-ng"])
+    
+    def configure(self) -> None:
+        port = int(self.config.get("port", 3142))
+        self.system.run([
+            "sh", "-c", f"printf 'Port: {port}\\n' > /etc/apt-cacher-ng/zz-pve-lxc.conf"
+        ])
+        self.system.systemctl("enable", "apt-cacher-ng")
+        self.system.systemctl("restart", "apt-cacher-ng")
+    
+    def get_result(self) -> InstallResult:
+        port = int(self.config.get("port", 3142))
+        return InstallResult(
+            success=True,
+            message="apt-cacher-ng installed",
+            access_url=f"http://localhost:{port}/acng-report.html"
+        )
@@ -4,6 +4,8 @@ from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Optional
+import hashlib
+import json
 
 import sys
 sys.path.insert(0, str(__file__).rsplit("/", 2)[0])
@@ -11,6 +13,18 @@ from lib.logger import Logger
 from lib.system import System
 
 
+# Фазы установки после validate: (метод, заголовок шага)
+PHASES = [
+    ("pre_install", "Pre-install"),
+    ("install", "Installing"),
+    ("post_install", "Post-install"),
+    ("configure", "Configuring"),
+]
+
+# Checkpoints установки внутри контейнера: <app>.json
+CHECKPOINT_DIR = "/var/lib/pve-lxc/checkpoints"
+
+
 @dataclass
 class InstallResult:
     """Результат установки приложения."""
@@ -30,6 +44,15 @@ class AppInstaller(ABC):
     default_memory: int = 2048
     default_disk: int = 10
     parameters: list = field(default_factory=list)
+    # Пакеты, нужные до установки. При deploy --create ставятся вместе с
+    # пакетами bootstrap одной транзакцией apt
+    packages: list[str] = []
+    # Атрибуты, которые задаются в фазах и нужны get_result (например,
+    # сгенерированные пароли): сохраняются в checkpoint и восстанавливаются
+    # при resume
+    checkpoint_attrs: list[str] = []
+    # Лог установки и замеры времени
+    LOG_DIR = Path("/var/log/pve-lxc")
     
     def __init__(self, logger: Logger, system: System, config: dict):
         self.logger = logger
@@ -37,11 +60,30 @@ class AppInstaller(ABC):
         self.config = config
         self._validation_error: Optional[str] = None
         self._install_log: list[str] = []
+        # Замеры общие с system: команды записываются в текущую фазу
+        self.timings = system.timings
+        # Состояние прошлого запуска (при resume) и текущего
+        self._resumed: dict = {}
+        self._checkpoints: dict = {}
     
-    def run(self) -> InstallResult:
-        """Выполнить полный цикл установки."""
+    def run(self, resume: bool = False) -> InstallResult:
+        """Выполнить полный цикл установки.
+        
+        После каждой фазы в контейнере сохраняется checkpoint. С resume
+        фазы, завершённые в прошлом запуске с теми же параметрами, после
+        проверки verify_checkpoint пропускаются. Длительность фаз и команд
+        сохраняется рядом с логом установки.
+        """
+        try:
+            return self._run_phases(resume)
+        finally:
+            self._save_timings()
+    
+    def _run_phases(self, resume: bool) -> InstallResult:
         self.logger.step("Validating", current=1, total=5)
-        if not self.validate():
+        with self.timings.phase("validate"):
+            valid = self.validate()
+        if not valid:
             return InstallResult(
                 success=False,
                 message=f"Validation failed: {self._validation_error}",
@@ -49,17 +91,28 @@ class AppInstaller(ABC):
             )
         
         try:
-            self.logger.step("Pre-install", current=2, total=5)
-            self.pre_install()
-            
-            self.logger.step("Installing", current=3, total=5)
-            self.install()
-            
-            self.logger.step("Post-install", current=4, total=5)
-            self.post_install()
-            
-            self.logger.step("Configuring", current=5, total=5)
-            self.configure()
+            self._start_checkpoints(resume)
+            checkpointing = True
+            for current, (phase, title) in enumerate(PHASES, start=2):
+                self.logger.step(title, current=current, total=5)
+                if self._skip_phase(phase):
+                    continue
+                failed_before = len(self.system.failed_commands)
+                with self.timings.phase(phase):
+                    getattr(self, phase)()
+                    # Пакеты, поставленные в очередь последними командами фазы,
+                    # ставятся и учитываются в её замерах
+                    self.system.apt_flush()
+                if len(self.system.failed_commands) > failed_before:
+                    # Ошибка команды не прерывает установку, но такая фаза
+                    # (и все следующие) при resume выполняется заново
+                    checkpointing = False
+                    self.logger.warn(f"Phase {phase} had failed commands, not recording checkpoint")
+                if checkpointing:
+                    self._checkpoints["phases"].append(phase)
+                    self._save_checkpoints()
+                # Прошлый запуск больше не учитывается: следующие фазы выполняются
+                self._resumed = {}
             
             return self.get_result()
         except Exception as e:
@@ -76,8 +129,24 @@ class AppInstaller(ABC):
         pass
     
     def pre_install(self) -> None:
-        """Подготовка к установке (опционально)."""
-        pass
+        """Подготовка к установке: ставит ещё не установленные пакеты из packages."""
+        missing = self._missing_packages(self.packages)
+        if missing:
+            self.system.apt_update()
+            self.system.apt_install(missing)
+    
+    def _missing_packages(self, packages: list[str]) -> list[str]:
+        """Пакеты из списка, не установленные в системе (один вызов dpkg-query)."""
+        if not packages:
+            return []
+        result = self.system.run(
+            ["dpkg-query", "-W", "--showformat=${Package} ${Status}\\n", *packages], check=False
+        )
+        installed = {
+            line.split()[0] for line in result.stdout.splitlines()
+            if line.endswith("install ok installed")
+        }
+        return [package for package in packages if package not in installed]
     
     @abstractmethod
     def install(self) -> None:
@@ -97,15 +166,110 @@ class AppInstaller(ABC):
         """Получить результат установки."""
         pass
     
+    def verify_checkpoint(self, phase: str) -> bool:
+        """Быстрая проверка, что завершённая в прошлом запуске фаза в силе.
+        
+        По умолчанию для pre_install проверяются пакеты из packages.
+        Установщики переопределяют для своих фаз (например, пакет приложения
+        после install).
+        """
+        if phase == "pre_install":
+            return not self._missing_packages(self.packages)
+        return True
+    
+    def checkpoint(self, name: str) -> None:
+        """Отметить завершение шага внутри фазы (сохраняется в контейнере)."""
+        if name not in self._checkpoints["checkpoints"]:
+            self._checkpoints["checkpoints"].append(name)
+        self._save_checkpoints()
+    
+    def passed_checkpoint(self, name: str) -> bool:
+        """Шаг name завершён в прошлом запуске (только при resume)."""
+        return name in self._resumed.get("checkpoints", [])
+    
+    def _checkpoint_path(self) -> str:
+        return f"{CHECKPOINT_DIR}/{self.name}.json"
+    
+    def _config_fingerprint(self) -> str:
+        data = json.dumps(self.config, sort_keys=True, default=str)
+        return hashlib.sha256(data.encode()).hexdigest()[:16]
+    
+    def _start_checkpoints(self, resume: bool) -> None:
+        """Загрузить checkpoint прошлого запуска (resume) и начать новый."""
+        fingerprint = self._config_fingerprint()
+        self._resumed = self._load_checkpoints() if resume else {}
+        if self._resumed and self._resumed.get("config") != fingerprint:
+            self.logger.warn("Install parameters changed since the last run, starting from scratch")
+            self._resumed = {}
+        
+        self._checkpoints = {
+            "config": fingerprint,
+            "phases": [],
+            "checkpoints": list(self._resumed.get("checkpoints", [])),
+            "attrs": {},
+        }
+        # Без resume старый checkpoint сбрасывается сразу: прерванный
+        # запуск не должен оставить чужие завершённые фазы
+        self._save_checkpoints()
+    
+    def _skip_phase(self, phase: str) -> bool:
+        """Пропустить фазу, завершённую в прошлом запуске.
+        
+        Пропускаются только фазы подряд с начала: после первой выполненной
+        фазы _resumed очищается и все следующие выполняются заново.
+        """
+        if phase not in self._resumed.get("phases", []) or not self.verify_checkpoint(phase):
+            return False
+        
+        self.logger.info(f"Skipping {phase}: completed in previous run")
+        for attr, value in self._resumed.get("attrs", {}).items():
+            setattr(self, attr, value)
+        self._checkpoints["phases"].append(phase)
+        return True
+    
+    def _load_checkpoints(self) -> dict:
+        result = self.system.run(["cat", self._checkpoint_path()], check=False)
+        if not result.success:
+            return {}
+        try:
+            state = json.loads(result.stdout)
+        except ValueError:
+            return {}
+        return state if isinstance(state, dict) else {}
+    
+    def _save_checkpoints(self) -> None:
+        """Записать checkpoint в контейнер (до этого ставятся пакеты из очереди apt)."""
+        self._checkpoints["attrs"] = {
+            attr: getattr(self, attr) for attr in self.checkpoint_attrs if hasattr(self, attr)
+        }
+        # Через write_file: содержимое (в том числе секреты из checkpoint_attrs)
+        # не попадает в аргументы команды, лог и замеры
+        try:
+            self.system.write_file(Path(self._checkpoint_path()), json.dumps(self._checkpoints), mode=0o600)
+        except OSError as e:
+            self.logger.warn(f"Cannot save checkpoint: {e}")
+    
     def _save_log(self) -> Path:
         """Сохранить лог установки."""
-        log_dir = Path("/var/log/pve-lxc")
+        log_dir = self.LOG_DIR
         log_dir.mkdir(parents=True, exist_ok=True)
         
         log_path = log_dir / f"{self.name}-install.log"
         log_path.write_text("\n".join(self._install_log))
         return log_path
     
+    def _save_timings(self) -> Optional[Path]:
+        """Сохранить замеры фаз и команд рядом с логом установки."""
+        timings_path = self.LOG_DIR / f"{self.name}-timings.json"
+        try:
+            self.LOG_DIR.mkdir(parents=True, exist_ok=True)
+            timings_path.write_text(json.dumps(self.timings.to_dict(), indent=2))
+        except OSError as e:
+            # Замеры вспомогательные: установка не должна падать из-за них
+            self.logger.debug(f"Cannot save timings: {e}")
+            return None
+        return timings_path
+    
     def log(self, message: str) -> None:
         """Добавить сообщение в лог."""
         self._install_log.append(message)
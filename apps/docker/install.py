@@ -15,14 +15,11 @@ class DockerInstaller(AppInstaller):
     default_memory = 2048
     default_disk = 20
     parameters = [{"name": "compose", "type": "bool", "default": True, "description": "Установить Docker Compose"}]
+    packages = ["ca-certificates", "curl", "gnupg"]
     
     def validate(self) -> bool:
         return True
     
-    def pre_install(self) -> None:
-        self.system.apt_update()
-        self.system.apt_install(["ca-certificates", "curl", "gnupg"])
-    
     def install(self) -> None:
         self.log("Adding Docker repository")
         self.system.run(["install", "-m", "0755", "-d", "/etc/apt/keyrings"])
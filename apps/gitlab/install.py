@@ -20,6 +20,7 @@ class GitlabInstaller(AppInstaller):
         {"name": "external_url", "type": "string", "required": True, "description": "URL для доступа к GitLab"},
         {"name": "smtp_enabled", "type": "bool", "default": False, "description": "Включить отправку email"}
     ]
+    packages = ["curl", "openssh-server", "ca-certificates", "tzdata", "perl"]
     
     def validate(self) -> bool:
         external_url = self.config.get("install", {}).get("external_url")
@@ -28,11 +29,6 @@ class GitlabInstaller(AppInstaller):
             return False
         return True
     
-    def pre_install(self) -> None:
-        self.log("Installing dependencies")
-        self.system.apt_update()
-        self.system.apt_install(["curl", "openssh-server", "ca-certificates", "tzdata", "perl"])
-    
     def install(self) -> None:
         self.log("Adding GitLab repository")
         self.system.run([
@@ -49,6 +45,12 @@ class GitlabInstaller(AppInstaller):
             check=True
         )
     
+    def verify_checkpoint(self, phase: str) -> bool:
+        # Установка пакета — самая долгая фаза, при resume достаточно, что он на месте
+        if phase == "install":
+            return not self._missing_packages(["gitlab-ce"])
+        return super().verify_checkpoint(phase)
+    
     def configure(self) -> None:
         external_url = self.config.get("install", {}).get("external_url", "http://gitlab.local")
         self.log(f"Configuring GitLab with external_url={external_url}")
@@ -19,15 +19,11 @@ class RailwayInstaller(AppInstaller):
     parameters = [
         {"name": "token", "type": "string", "required": False, "description": "Railway API token"},
     ]
+    packages = ["curl", "ca-certificates"]
     
     def validate(self) -> bool:
         return True
     
-    def pre_install(self) -> None:
-        """Установка зависимостей."""
-        self.system.apt_update()
-        self.system.apt_install(["curl", "ca-certificates"])
-    
     def install(self) -> None:
         """Установка Railway CLI через официальный скрипт."""
         self.log("Installing Railway CLI...")
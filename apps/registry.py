@@ -1,55 +1,133 @@
-"""Реестр приложений."""
+"""Реестр приложений.
 
+Метаданные приложений (описание, ресурсы, параметры) читаются из
+сгенерированного индекса apps/index.json без импорта установщиков.
+Модуль установщика импортируется только при AppRegistry.get().
+
+Пересборка индекса после изменения установщиков:
+
+    python -m apps.registry
+"""
+
+from pathlib import Path
 from typing import Optional, Type
+import importlib
+import json
+
+APPS_DIR = Path(__file__).parent
+INDEX_PATH = APPS_DIR / "index.json"
 
 
 class AppRegistry:
     """Реестр установщиков приложений."""
-    
+
     _apps: dict[str, Type] = {}
-    
+    _index: Optional[dict[str, dict]] = None
+
     @classmethod
     def register(cls, installer_class: Type) -> Type:
         """Декоратор для регистрации установщика."""
         name = getattr(installer_class, 'name', installer_class.__name__.lower().replace('installer', ''))
         cls._apps[name] = installer_class
         return installer_class
-    
+
+    @classmethod
+    def _load_index(cls) -> dict[str, dict]:
+        """Загрузить индекс приложений (собирается на лету, если файла нет)."""
+        if cls._index is None:
+            if INDEX_PATH.exists():
+                cls._index = json.loads(INDEX_PATH.read_text())
+            else:
+                cls._index = build_index()
+        return cls._index
+
     @classmethod
     def get(cls, name: str) -> Optional[Type]:
-        """Получить класс установщика по имени."""
+        """Получить класс установщика по имени (импортирует только его модуль)."""
+        if name not in cls._apps:
+            entry = cls._load_index().get(name)
+            if not entry:
+                return None
+            importlib.import_module(entry["module"])
         return cls._apps.get(name)
-    
+
+    @classmethod
+    def get_info(cls, name: str) -> Optional[dict]:
+        """Метаданные приложения без импорта установщика."""
+        if name in cls._apps:
+            return _describe(cls._apps[name])
+        return cls._load_index().get(name)
+
     @classmethod
     def list_all(cls) -> list[str]:
-        """Список всех зарегистрированных приложений."""
-        return sorted(cls._apps.keys())
-    
+        """Список всех приложений."""
+        return sorted(set(cls._apps) | set(cls._load_index()))
+
     @classmethod
     def get_help(cls, name: str) -> Optional[str]:
         """Справка по параметрам приложения."""
-        installer = cls.get(name)
-        if not installer:
+        info = cls.get_info(name)
+        if not info:
             return None
-        
+
         lines = [f"Application: {name}"]
-        
-        if hasattr(installer, 'description'):
-            lines.append(f"Description: {installer.description}")
-        
+
+        if info.get("description"):
+            lines.append(f"Description: {info['description']}")
+
         lines.append("")
         lines.append("Default resources:")
-        lines.append(f"  Cores: {getattr(installer, 'default_cores', 2)}")
-        lines.append(f"  Memory: {getattr(installer, 'default_memory', 2048)} MB")
-        lines.append(f"  Disk: {getattr(installer, 'default_disk', 10)} GB")
-        
+        lines.append(f"  Cores: {info['default_cores']}")
+        lines.append(f"  Memory: {info['default_memory']} MB")
+        lines.append(f"  Disk: {info['default_disk']} GB")
+
         # Параметры из config.yaml
-        if hasattr(installer, 'parameters'):
+        if info.get("parameters"):
             lines.append("")
             lines.append("Parameters:")
-            for param in installer.parameters:
+            for param in info["parameters"]:
                 req = " (required)" if param.get('required') else ""
                 default = f" [default: {param.get('default')}]" if 'default' in param else ""
                 lines.append(f"  --{param['name']}: {param.get('description', '')}{req}{default}")
-        
+
         return "\n".join(lines)
+
+
+def _describe(installer: Type) -> dict:
+    """Метаданные установщика для индекса."""
+    parameters = getattr(installer, 'parameters', [])
+    return {
+        "module": installer.__module__,
+        "class": installer.__name__,
+        "description": getattr(installer, 'description', ''),
+        "default_cores": getattr(installer, 'default_cores', 2),
+        "default_memory": getattr(installer, 'default_memory', 2048),
+        "default_disk": getattr(installer, 'default_disk', 10),
+        "parameters": parameters if isinstance(parameters, list) else [],
+    }
+
+
+def build_index() -> dict[str, dict]:
+    """Собрать индекс, импортировав все установщики из apps/*/install.py."""
+    for install_py in sorted(APPS_DIR.glob("*/install.py")):
+        importlib.import_module(f"apps.{install_py.parent.name}.install")
+
+    return {
+        name: _describe(installer)
+        for name, installer in sorted(AppRegistry._apps.items())
+        if installer.__module__.startswith("apps.")
+    }
+
+
+def write_index() -> None:
+    """Пересобрать apps/index.json."""
+    INDEX_PATH.write_text(json.dumps(build_index(), ensure_ascii=False, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    # Установщики регистрируются в apps.registry, а не в __main__
+    import sys
+    sys.path.insert(0, str(APPS_DIR.parent))
+    from apps.registry import write_index, INDEX_PATH
+    write_index()
+    print(f"Written {INDEX_PATH}")
@@ -24,6 +24,8 @@ class SupabaseInstaller(AppInstaller):
         {"name": "postgres_password", "type": "string", "required": False, "description": "Пароль PostgreSQL"},
         {"name": "dashboard_password", "type": "string", "required": False, "description": "Пароль Studio"},
     ]
+    # Сгенерированные в install секреты нужны get_result и при deploy --resume
+    checkpoint_attrs = ["_credentials"]
     
     SUPABASE_DIR = Path("/opt/supabase")
     
@@ -4,7 +4,7 @@ import sys
 sys.path.insert(0, str(__file__).rsplit("/", 2)[0])
 
 from lib.logger import Logger
-from lib.system import System
+from lib.system import System, APT_LISTS_MAX_AGE
 from lib.config import ConfigLoader
 
 
@@ -29,7 +29,7 @@ def install_base_packages(system: System, packages: list[str] = None) -> bool:
     
     system.apt_update()
     system.apt_install(packages)
-    return True
+    return system.apt_flush().success
 
 
 def run_bootstrap(logger: Logger = None) -> bool:
@@ -37,8 +37,8 @@ def run_bootstrap(logger: Logger = None) -> bool:
     if logger is None:
         logger = Logger()
     
-    system = System(logger)
     config = ConfigLoader().load_user_config().merge()
+    system = System(logger, apt_lists_max_age=config.get("apt", {}).get("lists_max_age", APT_LISTS_MAX_AGE))
     bootstrap_config = config.get("bootstrap", {})
     
     locale = bootstrap_config.get("locale", "en_US.UTF-8")
@@ -61,9 +61,8 @@ def apps_command(
             table.add_column("Description", style="green")
             
             for app_name in apps_list:
-                installer = registry.get(app_name)
-                desc = getattr(installer, 'description', '') if installer else ''
-                table.add_row(app_name, desc)
+                info = registry.get_info(app_name) or {}
+                table.add_row(app_name, info.get('description', ''))
             
             console.print(table)
 
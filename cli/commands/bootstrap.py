@@ -17,14 +17,16 @@ app = typer.Typer()
 def get_executor_from_context(ctx: typer.Context):
     """Получить executor из контекста."""
     host = ctx.obj.get("host") if ctx.obj else None
+    no_cache = ctx.obj.get("no_cache") if ctx.obj else False
     manager = HostManager()
-    return manager.get_executor(host)
+    return manager.get_executor(host, use_cache=not no_cache)
 
 
 @app.command()
 def bootstrap(
     ctx: typer.Context,
     ctid: Optional[int] = typer.Argument(None, help="CTID контейнера"),
+    force: bool = typer.Option(False, "--force", "-f", help="Выполнить все шаги заново, игнорируя штамп"),
     json_output: bool = typer.Option(False, "--json", help="Вывод в JSON формате"),
     config: Optional[str] = typer.Option(None, "--config", "-C", help="Путь к YAML файлу с параметрами"),
 ):
@@ -38,8 +40,9 @@ def bootstrap(
         logger.error(str(e))
         raise typer.Exit(1)
     
-    cfg = merge_config(yaml_cfg, ctid=ctid)
+    cfg = merge_config(yaml_cfg, ctid=ctid, force=force)
     ctid = cfg.get("ctid")
+    force = cfg.get("force", False)
     
     if ctid is None:
         logger.error("CTID is required (argument or in config)")
@@ -56,7 +59,7 @@ def bootstrap(
     # Получаем executor из контекста (--host)
     executor = get_executor_from_context(ctx)
     
-    success = bootstrap_container(logger, ctid, executor=executor)
+    success = bootstrap_container(logger, ctid, executor=executor, force=force)
     
     if success:
         logger.result(True, {"ctid": ctid})
@@ -0,0 +1,135 @@
+"""Команды кэшей: общий кэш пакетов APT для контейнеров."""
+
+import typer
+from typing import Optional
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from cli.core.host_manager import HostManager
+from lib.exceptions import DeployError
+from lib.logger import Logger
+
+cache_app = typer.Typer(
+    name="cache",
+    help="Кэши пакетов для контейнеров",
+    invoke_without_command=True
+)
+
+APT_CACHE_PORT = 3142
+
+
+@cache_app.callback()
+def cache_callback(ctx: typer.Context):
+    """Кэши пакетов для контейнеров."""
+    if ctx.invoked_subcommand is None:
+        typer.echo(ctx.get_help())
+
+
+def get_executor_from_context(ctx: typer.Context):
+    """Получить executor из контекста."""
+    host = ctx.obj.get("host") if ctx.obj else None
+    no_cache = ctx.obj.get("no_cache") if ctx.obj else False
+    manager = HostManager()
+    return manager.get_executor(host, use_cache=not no_cache)
+
+
+def first_ip(output: str) -> Optional[str]:
+    """Первый IPv4 из вывода hostname -I."""
+    for address in output.split():
+        if address.count(".") == 3:
+            return address
+    return None
+
+
+@cache_app.command("apt")
+def cache_apt(
+    ctx: typer.Context,
+    on_host: bool = typer.Option(False, "--on-host", help="Установить apt-cacher-ng на PVE хост, а не в контейнер"),
+    url: Optional[str] = typer.Option(None, "--url", help="Использовать существующий прокси (http://ip:3142)"),
+    disable: bool = typer.Option(False, "--disable", help="Не использовать APT прокси"),
+    ctid: Optional[int] = typer.Option(None, "--ctid", help="CTID контейнера кэша"),
+    ip: Optional[str] = typer.Option(None, "--ip", help="IP контейнера кэша"),
+    gateway: Optional[str] = typer.Option(None, "--gateway", help="Шлюз"),
+    port: int = typer.Option(APT_CACHE_PORT, "--port", help="Порт apt-cacher-ng"),
+    json_output: bool = typer.Option(False, "--json", help="Вывод в JSON формате"),
+):
+    """Развернуть apt-cacher-ng и подключить его к bootstrap и установщикам."""
+    logger = Logger(json_output=json_output)
+    logger.set_context(command="cache apt")
+    manager = HostManager()
+
+    if disable:
+        manager.save_settings("apt", {"proxy": None})
+        logger.result(True, {"proxy": None})
+        return
+
+    if not url:
+        executor = get_executor_from_context(ctx)
+        try:
+            address = _setup_on_host(logger, executor, port=port) if on_host else _setup_container(
+                logger, executor, ctid=ctid, ip=ip, gateway=gateway, port=port
+            )
+        except DeployError as e:
+            logger.error(str(e))
+            raise typer.Exit(1)
+        finally:
+            executor.close()
+        url = f"http://{address}:{port}"
+
+    # Прокси используется bootstrap и RemoteSystem для всех следующих установок
+    manager.save_settings("apt", {"proxy": url})
+    logger.result(True, {"proxy": url})
+
+
+def _setup_on_host(logger: Logger, executor, port: int = APT_CACHE_PORT) -> str:
+    """Установить apt-cacher-ng на PVE хост (порт port). Возвращает адрес хоста.
+    
+    Адрес — IP интерфейса управления (с маршрутом по умолчанию, обычно
+    vmbr0): первый адрес hostname -I может оказаться адресом другого моста,
+    недоступного контейнерам.
+    """
+    from cli.core.network import Network
+    from cli.core.pve import PVE
+    
+    logger.step("Installing apt-cacher-ng on host")
+    result = executor.run([
+        "sh", "-c",
+        "echo 'apt-cacher-ng apt-cacher-ng/tunnelenable boolean false' | debconf-set-selections && "
+        "apt-get update -qq && "
+        "DEBIAN_FRONTEND=noninteractive apt-get install -y -qq apt-cacher-ng && "
+        # Как в установщике apt_cacher_ng: порт в отдельном файле поверх acng.conf
+        f"printf 'Port: {int(port)}\\n' > /etc/apt-cacher-ng/zz-pve-lxc.conf && "
+        "systemctl enable apt-cacher-ng && systemctl restart apt-cacher-ng"
+    ])
+    if not result.success:
+        raise DeployError(f"Failed to install apt-cacher-ng: {result.stderr.strip()}")
+    
+    try:
+        return Network(logger, pve=PVE(logger, executor=executor)).get_host_network().ip
+    except RuntimeError as e:
+        raise DeployError(f"Cannot determine host management address ({e}), pass --url")
+
+
+def _setup_container(logger: Logger, executor, port: int, **kwargs) -> str:
+    """Развернуть apt-cacher-ng в отдельном контейнере. Возвращает его адрес."""
+    from cli.commands.deploy import deploy_app
+    from cli.core.pve import PVE
+
+    result = deploy_app(
+        logger, executor, "apt_cacher_ng", create=True, name="apt-cache",
+        params={"port": port}, **kwargs
+    )
+    if not result["success"]:
+        raise DeployError(f"Failed to deploy apt-cacher-ng: {result.get('message')}")
+
+    pve = PVE(logger, executor=executor)
+    container = pve.get_container(result["ctid"])
+    address = container.ip if container else None
+    if not address:
+        # DHCP: адрес известен только внутри контейнера
+        address = first_ip(pve.exec(result["ctid"], ["hostname", "-I"]).stdout)
+    if not address:
+        raise DeployError(f"Cannot determine address of container {result['ctid']}")
+    return address
@@ -7,7 +7,7 @@ import sys
 sys.path.insert(0, str(__file__).rsplit("/", 4)[0])
 from lib.logger import Logger
 from lib.validation import validate_name, validate_ip, validate_resources, ValidationError
-from cli.core.container import create_container
+from cli.core.container import create_container, create_from_golden
 from cli.core.host_manager import HostManager
 from cli.core.yaml_config import load_yaml_config, merge_config
 
@@ -17,8 +17,9 @@ app = typer.Typer()
 def get_executor_from_context(ctx: typer.Context):
     """Получить executor из контекста."""
     host = ctx.obj.get("host") if ctx.obj else None
+    no_cache = ctx.obj.get("no_cache") if ctx.obj else False
     manager = HostManager()
-    return manager.get_executor(host)
+    return manager.get_executor(host, use_cache=not no_cache)
 
 
 @app.command()
@@ -31,6 +32,7 @@ def create(
     ip: Optional[str] = typer.Option(None, "--ip", help="IP адрес или диапазон (21-50 или 192.168.1.100/24)"),
     gateway: Optional[str] = typer.Option(None, "--gateway", "-g", help="Gateway"),
     gpu: bool = typer.Option(False, "--gpu", help="Включить GPU passthrough"),
+    from_golden: Optional[str] = typer.Option(None, "--from-golden", help="Клонировать golden-образ приложения (pve-lxc golden build)"),
     json_output: bool = typer.Option(False, "--json", help="Вывод в JSON формате"),
     config: Optional[str] = typer.Option(None, "--config", "-C", help="Путь к YAML файлу с параметрами"),
     help_flag: bool = typer.Option(False, "--help", "-h", is_eager=True, help="Показать справку"),
@@ -51,7 +53,7 @@ def create(
         raise typer.Exit(1)
     
     cfg = merge_config(yaml_cfg, name=name, cores=cores, memory=memory, 
-                       disk=disk, ip=ip, gateway=gateway, gpu=gpu)
+                       disk=disk, ip=ip, gateway=gateway, gpu=gpu, from_golden=from_golden)
     
     # Извлекаем параметры
     name = cfg.get("name")
@@ -61,6 +63,7 @@ def create(
     ip = cfg.get("ip")
     gateway = cfg.get("gateway")
     gpu = cfg.get("gpu", False)
+    from_golden = cfg.get("from_golden")
     
     if not name:
         logger.error("Name is required (--name or in config)")
@@ -82,17 +85,30 @@ def create(
     # Получаем executor из контекста (--host)
     executor = get_executor_from_context(ctx)
     
-    result = create_container(
-        logger=logger,
-        name=name,
-        cores=cores,
-        memory=memory,
-        disk=disk,
-        ip=ip,
-        gateway=gateway,
-        gpu=gpu,
-        executor=executor
-    )
+    if from_golden:
+        result = create_from_golden(
+            logger=logger,
+            app=from_golden,
+            name=name,
+            cores=cores,
+            memory=memory,
+            disk=disk,
+            ip=ip,
+            gateway=gateway,
+            executor=executor
+        )
+    else:
+        result = create_container(
+            logger=logger,
+            name=name,
+            cores=cores,
+            memory=memory,
+            disk=disk,
+            ip=ip,
+            gateway=gateway,
+            gpu=gpu,
+            executor=executor
+        )
     
     if result.success:
         logger.result(True, {"ctid": result.ctid, "ip": result.ip})
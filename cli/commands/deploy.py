@@ -7,11 +7,18 @@ from pathlib import Path
 import sys
 sys.path.insert(0, str(__file__).rsplit("/", 4)[0])
 from lib.logger import Logger
-from lib.system import System, CommandResult
+from lib.system import (
+    System, CommandResult, SyncResult, AptTransactions, APT_LISTS_MAX_AGE, apt_proxy_script
+)
 from lib.config import ConfigLoader
+from lib.timing import Timings
+from lib.exceptions import DeployError
 from lib.validation import validate_ctid, validate_name, ValidationError
 from cli.core.pve import PVE
+from cli.core.executor import OutputChunk, collect_output
+from cli.core.exec_session import ExecSession, ExecSessionError, ExecSessionLost
 from cli.core.container import create_container, bootstrap_container
+from cli.core.readiness import wait_ready
 from cli.core.host_manager import HostManager
 from cli.core.yaml_config import load_yaml_config, merge_config
 from apps.registry import AppRegistry
@@ -20,41 +27,174 @@ from apps.registry import AppRegistry
 def get_executor_from_context(ctx: typer.Context):
     """Получить executor из контекста."""
     host = ctx.obj.get("host") if ctx.obj else None
+    no_cache = ctx.obj.get("no_cache") if ctx.obj else False
     manager = HostManager()
-    return manager.get_executor(host)
+    return manager.get_executor(host, use_cache=not no_cache)
+
+
+class OutputLogger:
+    """Построчная передача потокового вывода команды в Logger."""
+    
+    def __init__(self, logger: Logger):
+        self.logger = logger
+        self._partial = {"stdout": "", "stderr": ""}
+        # Объём всего вывода: в результате команды остаётся только его конец
+        self.bytes = 0
+    
+    def feed(self, chunk: OutputChunk) -> None:
+        """Обработать фрагмент вывода."""
+        self.bytes += len(chunk.data.encode())
+        if chunk.stream == "exit":
+            self.flush()
+            return
+        
+        *lines, self._partial[chunk.stream] = (self._partial[chunk.stream] + chunk.data).split("\n")
+        for line in lines:
+            self._emit(chunk.stream, line)
+    
+    def flush(self) -> None:
+        """Вывести незавершённые строки."""
+        for stream, line in self._partial.items():
+            if line:
+                self._emit(stream, line)
+            self._partial[stream] = ""
+    
+    def _emit(self, stream: str, line: str) -> None:
+        if line.strip():
+            self.logger.debug(line.rstrip("\r"), stream=stream)
 
 
 class RemoteSystem:
     """System для выполнения команд в контейнере через pct exec."""
     
-    def __init__(self, logger: Logger, pve, ctid: int):
+    # Сколько последнего вывода команды держать в памяти (символов на поток)
+    OUTPUT_LIMIT = 1024 * 1024
+    
+    def __init__(
+        self,
+        logger: Logger,
+        pve,
+        ctid: int,
+        session: ExecSession = None,
+        apt_proxy: str = None,
+        apt_lists_max_age: int = APT_LISTS_MAX_AGE
+    ):
         self.logger = logger
         self.pve = pve
         self.ctid = ctid
+        self.session = session
+        # URL apt-cacher-ng: настройка записывается перед первой операцией apt
+        self.apt_proxy = apt_proxy
+        self._apt_proxy_applied = False
+        self.apt = AptTransactions(self._run, logger, apt_lists_max_age)
+        # Замеры команд; фазы размечает AppInstaller
+        self.timings = Timings()
+        # Команды с check=True, завершившиеся ошибкой (фаза с ними не checkpoint)
+        self.failed_commands: list[str] = []
     
     def run(self, cmd: list[str], check: bool = True, capture: bool = True) -> CommandResult:
-        """Выполнить команду в контейнере."""
+        """Выполнить команду в контейнере (после установки нужных ей пакетов из очереди apt)."""
+        self.apt.barrier(cmd)
+        return self._run(cmd, check, capture)
+    
+    def _run(self, cmd: list[str], check: bool = True, capture: bool = True) -> CommandResult:
+        """Выполнить команду в контейнере, не трогая очередь apt.
+        
+        Вывод передаётся в лог по мере поступления, в результате остаются
+        последние OUTPUT_LIMIT символов stdout и stderr. При открытой
+        exec-сессии команда выполняется в ней, а вывод логируется после
+        завершения команды.
+        """
         self.logger.debug(f"Running: {' '.join(cmd)}")
-        result = self.pve.exec(self.ctid, cmd)
+        start = self.timings.clock()
+        output = OutputLogger(self.logger)
+        result = self._run_in_session(cmd, output) if self.session else None
+        if result is None:
+            result = collect_output(
+                self.pve.exec_stream(self.ctid, cmd),
+                on_chunk=output.feed,
+                limit=self.OUTPUT_LIMIT
+            )
+        self.timings.command(cmd, start, result.returncode, output.bytes)
         if check and not result.success:
             self.logger.error(f"Command failed: {' '.join(cmd)}", stderr=result.stderr)
+            self.failed_commands.append(" ".join(cmd))
+        return result
+    
+    def _run_in_session(self, cmd: list[str], output: OutputLogger):
+        """Выполнить команду в exec-сессии. None — команда не отправлена, сессия недоступна."""
+        try:
+            result = self.session.run(cmd)
+        except ExecSessionLost as e:
+            # Команда могла выполниться: повторять её через pct exec нельзя
+            self.logger.warn(f"Exec session lost, using pct exec for next commands: {e}")
+            self.session.close()
+            self.session = None
+            return CommandResult(returncode=255, stdout="", stderr=str(e))
+        except ExecSessionError as e:
+            # Дальше работаем через отдельные pct exec
+            self.logger.warn(f"Exec session lost, falling back to pct exec: {e}")
+            self.session.close()
+            self.session = None
+            return None
+        
+        output.feed(OutputChunk("stdout", result.stdout))
+        output.feed(OutputChunk("stderr", result.stderr))
+        output.flush()
         return result
     
+    def close(self) -> None:
+        """Закрыть exec-сессию."""
+        if self.session:
+            self.session.close()
+            self.session = None
+    
+    def _ensure_apt_proxy(self) -> None:
+        """Записать настройку APT прокси в контейнер (один раз)."""
+        if not self.apt_proxy or self._apt_proxy_applied:
+            return
+        self._apt_proxy_applied = True
+        self.logger.debug(f"Using APT proxy {self.apt_proxy}")
+        self._run(["sh", "-c", apt_proxy_script(self.apt_proxy)], check=False)
+    
     def apt_update(self) -> CommandResult:
-        """Обновить списки пакетов."""
-        self.logger.info("Updating package lists")
-        return self.run(["apt-get", "update", "-qq"])
+        """Обновить списки пакетов (пропускается, если они свежие)."""
+        self._ensure_apt_proxy()
+        return self.apt.update()
     
     def apt_install(self, packages: list[str]) -> CommandResult:
-        """Установить пакеты."""
-        self.logger.info(f"Installing packages: {', '.join(packages)}")
-        cmd = ["apt-get", "install", "-y", "-qq"] + packages
-        return self.run(cmd)
+        """Поставить пакеты в очередь: они устанавливаются перед следующей командой."""
+        self._ensure_apt_proxy()
+        return self.apt.install(packages)
+    
+    def apt_flush(self) -> CommandResult:
+        """Установить пакеты из очереди."""
+        return self.apt.flush()
     
     def systemctl(self, action: str, service: str) -> CommandResult:
         """Управление systemd сервисом."""
         self.logger.info(f"Systemctl {action} {service}")
         return self.run(["systemctl", action, service])
+    
+    def write_file(self, path: Path, content: str, mode: int = 0o644) -> None:
+        """Записать файл в контейнер (содержимое передаётся через stdin, не в аргументах)."""
+        self.apt.barrier(["tee", str(path)])
+        self.logger.debug(f"Writing file: {path}")
+        start = self.timings.clock()
+        success = self.pve.write_file(self.ctid, path, content, mode)
+        self.timings.command(["write_file", str(path)], start, 0 if success else 1, 0)
+        if not success:
+            self.logger.error(f"Failed to write file: {path}")
+            self.failed_commands.append(f"write_file {path}")
+    
+    def sync(self, local_dir: Path, remote_dir: Path, delete: bool = False) -> SyncResult:
+        """Синхронизировать директорию с контейнером (только изменённые файлы)."""
+        self.apt.barrier(["cp", str(local_dir), str(remote_dir)])
+        self.logger.info(f"Syncing {local_dir} -> {remote_dir}")
+        start = self.timings.clock()
+        result = self.pve.sync(self.ctid, local_dir, remote_dir, delete=delete)
+        self.timings.command(["sync", str(local_dir), str(remote_dir)], start, 0 if result.success else 1, 0)
+        return result
 
 
 app = typer.Typer()
@@ -73,6 +213,9 @@ def deploy(
     disk: Optional[int] = typer.Option(None, "--disk", help="Размер диска в ГБ"),
     ip: Optional[str] = typer.Option(None, "--ip", help="IP адрес"),
     gateway: Optional[str] = typer.Option(None, "--gateway", help="Шлюз"),
+    session: bool = typer.Option(False, "--session", help="Выполнять шаги установки в одной сессии pct exec"),
+    timings: bool = typer.Option(False, "--timings", help="Показать длительность фаз и самые долгие команды"),
+    resume: bool = typer.Option(False, "--resume", help="Продолжить прерванную установку с последнего checkpoint"),
     json_output: bool = typer.Option(False, "--json", help="Вывод в JSON формате"),
     config: Optional[str] = typer.Option(None, "--config", "-C", help="Путь к YAML файлу с параметрами"),
     help_flag: bool = typer.Option(False, "--help", "-h", is_eager=True, help="Показать справку"),
@@ -94,7 +237,8 @@ def deploy(
     
     cfg = merge_config(yaml_cfg, app=app_name, container=container, create=create,
                        ctid=ctid, name=name, cores=cores, memory=memory, 
-                       disk=disk, ip=ip, gateway=gateway)
+                       disk=disk, ip=ip, gateway=gateway, session=session,
+                       resume=resume)
     
     app_name = cfg.get("app")
     container = cfg.get("container")
@@ -106,6 +250,8 @@ def deploy(
     disk = cfg.get("disk")
     ip = cfg.get("ip")
     gateway = cfg.get("gateway")
+    session = cfg.get("session", False)
+    resume = cfg.get("resume", False)
     
     if not app_name:
         logger.error("App name is required (--app or in config)")
@@ -117,8 +263,7 @@ def deploy(
     executor = get_executor_from_context(ctx)
     
     # Проверяем что приложение существует
-    installer_class = AppRegistry.get(app_name)
-    if not installer_class:
+    if not AppRegistry.get(app_name):
         logger.error(f"Application '{app_name}' not found")
         available = ", ".join(AppRegistry.list_all())
         logger.info(f"Available apps: {available}")
@@ -133,6 +278,92 @@ def deploy(
     except ValidationError as e:
         logger.error(str(e))
         raise typer.Exit(1)
+    
+    try:
+        result = deploy_app(
+            logger, executor, app_name,
+            container=container, create=create, ctid=ctid, name=name,
+            cores=cores, memory=memory, disk=disk, ip=ip, gateway=gateway,
+            params=cfg.get("params"), session=session, resume=resume
+        )
+    except DeployError as e:
+        logger.error(str(e))
+        raise typer.Exit(1)
+    
+    success = result.pop("success")
+    logger.result(success, result)
+    if timings and not json_output:
+        # В JSON замеры уже есть в результате
+        print_timings(result["timings"])
+    if not success:
+        raise typer.Exit(1)
+
+
+def print_timings(timings: dict, limit: int = 10) -> None:
+    """Сводка замеров установки: фазы и самые долгие команды."""
+    from rich.console import Console
+    from rich.table import Table
+    
+    total = timings["total"] or 1
+    phases = Table(title=f"Phases ({timings['total']:.1f}s)")
+    phases.add_column("Phase", style="cyan")
+    phases.add_column("Time", justify="right")
+    phases.add_column("%", justify="right")
+    phases.add_column("Commands", justify="right")
+    for phase in timings["phases"]:
+        phases.add_row(
+            phase["name"], f"{phase['duration']:.1f}s",
+            f"{phase['duration'] * 100 / total:.0f}", str(len(phase["commands"]))
+        )
+    
+    spans = [("", command) for command in timings["commands"]]
+    spans += [(phase["name"], command) for phase in timings["phases"] for command in phase["commands"]]
+    spans.sort(key=lambda item: item[1]["duration"], reverse=True)
+    
+    commands = Table(title="Slowest commands")
+    commands.add_column("Time", justify="right")
+    commands.add_column("Phase", style="cyan")
+    commands.add_column("Exit", justify="right")
+    commands.add_column("Output", justify="right")
+    commands.add_column("Command", overflow="fold")
+    for phase, command in spans[:limit]:
+        commands.add_row(
+            f"{command['duration']:.1f}s", phase or "-", str(command["returncode"]),
+            f"{command['output_bytes'] // 1024}K", command["command"]
+        )
+    
+    console = Console()
+    console.print(phases)
+    console.print(commands)
+
+
+def deploy_app(
+    logger: Logger,
+    executor,
+    app_name: str,
+    container: int = None,
+    create: bool = False,
+    ctid: int = None,
+    name: str = None,
+    cores: int = None,
+    memory: int = None,
+    disk: int = None,
+    ip: str = None,
+    gateway: str = None,
+    params: dict = None,
+    session: bool = False,
+    resume: bool = False
+) -> dict:
+    """Развернуть приложение: создать контейнер (при create) и запустить установщик.
+    
+    С resume установщик пропускает фазы, завершённые в прошлом запуске.
+    
+    Ошибки до запуска установщика поднимаются как DeployError,
+    результат установки возвращается словарём с ключом success.
+    """
+    installer_class = AppRegistry.get(app_name)
+    if not installer_class:
+        raise DeployError(f"Application '{app_name}' not found")
 
     # Определяем CTID
     target_ctid = container  # существующий контейнер
@@ -160,18 +391,13 @@ def deploy(
         )
         
         if not result.success:
-            logger.error(f"Failed to create container: {result.message}")
-            raise typer.Exit(1)
+            raise DeployError(f"Failed to create container: {result.message}")
         
         target_ctid = result.ctid
         logger.success(f"Container {target_ctid} created")
-        
-        # Bootstrap контейнера
-        bootstrap_container(logger, target_ctid, executor=executor)
     
     if not target_ctid:
-        logger.error("Specify --container or use --create")
-        raise typer.Exit(1)
+        raise DeployError("Specify --container or use --create")
     
     # Загружаем конфигурацию
     config = (
@@ -179,40 +405,71 @@ def deploy(
         .load_app_config(app_name)
         .load_user_config()
         .override(cores=cores, memory=memory, disk=disk)
+        .override(**(params or {}))
         .merge()
     )
     
-    # Создаём установщик и запускаем
     pve = PVE(logger, executor=executor)
     
-    # Ждём готовности контейнера
-    import time
-    for _ in range(30):
-        result = pve.exec(target_ctid, ["true"])
-        if result.success:
-            break
-        time.sleep(1)
+    # Ждём готовности контейнера: exec, systemd, маршрут по умолчанию
+    readiness = config.get("readiness", {})
+    ready = wait_ready(
+        logger, pve, target_ctid,
+        probes=readiness.get("probes"),
+        timeout=readiness.get("timeout", 60),
+        dns_name=readiness.get("dns_name", "deb.debian.org")
+    )
+    if not ready.ready:
+        detail = f": {ready.message}" if ready.message else ""
+        raise DeployError(
+            f"Container {target_ctid} not ready after {ready.elapsed:.0f}s: "
+            f"probe '{ready.failed_probe}' failed{detail}"
+        )
+    
+    if create:
+        # Bootstrap контейнера вместе с пакетами, нужными установщику
+        if not bootstrap_container(
+            logger, target_ctid, executor=executor,
+            packages=getattr(installer_class, "packages", [])
+        ):
+            raise DeployError(f"Bootstrap of container {target_ctid} failed")
     
     # Создаём RemoteSystem для выполнения команд в контейнере
-    system = RemoteSystem(logger, pve, target_ctid)
+    exec_session = None
+    if session:
+        try:
+            exec_session = pve.open_session(target_ctid, output_limit=RemoteSystem.OUTPUT_LIMIT)
+        except (ExecSessionError, NotImplementedError) as e:
+            logger.warn(f"Exec session not available, using pct exec: {e}")
+    system = RemoteSystem(
+        logger, pve, target_ctid, session=exec_session,
+        apt_proxy=config.get("apt", {}).get("proxy"),
+        apt_lists_max_age=config.get("apt", {}).get("lists_max_age", APT_LISTS_MAX_AGE)
+    )
     
     # Запускаем установку
     installer = installer_class(logger, system, config)
-    result = installer.run()
+    try:
+        result = installer.run(resume=resume)
+    finally:
+        system.close()
     
     if result.success:
-        logger.result(True, {
+        return {
+            "success": True,
             "ctid": target_ctid,
             "app": app_name,
             "access_url": result.access_url,
-            "credentials": result.credentials
-        })
-    else:
-        logger.result(False, {
-            "message": result.message,
-            "log_path": str(result.log_path) if result.log_path else None
-        })
-        raise typer.Exit(1)
+            "credentials": result.credentials,
+            "timings": installer.timings.to_dict()
+        }
+    return {
+        "success": False,
+        "ctid": target_ctid,
+        "message": result.message,
+        "log_path": str(result.log_path) if result.log_path else None,
+        "timings": installer.timings.to_dict()
+    }
 
 
 if __name__ == "__main__":
@@ -18,8 +18,9 @@ app = typer.Typer()
 def get_executor_from_context(ctx: typer.Context):
     """Получить executor из контекста."""
     host = ctx.obj.get("host") if ctx.obj else None
+    no_cache = ctx.obj.get("no_cache") if ctx.obj else False
     manager = HostManager()
-    return manager.get_executor(host)
+    return manager.get_executor(host, use_cache=not no_cache)
 
 
 @app.command()
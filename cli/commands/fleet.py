@@ -0,0 +1,276 @@
+"""Команда fleet - параллельное развёртывание приложений по манифесту."""
+
+import typer
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field, fields
+from typing import Optional
+import threading
+
+import sys
+sys.path.insert(0, str(__file__).rsplit("/", 4)[0])
+from lib.logger import Logger
+from cli.core.pve import PVE
+from cli.core.network import Network
+from cli.core.host_manager import HostManager
+from cli.core.yaml_config import load_yaml_config
+from cli.commands.deploy import deploy_app
+
+MANIFEST_SAMPLE = """\
+defaults:
+  app: zabbix_agent
+  params:
+    server: 192.168.1.5
+
+targets:
+  - host: pve1
+    container: 101
+  - host: pve2
+    create: true
+    name: web-1
+    ip: 21-50
+    app: nginx
+"""
+
+app = typer.Typer()
+
+
+@dataclass
+class FleetTarget:
+    """Одна цель развёртывания из манифеста."""
+    app: str
+    host: Optional[str] = None
+    container: Optional[int] = None
+    create: bool = False
+    ctid: Optional[int] = None
+    name: Optional[str] = None
+    cores: Optional[int] = None
+    memory: Optional[int] = None
+    disk: Optional[int] = None
+    ip: Optional[str] = None
+    gateway: Optional[str] = None
+    params: dict = field(default_factory=dict)
+    session: bool = False
+
+
+def load_manifest(path: str) -> list[FleetTarget]:
+    """Загрузить манифест: секция defaults применяется ко всем targets."""
+    data = load_yaml_config(path)
+    defaults = data.get("defaults") or {}
+    known = {f.name for f in fields(FleetTarget)}
+
+    targets = []
+    for i, entry in enumerate(data.get("targets") or [], start=1):
+        merged = {**defaults, **entry}
+        merged["params"] = {**(defaults.get("params") or {}), **(entry.get("params") or {})}
+
+        unknown = set(merged) - known
+        if unknown:
+            raise ValueError(f"Target {i}: unknown keys: {', '.join(sorted(unknown))}")
+        if not merged.get("app"):
+            raise ValueError(f"Target {i}: app is required")
+        if not merged.get("container") and not merged.get("create"):
+            raise ValueError(f"Target {i}: specify container or create")
+
+        targets.append(FleetTarget(**merged))
+    return targets
+
+
+class FleetRunner:
+    """Параллельное развёртывание с ограничением числа задач на хост."""
+
+    def __init__(
+        self,
+        json_output: bool = False,
+        workers: int = 8,
+        per_host: int = 2,
+        manager: HostManager = None,
+        use_cache: bool = True,
+        prefetch: bool = False
+    ):
+        self.json_output = json_output
+        self.use_cache = use_cache
+        self.prefetch = prefetch
+        self.workers = workers
+        self.per_host = per_host
+        self.manager = manager or HostManager()
+        # CTID и IP, выделенные в этом запуске: pct create ещё не завершён,
+        # поэтому PVE о них не знает
+        self._alloc_lock = threading.Lock()
+        self._reserved_ctids: set[int] = set()
+        self._reserved_ips: set[str] = set()
+
+    def run(self, targets: list[FleetTarget], on_result=None) -> list[dict]:
+        """Развернуть все цели. on_result вызывается по мере завершения.
+
+        Цели ставятся в очередь своего хоста и передаются в пул, только когда
+        у хоста есть свободный слот: потоки пула не ждут занятый хост, пока
+        другие хосты простаивают.
+        """
+        if self.prefetch:
+            self._prefetch_templates(targets)
+
+        queues: dict[Optional[str], deque] = {}
+        for index, target in enumerate(targets, start=1):
+            queues.setdefault(target.host, deque()).append((index, target))
+        running = {host: 0 for host in queues}
+
+        results = [None] * len(targets)
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {}
+
+            def submit_ready() -> None:
+                """Запустить цели хостов со свободными слотами (по кругу по хостам)."""
+                submitted = True
+                while submitted and len(futures) < self.workers:
+                    submitted = False
+                    for host, queue in queues.items():
+                        if queue and running[host] < self.per_host and len(futures) < self.workers:
+                            index, target = queue.popleft()
+                            running[host] += 1
+                            futures[pool.submit(self._run_target, index, target)] = (index, host)
+                            submitted = True
+
+            submit_ready()
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, host = futures.pop(future)
+                    running[host] -= 1
+                    result = future.result()
+                    results[index - 1] = result
+                    if on_result:
+                        on_result(result)
+                submit_ready()
+        return results
+
+    def _prefetch_templates(self, targets: list[FleetTarget]) -> None:
+        """Скачать шаблон на все хосты, где создаются контейнеры, до начала развёртывания."""
+        hosts = list(dict.fromkeys(target.host for target in targets if target.create))
+        if not hosts:
+            return
+
+        from lib.config import ConfigLoader
+        from cli.core.prefetch import prefetch_templates
+
+        config = ConfigLoader().load_user_config().merge()
+        template = config.get("container", {}).get("template", "debian-12-standard")
+
+        logger = Logger(json_output=self.json_output)
+        logger.set_context(command="fleet")
+        logger.info(f"Prefetching template {template} on {len(hosts)} hosts")
+        items = prefetch_templates(
+            hosts, [template], manager=self.manager, workers=self.workers,
+            json_output=self.json_output, use_cache=self.use_cache
+        )
+        for item in items:
+            if item.status == "failed":
+                # Не фатально: create_container попробует скачать шаблон сам
+                logger.warn(f"Template prefetch failed on {item.host or 'default'}: {item.message}")
+
+    def _run_target(self, index: int, target: FleetTarget) -> dict:
+        """Развернуть одну цель."""
+        logger = Logger(json_output=self.json_output)
+        logger.set_context(command="fleet", target=index, host=target.host, app=target.app)
+
+        executor = None
+        try:
+            executor = self.manager.get_executor(target.host, use_cache=self.use_cache)
+            if target.create:
+                self._allocate(logger, executor, target)
+            result = deploy_app(
+                logger, executor, target.app,
+                container=target.container, create=target.create, ctid=target.ctid,
+                name=target.name, cores=target.cores, memory=target.memory,
+                disk=target.disk, ip=target.ip, gateway=target.gateway,
+                params=target.params, session=target.session
+            )
+        except Exception as e:
+            # Ошибка одной цели не должна останавливать остальные
+            result = {"success": False, "message": str(e)}
+        finally:
+            if executor:
+                executor.close()
+
+        result.update(target=index, host=target.host or "default", app=target.app)
+        result.setdefault("ctid", target.container or target.ctid)
+        return result
+
+    def _allocate(self, logger: Logger, executor, target: FleetTarget) -> None:
+        """Выделить CTID и IP для нового контейнера без гонок между задачами."""
+        with self._alloc_lock:
+            pve = PVE(logger, executor=executor)
+            if not target.ctid:
+                target.ctid = pve.next_ctid(exclude=self._reserved_ctids)
+            self._reserved_ctids.add(target.ctid)
+
+            if target.ip:
+                network = Network(logger, pve=pve, reserved=self._reserved_ips)
+                ip, mask, gateway = network.resolve_ip(target.ip)
+                self._reserved_ips.add(ip)
+                target.ip = f"{ip}/{mask}"
+                target.gateway = target.gateway or gateway
+
+
+@app.command()
+def fleet(
+    ctx: typer.Context,
+    manifest: Optional[str] = typer.Argument(None, help="YAML манифест с целями развёртывания"),
+    workers: int = typer.Option(8, "--workers", "-w", help="Максимум одновременных развёртываний"),
+    per_host: int = typer.Option(2, "--per-host", help="Максимум одновременных развёртываний на хост"),
+    prefetch: bool = typer.Option(True, "--prefetch/--no-prefetch", help="Скачать шаблоны на хосты до начала развёртывания"),
+    json_output: bool = typer.Option(False, "--json", help="Вывод в JSON формате"),
+):
+    """Развернуть приложения в нескольких контейнерах/хостах параллельно."""
+    if not manifest:
+        typer.echo(ctx.get_help())
+        typer.echo("\nПример манифеста:\n")
+        typer.echo(MANIFEST_SAMPLE)
+        raise typer.Exit(0)
+
+    logger = Logger(json_output=json_output)
+    logger.set_context(command="fleet")
+
+    try:
+        targets = load_manifest(manifest)
+    except (FileNotFoundError, ValueError, TypeError) as e:
+        logger.error(str(e))
+        raise typer.Exit(1)
+
+    if not targets:
+        logger.error("Manifest has no targets")
+        raise typer.Exit(1)
+
+    logger.info(f"Deploying {len(targets)} targets (workers={workers}, per host={per_host})")
+
+    def report(result: dict) -> None:
+        """Итог по цели сразу после её завершения."""
+        target_logger = Logger(json_output=json_output)
+        target_logger.set_context(command="fleet", target=result["target"])
+        data = dict(result)
+        success = data.pop("success")
+        if json_output:
+            target_logger.result(success, data)
+        elif success:
+            target_logger.success(f"[{result['target']}] {result['host']}/{result.get('ctid')}: {result['app']} deployed")
+        else:
+            target_logger.error(f"[{result['target']}] {result['host']}/{result.get('ctid')}: {result['app']} failed: {result.get('message')}")
+
+    runner = FleetRunner(
+        json_output=json_output, workers=workers, per_host=per_host,
+        use_cache=not (ctx.obj or {}).get("no_cache"), prefetch=prefetch
+    )
+    results = runner.run(targets, on_result=report)
+
+    failed = [r for r in results if not r["success"]]
+    logger.result(not failed, {
+        "count": len(results),
+        "failed": len(failed),
+        "targets": results,
+    })
+    if failed:
+        raise typer.Exit(1)
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,107 @@
+"""Команды golden-образов: контейнеров-шаблонов с установленным приложением."""
+
+import typer
+from typing import Optional
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from cli.core.host_manager import HostManager
+from cli.core.pve import PVE
+from lib.exceptions import DeployError
+from lib.logger import Logger
+
+golden_app = typer.Typer(
+    name="golden",
+    help="Golden-образы приложений для быстрого создания контейнеров",
+    invoke_without_command=True
+)
+
+
+@golden_app.callback()
+def golden_callback(ctx: typer.Context):
+    """Golden-образы приложений."""
+    if ctx.invoked_subcommand is None:
+        typer.echo(ctx.get_help())
+
+
+def get_executor_from_context(ctx: typer.Context):
+    """Получить executor из контекста."""
+    host = ctx.obj.get("host") if ctx.obj else None
+    no_cache = ctx.obj.get("no_cache") if ctx.obj else False
+    manager = HostManager()
+    return manager.get_executor(host, use_cache=not no_cache)
+
+
+@golden_app.command("build")
+def golden_build(
+    ctx: typer.Context,
+    app_name: str = typer.Option(..., "--app", "-a", help="Приложение для golden-образа"),
+    ctid: Optional[int] = typer.Option(None, "--ctid", help="CTID golden-образа"),
+    ip: Optional[str] = typer.Option(None, "--ip", help="IP адрес на время сборки (по умолчанию DHCP)"),
+    gateway: Optional[str] = typer.Option(None, "--gateway", help="Шлюз"),
+    config: Optional[str] = typer.Option(None, "--config", "-C", help="YAML файл с параметрами приложения (params)"),
+    json_output: bool = typer.Option(False, "--json", help="Вывод в JSON формате"),
+):
+    """Собрать golden-образ: создать контейнер, установить приложение, pct template."""
+    from cli.commands.deploy import deploy_app
+    from cli.core.container import seal_golden
+    from cli.core.yaml_config import load_yaml_config
+
+    logger = Logger(json_output=json_output)
+    logger.set_context(command="golden build", app=app_name)
+
+    try:
+        params = load_yaml_config(config).get("params")
+    except FileNotFoundError as e:
+        logger.error(str(e))
+        raise typer.Exit(1)
+
+    executor = get_executor_from_context(ctx)
+    try:
+        result = deploy_app(
+            logger, executor, app_name, create=True, ctid=ctid,
+            name=f"golden-{app_name.replace('_', '-')}", ip=ip, gateway=gateway, params=params
+        )
+    except DeployError as e:
+        logger.error(str(e))
+        raise typer.Exit(1)
+
+    if not result["success"]:
+        result.pop("success")
+        logger.result(False, result)
+        raise typer.Exit(1)
+
+    if not seal_golden(logger, result["ctid"], app_name, executor=executor):
+        logger.result(False, {"ctid": result["ctid"], "message": "Failed to convert container to template"})
+        raise typer.Exit(1)
+
+    logger.result(True, {"ctid": result["ctid"], "app": app_name})
+
+
+@golden_app.command("list")
+def golden_list(
+    ctx: typer.Context,
+    json_output: bool = typer.Option(False, "--json", help="Вывод в JSON формате"),
+):
+    """Список golden-образов хоста."""
+    logger = Logger(json_output=json_output)
+    logger.set_context(command="golden list")
+
+    pve = PVE(logger, executor=get_executor_from_context(ctx))
+    images = pve.golden_images()
+
+    if json_output:
+        logger.result(True, {"images": [{"app": app, "ctid": ctid} for app, ctid in images.items()]})
+        return
+
+    from rich.console import Console
+    from rich.table import Table
+
+    table = Table(title="Golden images")
+    table.add_column("App", style="cyan")
+    table.add_column("CTID", justify="right")
+    for app, ctid in sorted(images.items()):
+        table.add_row(app, str(ctid))
+    Console().print(table)
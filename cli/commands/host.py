@@ -12,6 +12,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 from cli.core.host_manager import HostManager
 from cli.core.ssh_config import SSHConfigError
 from lib.exceptions import HostNotFoundError
+from lib.logger import Logger
 
 console = Console()
 host_app = typer.Typer(
@@ -91,6 +92,8 @@ def host_list(
     if verbose:
         table.add_column("Статус")
         table.add_column("PVE версия")
+        import asyncio
+        tests = asyncio.run(_collect_tests(manager))
     
     for host in hosts:
         name = host.get("name", "")
@@ -105,7 +108,7 @@ def host_list(
         ]
         
         if verbose:
-            test_result = manager.test(name)
+            test_result = tests[name]
             status = "[green]online[/green]" if test_result["connected"] else "[red]offline[/red]"
             pve_version = test_result.get("pve_version", "-") or "-"
             row.extend([status, pve_version])
@@ -117,11 +120,25 @@ def host_list(
 
 @host_app.command("test")
 def host_test(
-    name: str = typer.Argument(..., help="Имя хоста для проверки"),
+    name: Optional[str] = typer.Argument(None, help="Имя хоста для проверки"),
+    all_hosts: bool = typer.Option(False, "--all", "-a", help="Проверить все хосты одновременно"),
+    timeout: float = typer.Option(10.0, "--timeout", "-t", help="Таймаут на хост, секунды (с --all)"),
+    json_output: bool = typer.Option(False, "--json", help="Вывод в JSON формате (с --all)"),
 ):
     """Проверить подключение к PVE хосту."""
     manager = get_host_manager()
     
+    if all_hosts:
+        import asyncio
+        results = asyncio.run(_test_all(manager, timeout, json_output))
+        if not all(r["connected"] for r in results):
+            raise typer.Exit(1)
+        return
+    
+    if not name:
+        console.print("[red]✗[/red] Укажите имя хоста или --all")
+        raise typer.Exit(1)
+    
     console.print(f"Проверка подключения к '{name}'...")
     
     result = manager.test(name)
@@ -136,6 +153,43 @@ def host_test(
         raise typer.Exit(1)
 
 
+async def _collect_tests(manager: HostManager) -> dict[str, dict]:
+    """Результаты проверки всех хостов по имени."""
+    return {result["name"]: result async for result in manager.test_all()}
+
+
+async def _test_all(manager: HostManager, timeout: float, json_output: bool) -> list[dict]:
+    """Проверить все хосты, выводя строку по каждому сразу после ответа."""
+    results = []
+    
+    if json_output:
+        async for result in manager.test_all(timeout=timeout):
+            results.append(result)
+            logger = Logger(json_output=True)
+            logger.set_context(command="host test", host=result["name"])
+            logger.result(result["connected"], result)
+        failed = [r["name"] for r in results if not r["connected"]]
+        Logger(json_output=True).result(not failed, {"count": len(results), "failed": failed})
+        return results
+    
+    from rich.live import Live
+    
+    table = Table(title="PVE Хосты")
+    table.add_column("Имя", style="cyan")
+    table.add_column("Статус")
+    table.add_column("PVE версия / ошибка")
+    
+    with Live(table, console=console, refresh_per_second=8):
+        async for result in manager.test_all(timeout=timeout):
+            results.append(result)
+            if result["connected"]:
+                table.add_row(result["name"], "[green]online[/green]", result["pve_version"])
+            else:
+                table.add_row(result["name"], "[red]offline[/red]", result["error"] or "-")
+    
+    return results
+
+
 @host_app.command("set-default")
 def host_set_default(
     name: str = typer.Argument(..., help="Имя хоста по умолчанию"),
@@ -149,3 +203,50 @@ def host_set_default(
     except HostNotFoundError as e:
         console.print(f"[red]✗[/red] {e}")
         raise typer.Exit(1)
+
+
+@host_app.command("broker")
+def host_broker(
+    action: str = typer.Argument("status", help="start | stop | status"),
+):
+    """Управление брокером SSH соединений (переиспользование соединений между запусками)."""
+    from cli.core.ssh_broker import BrokerClient
+    
+    manager = get_host_manager()
+    settings = manager.get_broker_settings()
+    client = BrokerClient(settings["socket"], timeout=5)
+    
+    if action == "start":
+        if client.start(idle_timeout=settings["idle"]):
+            console.print(f"[green]✓[/green] Брокер запущен: {settings['socket']}")
+        else:
+            console.print("[red]✗[/red] Не удалось запустить брокер")
+            raise typer.Exit(1)
+    elif action == "stop":
+        if client.is_running():
+            client.request({"op": "shutdown"})
+            console.print("[green]✓[/green] Брокер остановлен")
+        else:
+            console.print("Брокер не запущен")
+    elif action == "status":
+        if not client.is_running():
+            console.print("Брокер не запущен")
+            if not settings["enabled"]:
+                console.print("\nВключите в ~/.pve-lxc/config.yaml:")
+                console.print("  ssh:\n    broker: true")
+            return
+        
+        status = client.request({"op": "status"})
+        console.print(f"Брокер запущен (pid {status['pid']}): {settings['socket']}")
+        
+        table = Table(title="Соединения")
+        table.add_column("Хост", style="cyan")
+        table.add_column("Пользователь")
+        table.add_column("Порт")
+        table.add_column("Простой, с")
+        for host in status["hosts"]:
+            table.add_row(host["host"], host["user"], str(host["port"]), str(host["idle"]))
+        console.print(table)
+    else:
+        console.print(f"[red]✗[/red] Неизвестное действие: {action}")
+        raise typer.Exit(1)
@@ -7,6 +7,8 @@ import sys
 sys.path.insert(0, str(__file__).rsplit("/", 4)[0])
 from lib.logger import Logger
 from cli.core.network import Network
+from cli.core.pve import PVE
+from cli.core.host_manager import HostManager
 from cli.core.yaml_config import load_yaml_config, merge_config
 
 from rich.panel import Panel
@@ -26,6 +28,14 @@ pve-lxc free-ip 192.168.1.21-50 --json\
 app = typer.Typer()
 
 
+def get_executor_from_context(ctx: typer.Context):
+    """Получить executor из контекста."""
+    host = ctx.obj.get("host") if ctx.obj else None
+    no_cache = ctx.obj.get("no_cache") if ctx.obj else False
+    manager = HostManager()
+    return manager.get_executor(host, use_cache=not no_cache)
+
+
 @app.command(epilog="")
 def ip(
     ctx: typer.Context,
@@ -63,7 +73,9 @@ def ip(
     
     logger.set_context(command="ip", range=ip_range)
     
-    network = Network(logger)
+    # IP контейнеров берём с PVE хоста (--host), чтобы не пинговать их
+    pve = PVE(logger, executor=get_executor_from_context(ctx))
+    network = Network(logger, pve=pve)
     
     try:
         free_ips = network.list_free_ips(ip_range)
@@ -1,13 +1,11 @@
 """Команда list - список контейнеров."""
 
 import typer
-from rich.console import Console
-from rich.table import Table
 
 import sys
 sys.path.insert(0, str(__file__).rsplit("/", 4)[0])
 from lib.logger import Logger
-from cli.core.pve import PVE
+from cli.core.pve import PVE, Container
 from cli.core.host_manager import HostManager
 
 app = typer.Typer()
@@ -16,19 +14,41 @@ app = typer.Typer()
 def get_executor_from_context(ctx: typer.Context):
     """Получить executor из контекста."""
     host = ctx.obj.get("host") if ctx.obj else None
+    no_cache = ctx.obj.get("no_cache") if ctx.obj else False
     manager = HostManager()
-    return manager.get_executor(host)
+    return manager.get_executor(host, use_cache=not no_cache)
+
+
+def container_dict(c: Container) -> dict:
+    """Контейнер для JSON вывода."""
+    return {
+        "ctid": c.ctid,
+        "name": c.name,
+        "status": c.status,
+        "ip": c.ip,
+        "cores": c.cores,
+        "memory": c.memory
+    }
 
 
 @app.command("list")
 def list_containers(
     ctx: typer.Context,
     json_output: bool = typer.Option(False, "--json", help="Вывод в JSON формате"),
+    all_hosts: bool = typer.Option(False, "--all-hosts", help="Контейнеры всех хостов из SSH config"),
+    timeout: float = typer.Option(10.0, "--timeout", "-t", help="Таймаут на хост, секунды (с --all-hosts)"),
 ):
     """Показать список LXC контейнеров."""
     logger = Logger(json_output=json_output)
     logger.set_context(command="list")
     
+    if all_hosts:
+        import asyncio
+        failed = asyncio.run(list_all_hosts(logger, timeout, json_output))
+        if failed:
+            raise typer.Exit(1)
+        return
+    
     # Получаем executor из контекста (--host)
     executor = get_executor_from_context(ctx)
     
@@ -36,19 +56,13 @@ def list_containers(
     containers = pve.list_containers()
     
     if json_output:
-        data = [
-            {
-                "ctid": c.ctid,
-                "name": c.name,
-                "status": c.status,
-                "ip": c.ip,
-                "cores": c.cores,
-                "memory": c.memory
-            }
-            for c in containers
-        ]
+        data = [container_dict(c) for c in containers]
         logger.result(True, {"containers": data, "count": len(data)})
     else:
+        # rich нужен только таблице: list --json запускается быстрее без него
+        from rich.console import Console
+        from rich.table import Table
+        
         console = Console()
         table = Table(title="LXC Containers")
         
@@ -73,5 +87,68 @@ def list_containers(
         console.print(table)
 
 
+async def list_all_hosts(logger: Logger, timeout: float, json_output: bool) -> list[str]:
+    """Опросить все хосты одновременно, выводя результат каждого по готовности.
+    
+    Возвращает имена хостов, которые не ответили.
+    """
+    from rich.console import Console
+    from rich.live import Live
+    from rich.table import Table
+    from cli.core.async_pve import AsyncPVE
+    
+    manager = HostManager()
+    
+    async def fetch(name: str, executor) -> list[Container]:
+        return await AsyncPVE(logger, executor).list_containers()
+    
+    failed = []
+    total = 0
+    
+    if json_output:
+        async for name, outcome in manager.map_hosts(fetch, timeout=timeout):
+            host_logger = Logger(json_output=True)
+            host_logger.set_context(command="list", host=name)
+            if isinstance(outcome, Exception):
+                failed.append(name)
+                host_logger.result(False, {"host": name, "error": str(outcome)})
+            else:
+                total += len(outcome)
+                data = [container_dict(c) for c in outcome]
+                host_logger.result(True, {"host": name, "containers": data, "count": len(data)})
+        logger.result(not failed, {"count": total, "failed": failed})
+        return failed
+    
+    console = Console()
+    table = Table(title="LXC Containers")
+    table.add_column("Host", style="magenta")
+    table.add_column("CTID", style="cyan")
+    table.add_column("Name", style="green")
+    table.add_column("Status", style="yellow")
+    table.add_column("IP", style="blue")
+    table.add_column("Cores")
+    table.add_column("Memory")
+    
+    with Live(table, console=console, refresh_per_second=8):
+        async for name, outcome in manager.map_hosts(fetch, timeout=timeout):
+            if isinstance(outcome, Exception):
+                failed.append(name)
+                table.add_row(name, "-", f"[red]{outcome}[/red]", "[red]unreachable[/red]", "-", "-", "-")
+                continue
+            for c in outcome:
+                status_style = "green" if c.status == "running" else "red"
+                table.add_row(
+                    name,
+                    str(c.ctid),
+                    c.name,
+                    f"[{status_style}]{c.status}[/{status_style}]",
+                    c.ip or "-",
+                    str(c.cores),
+                    f"{c.memory}MB"
+                )
+    
+    return failed
+
+
 if __name__ == "__main__":
     app()
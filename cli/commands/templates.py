@@ -0,0 +1,129 @@
+"""Команды работы с шаблонами контейнеров."""
+
+import typer
+from typing import Optional
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from cli.core.host_manager import HostManager
+from lib.logger import Logger
+
+templates_app = typer.Typer(
+    name="templates",
+    help="Шаблоны контейнеров",
+    invoke_without_command=True
+)
+
+
+@templates_app.callback()
+def templates_callback(ctx: typer.Context):
+    """Шаблоны контейнеров."""
+    if ctx.invoked_subcommand is None:
+        typer.echo(ctx.get_help())
+
+
+def split_option(values: list[str]) -> list[str]:
+    """Значения повторяемой опции, допускающей и список через запятую."""
+    return [part.strip() for value in values for part in value.split(",") if part.strip()]
+
+
+@templates_app.command("prefetch")
+def templates_prefetch(
+    ctx: typer.Context,
+    names: list[str] = typer.Argument(None, help="Шаблоны (например debian-12-standard); по умолчанию из конфигурации"),
+    hosts: list[str] = typer.Option([], "--hosts", help="Хосты (через запятую или несколько раз)"),
+    all_hosts: bool = typer.Option(False, "--all-hosts", help="Все хосты из SSH config"),
+    storages: list[str] = typer.Option([], "--storage", "-s", help="Хранилища (по умолчанию первое с vztmpl)"),
+    workers: int = typer.Option(8, "--workers", "-w", help="Максимум одновременных скачиваний"),
+    verify: bool = typer.Option(False, "--verify", help="Проверить sha512 и уже скачанных шаблонов"),
+    json_output: bool = typer.Option(False, "--json", help="Вывод в JSON формате"),
+):
+    """Скачать шаблоны на хосты заранее, параллельно и с проверкой sha512."""
+    from cli.core.prefetch import TemplatePrefetcher
+
+    obj = ctx.obj or {}
+    json_output = json_output or obj.get("json_output", False)
+    logger = Logger(json_output=json_output)
+    logger.set_context(command="templates prefetch")
+
+    manager = HostManager()
+    if all_hosts:
+        host_names = [host["name"] for host in manager.list()]
+    else:
+        host_names = split_option(hosts) or [obj.get("host")]
+    if not host_names:
+        logger.error("No hosts configured")
+        raise typer.Exit(1)
+
+    if not names:
+        from lib.config import ConfigLoader
+        config = ConfigLoader().load_user_config().merge()
+        names = [config.get("container", {}).get("template", "debian-12-standard")]
+
+    prefetcher = TemplatePrefetcher(
+        manager=manager, workers=workers, json_output=json_output,
+        use_cache=not obj.get("no_cache"), verify_existing=verify
+    )
+    items = prefetcher.plan(host_names, names, split_option(storages) or None)
+
+    if json_output:
+        def report(item) -> None:
+            if item.status in ("present", "downloaded", "failed"):
+                item_logger = Logger(json_output=True)
+                item_logger.set_context(command="templates prefetch", host=item.host or "default")
+                item_logger.result(item.status != "failed", item.to_dict())
+
+        prefetcher.run(items, on_progress=report)
+    else:
+        _run_with_progress(prefetcher, items)
+
+    failed = [item for item in items if item.status == "failed"]
+    logger.result(not failed, {
+        "count": len(items),
+        "downloaded": sum(1 for item in items if item.status == "downloaded"),
+        "present": sum(1 for item in items if item.status == "present"),
+        "failed": len(failed),
+    })
+    if failed:
+        raise typer.Exit(1)
+
+
+def _run_with_progress(prefetcher, items) -> None:
+    """Скачать шаблоны, показывая строку прогресса по каждому."""
+    from rich.console import Console
+    from rich.progress import BarColumn, Progress, TextColumn
+
+    console = Console()
+    labels = {
+        "pending": "[dim]queued[/dim]",
+        "present": "[green]present[/green]",
+        "downloading": "[cyan]downloading[/cyan]",
+        "verifying": "[cyan]verifying[/cyan]",
+        "downloaded": "[green]downloaded[/green]",
+        "failed": "[red]failed[/red]",
+    }
+
+    with Progress(
+        TextColumn("{task.description}"),
+        BarColumn(),
+        TextColumn("{task.percentage:>3.0f}%"),
+        TextColumn("{task.fields[status]}"),
+        console=console,
+    ) as progress:
+        tasks = {}
+        for item in items:
+            description = f"{item.host or 'default'}/{item.storage}: {item.template or item.name}"
+            tasks[id(item)] = progress.add_task(description, total=100, status=labels["pending"])
+
+        def update(item) -> None:
+            done = item.status in ("present", "downloaded")
+            status = labels.get(item.status, item.status)
+            if item.verified:
+                status += " [green]sha512 ✓[/green]"
+            if item.status == "failed" and item.message:
+                status += f" {item.message}"
+            progress.update(tasks[id(item)], completed=100 if done else item.percent, status=status)
+
+        prefetcher.run(items, on_progress=update)
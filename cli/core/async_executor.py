@@ -0,0 +1,220 @@
+"""Асинхронные executor для одновременной работы с несколькими хостами.
+
+Контракт совпадает с CommandExecutor (run, push_file, read_file, close),
+но методы — корутины. Один event loop может вести сотни одновременных
+вызовов pct/pvesh на разных хостах кластера.
+"""
+
+from abc import ABC, abstractmethod
+from concurrent.futures import Executor, Future
+from pathlib import Path
+from typing import Optional
+import asyncio
+import queue
+import shutil
+import threading
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from lib.system import CommandResult
+from cli.core.executor import SSHExecutor
+
+# Одновременных каналов на одно SSH соединение (sshd MaxSessions = 10)
+SSH_MAX_SESSIONS = 8
+
+# Потоки для блокирующих вызовов paramiko, общие для всех хостов
+SSH_THREADS = 128
+
+
+class _DaemonPool(Executor):
+    """Пул daemon-потоков.
+
+    ThreadPoolExecutor дожидается своих потоков при выходе интерпретатора:
+    зависший в connect поток paramiko (хост не отвечает, asyncio.wait_for
+    его не прерывает) задержал бы завершение команды. Daemon-потоки выход
+    не блокируют.
+    """
+
+    def __init__(self, max_workers: int, thread_name_prefix: str):
+        self.max_workers = max_workers
+        self.thread_name_prefix = thread_name_prefix
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._idle = threading.Semaphore(0)
+        self._threads = 0
+        self._lock = threading.Lock()
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        future = Future()
+        self._queue.put((future, fn, args, kwargs))
+        # Свободный поток заберёт задачу, иначе запускаем новый (до max_workers)
+        if not self._idle.acquire(blocking=False):
+            with self._lock:
+                if self._threads < self.max_workers:
+                    self._threads += 1
+                    threading.Thread(
+                        target=self._worker, name=f"{self.thread_name_prefix}_{self._threads}", daemon=True
+                    ).start()
+        return future
+
+    def _worker(self) -> None:
+        while True:
+            future, fn, args, kwargs = self._queue.get()
+            if future.set_running_or_notify_cancel():
+                try:
+                    result = fn(*args, **kwargs)
+                except BaseException as e:
+                    future.set_exception(e)
+                else:
+                    future.set_result(result)
+            del future, fn, args, kwargs
+            self._idle.release()
+
+
+_pool: Optional[_DaemonPool] = None
+_pool_lock = threading.Lock()
+
+
+def _ssh_pool() -> _DaemonPool:
+    """Пул потоков для вызовов paramiko (создаётся при первом использовании)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = _DaemonPool(max_workers=SSH_THREADS, thread_name_prefix="pve-lxc-ssh")
+        return _pool
+
+
+class AsyncCommandExecutor(ABC):
+    """Абстракция асинхронного выполнения команд."""
+
+    # Кэш метаданных хоста (MetadataCache), назначается HostManager
+    cache = None
+
+    @abstractmethod
+    async def run(self, cmd: list[str], check: bool = True) -> CommandResult:
+        """Выполнить команду."""
+        pass
+
+    @abstractmethod
+    async def push_file(self, local_path: Path, remote_path: Path) -> bool:
+        """Скопировать файл на целевую систему."""
+        pass
+
+    @abstractmethod
+    async def read_file(self, remote_path: Path) -> str:
+        """Прочитать файл с целевой системы."""
+        pass
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Освободить ресурсы."""
+        pass
+
+    async def __aenter__(self) -> "AsyncCommandExecutor":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+
+class AsyncLocalExecutor(AsyncCommandExecutor):
+    """Локальное выполнение через asyncio subprocess."""
+
+    async def run(self, cmd: list[str], check: bool = True) -> CommandResult:
+        """Выполнить команду локально."""
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+        except OSError as e:
+            return CommandResult(returncode=127, stdout="", stderr=str(e))
+
+        try:
+            stdout, stderr = await proc.communicate()
+        except asyncio.CancelledError:
+            # Таймаут или отмена задачи: процесс не должен пережить корутину
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+            raise
+
+        return CommandResult(
+            returncode=proc.returncode,
+            stdout=stdout.decode(errors="replace"),
+            stderr=stderr.decode(errors="replace")
+        )
+
+    async def push_file(self, local_path: Path, remote_path: Path) -> bool:
+        """Скопировать файл локально."""
+        def copy() -> bool:
+            try:
+                remote_path.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy(local_path, remote_path)
+                return True
+            except Exception:
+                return False
+
+        return await asyncio.to_thread(copy)
+
+    async def read_file(self, remote_path: Path) -> str:
+        """Прочитать локальный файл."""
+        return await asyncio.to_thread(remote_path.read_text)
+
+    async def close(self) -> None:
+        """Ничего не делаем для локального executor."""
+        pass
+
+
+class AsyncSSHExecutor(AsyncCommandExecutor):
+    """Удалённое выполнение через SSH.
+
+    Используется одно соединение SSHExecutor (paramiko). Блокирующие вызовы
+    выполняются в общем пуле потоков, число одновременных каналов на
+    соединение ограничено max_sessions.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        user: str = "root",
+        port: int = 22,
+        key_path: Path = None,
+        broker: Path = None,
+        broker_idle: int = 600,
+        connect_timeout: float = None,
+        compress: bool = False,
+        max_sessions: int = SSH_MAX_SESSIONS
+    ):
+        self.host = host
+        self._executor = SSHExecutor(
+            host=host, user=user, port=port, key_path=key_path,
+            broker=broker, broker_idle=broker_idle,
+            connect_timeout=connect_timeout, compress=compress
+        )
+        self.max_sessions = max_sessions
+        self._sessions: Optional[asyncio.Semaphore] = None
+
+    async def _call(self, func, *args):
+        """Выполнить блокирующий метод SSHExecutor в пуле потоков."""
+        if self._sessions is None:
+            self._sessions = asyncio.Semaphore(self.max_sessions)
+        async with self._sessions:
+            return await asyncio.get_running_loop().run_in_executor(_ssh_pool(), func, *args)
+
+    async def run(self, cmd: list[str], check: bool = True) -> CommandResult:
+        """Выполнить команду через SSH."""
+        return await self._call(self._executor.run, cmd, check)
+
+    async def push_file(self, local_path: Path, remote_path: Path) -> bool:
+        """Скопировать файл через SFTP."""
+        return await self._call(self._executor.push_file, local_path, remote_path)
+
+    async def read_file(self, remote_path: Path) -> str:
+        """Прочитать файл через SFTP."""
+        return await self._call(self._executor.read_file, remote_path)
+
+    async def close(self) -> None:
+        """Закрыть SSH соединение."""
+        await asyncio.get_running_loop().run_in_executor(_ssh_pool(), self._executor.close)
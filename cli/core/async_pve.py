@@ -0,0 +1,140 @@
+"""Асинхронные варианты PVE и Network для AsyncCommandExecutor.
+
+Запросы и разбор ответов совпадают с синхронными PVE и Network, поэтому
+один event loop может опрашивать много хостов одновременно.
+"""
+
+from pathlib import Path
+from typing import Optional
+import asyncio
+import json
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from lib.logger import Logger
+from lib.system import CommandResult
+from lib.exceptions import PVELXCError
+from cli.core.async_executor import AsyncCommandExecutor
+from cli.core.network import Network
+from cli.core.pve import (
+    Container, LIST_CONTAINERS_CMD, configs_dump_cmd, parse_configs_dump,
+    containers_from_resources, parse_template_list
+)
+
+
+class AsyncPVE:
+    """Работа с Proxmox VE через AsyncCommandExecutor.
+
+    Выполняет те же запросы, что и PVE, и разбирает ответы теми же функциями.
+    """
+
+    def __init__(self, logger: Logger, executor: AsyncCommandExecutor):
+        self.logger = logger
+        self.executor = executor
+
+    async def _run(self, cmd: list[str], check: bool = True) -> CommandResult:
+        """Выполнить команду через executor."""
+        self.logger.debug(f"PVE: {' '.join(cmd)}")
+        return await self.executor.run(cmd, check)
+
+    async def version(self) -> Optional[str]:
+        """Версия PVE (pveversion) или None, если это не PVE хост."""
+        result = await self._run(["pveversion"], check=False)
+        return result.stdout.strip() if result.success else None
+
+    async def exec(self, ctid: int, cmd: list[str]) -> CommandResult:
+        """Выполнить команду в контейнере."""
+        return await self._run(["pct", "exec", str(ctid), "--"] + cmd, check=False)
+
+    async def list_containers(self) -> list[Container]:
+        """Получить список контейнеров (статусы и конфиги запрашиваются одновременно)."""
+        result, configs = await asyncio.gather(
+            self._run(LIST_CONTAINERS_CMD, check=False),
+            self._get_all_configs()
+        )
+        if not result.success:
+            raise PVELXCError(f"pvesh failed: {result.stderr.strip()}")
+        return containers_from_resources(json.loads(result.stdout), configs)
+
+    async def list_container_ips(self) -> set[str]:
+        """IP из net0 всех контейнеров кластера."""
+        configs = await self._get_all_configs(cluster=True)
+        return {config["ip"] for config in configs.values() if config.get("ip")}
+
+    async def _get_all_configs(self, cluster: bool = False) -> dict[int, dict]:
+        """Конфигурации всех контейнеров ноды (или кластера)."""
+        result = await self._run(configs_dump_cmd(cluster), check=False)
+        return parse_configs_dump(result.stdout) if result.success else {}
+
+    async def next_ctid(self) -> int:
+        """Получить следующий свободный CTID."""
+        result = await self._run(["pvesh", "get", "/cluster/nextid"])
+        if result.success:
+            return int(result.stdout.strip())
+        
+        containers = await self.list_containers()
+        return max((c.ctid for c in containers), default=99) + 1
+
+    async def list_templates(self, storage: str = "local") -> list[str]:
+        """Список доступных шаблонов."""
+        result = await self._run(["pveam", "list", storage])
+        return parse_template_list(result.stdout) if result.success else []
+
+
+class AsyncNetwork:
+    """Асинхронное сканирование адресов (ping через asyncio subprocess)."""
+
+    def __init__(
+        self,
+        logger: Logger,
+        workers: Optional[int] = None,
+        pve: AsyncPVE = None,
+        reserved: set[str] = None
+    ):
+        self.logger = logger
+        self.workers = workers or Network.PING_WORKERS
+        self.pve = pve
+        self.reserved = reserved if reserved is not None else set()
+
+    async def ping(self, ip: str, timeout: float = 1.0) -> bool:
+        """Проверить доступность IP через ping."""
+        proc = await asyncio.create_subprocess_exec(
+            "ping", "-c", "1", "-W", str(int(timeout)), ip,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL
+        )
+        return await proc.wait() == 0
+
+    async def known_used_ips(self) -> set[str]:
+        """IP, занятость которых известна без ping (см. Network.known_used_ips)."""
+        neighbours = asyncio.to_thread(Network(self.logger)._neighbour_ips)
+        if self.pve:
+            local, containers = await asyncio.gather(neighbours, self.pve.list_container_ips())
+        else:
+            local, containers = await neighbours, set()
+        return local | containers | self.reserved
+
+    async def sweep(self, ips: list[str], timeout: float = 1.0) -> list[tuple[str, bool]]:
+        """Пропинговать адреса, не более workers одновременно.
+
+        Возвращает (ip, alive) в порядке адресов.
+        """
+        used = await self.known_used_ips()
+        slots = asyncio.Semaphore(self.workers)
+
+        async def probe(ip: str) -> bool:
+            if ip in used:
+                return True
+            async with slots:
+                return await self.ping(ip, timeout)
+
+        alive = await asyncio.gather(*(probe(ip) for ip in ips))
+        return list(zip(ips, alive))
+
+    async def find_free_ip(self, start: int, end: int, subnet: str) -> Optional[str]:
+        """Найти первый свободный IP в диапазоне."""
+        ips = [f"{subnet}.{i}" for i in range(start, end + 1)]
+        for ip, alive in await self.sweep(ips):
+            if not alive:
+                return ip
+        return None
@@ -0,0 +1,129 @@
+"""Кэш метаданных PVE хоста.
+
+Редко меняющиеся ответы хоста (список хранилищ, шаблоны, сеть хоста)
+сохраняются в ~/.pve-lxc/cache/<host>/<key>.json и переиспользуются
+между запусками CLI до истечения TTL.
+"""
+
+from pathlib import Path
+from typing import Any, Callable, Optional
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+
+DEFAULT_ROOT = Path.home() / ".pve-lxc" / "cache"
+
+# TTL по умолчанию (секунды). /cluster/nextid не кэшируется: значение
+# меняется при каждом создании контейнера
+DEFAULT_TTL = {
+    "storages": 300,
+    "templates": 300,
+    "available": 86400,
+    "aplinfo": 86400,
+    "host_network": 3600,
+}
+
+
+class MetadataCache:
+    """Кэш метаданных одного хоста: в памяти и на диске."""
+
+    def __init__(
+        self,
+        host: str = "local",
+        root: Optional[Path] = DEFAULT_ROOT,
+        enabled: bool = True,
+        ttl: dict[str, int] = None
+    ):
+        self.host = host
+        # root=None — только кэш в памяти процесса
+        self.path = Path(root) / _safe_name(host) if root else None
+        self.enabled = enabled
+        self.ttl = {**DEFAULT_TTL, **(ttl or {})}
+        self._memory: dict[str, tuple[float, Any]] = {}
+
+    def _ttl(self, key: str) -> int:
+        """TTL ключа: по точному имени или по префиксу до ':'."""
+        return self.ttl.get(key, self.ttl.get(key.split(":")[0], 0))
+
+    def _file(self, key: str) -> Path:
+        return self.path / f"{_safe_name(key)}.json"
+
+    def get(self, key: str) -> Optional[Any]:
+        """Значение из кэша или None, если его нет или TTL истёк."""
+        if not self.enabled:
+            return None
+
+        entry = self._memory.get(key)
+        if entry is None and self.path:
+            try:
+                data = json.loads(self._file(key).read_text())
+                entry = (data["time"], data["value"])
+            except (OSError, ValueError, KeyError, TypeError):
+                entry = None
+
+        if entry is None or time.time() - entry[0] > self._ttl(key):
+            return None
+        self._memory[key] = entry
+        return entry[1]
+
+    def set(self, key: str, value: Any) -> None:
+        """Сохранить значение (атомарная запись файла)."""
+        if not self.enabled:
+            return
+
+        now = time.time()
+        self._memory[key] = (now, value)
+        if not self.path:
+            return
+
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump({"time": now, "value": value}, f)
+            os.replace(tmp, self._file(key))
+        except OSError:
+            # Кэш необязателен: ошибка записи не должна ломать команду
+            pass
+
+    def get_or_load(self, key: str, loader: Callable[[], Any]) -> Any:
+        """Значение из кэша или результат loader (None не кэшируется)."""
+        value = self.get(key)
+        if value is None:
+            value = loader()
+            if value is not None:
+                self.set(key, value)
+        return value
+
+    def invalidate(self, *keys: str) -> None:
+        """Удалить ключи. Ключ с '*' на конце удаляет все ключи с префиксом."""
+        for key in keys:
+            if key.endswith("*"):
+                prefix = key[:-1]
+                names = [k for k in self._memory if k.startswith(prefix)]
+                if self.path and self.path.exists():
+                    names += [
+                        f.stem for f in self.path.glob("*.json")
+                        if f.stem.startswith(_safe_name(prefix))
+                    ]
+            else:
+                names = [key]
+
+            for name in names:
+                self._memory.pop(name, None)
+                if self.path:
+                    self._file(name).unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        """Удалить весь кэш хоста."""
+        self._memory.clear()
+        if self.path and self.path.exists():
+            shutil.rmtree(self.path, ignore_errors=True)
+
+
+def _safe_name(name: str) -> str:
+    """Имя файла/каталога из ключа или имени хоста."""
+    return re.sub(r"[^\w.-]", "_", name)
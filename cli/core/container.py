@@ -3,13 +3,42 @@
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional
+import json
+import shlex
 
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 from lib.logger import Logger
 from lib.config import ConfigLoader
-from .pve import PVE, Container
+from lib.system import APT_LISTS_MAX_AGE, APT_LISTS_STATE, apt_proxy_script, apt_update_script
+from .executor import OutputChunk, collect_output
+from .pve import PVE, Container, GOLDEN_TAG, GOLDEN_APP_TAG, net0_config
 from .network import Network
+from .readiness import wait_ready
+
+# Штамп применённых шагов bootstrap внутри контейнера
+BOOTSTRAP_STAMP = "/etc/pve-lxc/bootstrap.json"
+
+# Очистка контейнера перед превращением в golden-образ: клоны не должны
+# разделять machine-id и ключи SSH хоста. Вместе со списками пакетов удаляется
+# отметка их свежести, иначе клон пропустил бы apt-get update
+GOLDEN_SEAL_SCRIPT = f"""\
+apt-get clean
+rm -rf /var/lib/apt/lists/* /tmp/* /var/tmp/*
+rm -f {APT_LISTS_STATE}
+rm -f /etc/ssh/ssh_host_*
+truncate -s 0 /etc/machine-id
+rm -f /var/lib/dbus/machine-id
+find /var/log -type f -exec truncate -s 0 {{}} +
+"""
+
+# Первый запуск клона: новые ключи SSH хоста (machine-id systemd создаёт сам)
+CLONE_FIRSTBOOT_SCRIPT = """\
+if command -v ssh-keygen >/dev/null; then
+    ssh-keygen -A
+    systemctl restart ssh 2>/dev/null || systemctl restart sshd 2>/dev/null || true
+fi
+"""
 
 
 @dataclass
@@ -59,7 +88,7 @@ def create_container(
                 logger.debug(f"Auto-detected storage: {storage}")
             else:
                 storage = "local-lvm"  # fallback
-    network = Network(logger)
+    network = Network(logger, pve=pve)
     
     # Получаем CTID
     if not ctid:
@@ -74,8 +103,8 @@ def create_container(
         net_ip = "dhcp"
         resolved_ip = None
 
-    # Ищем шаблон
-    template_path = pve.find_template(template)
+    # Ищем шаблон (при отсутствии в хранилище — скачиваем)
+    template_path = pve.ensure_template(template)
     if not template_path:
         return CreateResult(success=False, message=f"Template '{template}' not found")
     
@@ -111,38 +140,301 @@ def create_container(
     )
 
 
+def create_from_golden(
+    logger: Logger,
+    app: str,
+    name: str,
+    cores: int = None,
+    memory: int = None,
+    disk: int = None,
+    ip: str = None,
+    gateway: str = None,
+    storage: str = None,
+    ctid: int = None,
+    executor = None
+) -> CreateResult:
+    """Создать контейнер клонированием golden-образа приложения."""
+    pve = PVE(logger, executor=executor)
+    
+    source = pve.golden_images().get(app)
+    if not source:
+        return CreateResult(
+            success=False,
+            message=f"No golden image for '{app}', build it with: pve-lxc golden build --app {app}"
+        )
+    
+    if not ctid:
+        ctid = pve.next_ctid()
+    
+    # Разрешаем IP
+    if ip:
+        resolved_ip, mask, gw = Network(logger, pve=pve).resolve_ip(ip)
+        net_ip = f"{resolved_ip}/{mask}"
+        gateway = gateway or gw
+    else:
+        net_ip = "dhcp"
+        resolved_ip = None
+    
+    if not pve.clone(source, ctid, hostname=name, storage=storage):
+        return CreateResult(success=False, message=f"Failed to clone golden image {source}")
+    
+    # Сеть и ресурсы клона; net0 без hwaddr — PVE выдаст новый MAC
+    if not pve.set_options(ctid, net0=net0_config(ip=net_ip, gateway=gateway), cores=cores, memory=memory):
+        return CreateResult(success=False, ctid=ctid, message="Failed to configure cloned container")
+    
+    golden = pve.get_container(source)
+    if disk and golden and disk > golden.disk:
+        if not pve.resize(ctid, disk):
+            logger.warn(f"Failed to resize rootfs of {ctid} to {disk}G")
+    
+    if not pve.start(ctid):
+        return CreateResult(success=False, ctid=ctid, message=f"Failed to start container {ctid}")
+    
+    if not wait_ready(logger, pve, ctid, probes=["exec"], timeout=30).ready:
+        return CreateResult(success=False, ctid=ctid, message=f"Container {ctid} did not start")
+    result = pve.exec(ctid, ["sh", "-c", CLONE_FIRSTBOOT_SCRIPT])
+    if not result.success:
+        logger.warn(f"First boot setup failed: {result.stderr.strip()}")
+    
+    return CreateResult(
+        success=True,
+        ctid=ctid,
+        ip=resolved_ip,
+        message=f"Container {ctid} cloned from golden image {source}"
+    )
+
+
+def seal_golden(logger: Logger, ctid: int, app: str, executor = None) -> bool:
+    """Очистить контейнер, остановить и превратить в golden-образ приложения."""
+    pve = PVE(logger, executor=executor)
+    
+    logger.step("Sealing golden image")
+    result = pve.exec(ctid, ["sh", "-c", GOLDEN_SEAL_SCRIPT])
+    if not result.success:
+        logger.warn(f"Golden image cleanup failed: {result.stderr.strip()}")
+    
+    if not pve.stop(ctid):
+        logger.error(f"Failed to stop container {ctid}")
+        return False
+    if not pve.set_options(ctid, tags=f"{GOLDEN_TAG};{GOLDEN_APP_TAG}{app}"):
+        return False
+    return pve.to_template(ctid)
+
+
 def destroy_container(logger: Logger, ctid: int, force: bool = False, executor = None) -> bool:
     """Удалить контейнер."""
     pve = PVE(logger, executor=executor)
     return pve.destroy(ctid, force=force)
 
 
-def bootstrap_container(logger: Logger, ctid: int, executor = None) -> bool:
-    """Выполнить базовую настройку контейнера."""
+def read_bootstrap_stamp(pve: PVE, ctid: int) -> dict:
+    """Прочитать штамп bootstrap из контейнера (пустой словарь — bootstrap не выполнялся)."""
+    result = pve.exec(ctid, ["cat", BOOTSTRAP_STAMP])
+    if not result.success:
+        return {}
+    try:
+        stamp = json.loads(result.stdout)
+    except json.JSONDecodeError:
+        return {}
+    return stamp if isinstance(stamp, dict) else {}
+
+
+def write_bootstrap_stamp(pve: PVE, ctid: int, stamp: dict) -> bool:
+    """Записать штамп bootstrap в контейнер."""
+    script = 'mkdir -p "$(dirname "$1")" && printf "%s\\n" "$2" > "$1"'
+    result = pve.exec(ctid, ["sh", "-c", script, "sh", BOOTSTRAP_STAMP, json.dumps(stamp, sort_keys=True)])
+    return result.success
+
+
+def pending_bootstrap(
+    stamp: dict,
+    locale: str,
+    timezone: str,
+    packages: list[str],
+    apt_proxy: str = None
+) -> dict:
+    """Шаги bootstrap, ещё не применённые в контейнере согласно штампу.
+
+    Возвращает {"apt_proxy": ..., "locale": ..., "timezone": ..., "packages": [...]}
+    только с теми ключами, которые нужно выполнить; packages — недостающие пакеты.
+    """
+    pending = {}
+    if stamp.get("apt_proxy") != apt_proxy:
+        pending["apt_proxy"] = apt_proxy
+    if stamp.get("locale") != locale:
+        pending["locale"] = locale
+    if stamp.get("timezone") != timezone:
+        pending["timezone"] = timezone
+    installed = set(stamp.get("packages") or [])
+    missing = [package for package in packages if package not in installed]
+    if missing:
+        pending["packages"] = missing
+    return pending
+
+
+# Общая часть скрипта bootstrap: step <имя> <обязательный 0|1> <команда>.
+# В stdout идут только JSON события шагов, вывод команд — в stderr
+BOOTSTRAP_SCRIPT_HEADER = """\
+export DEBIAN_FRONTEND=noninteractive
+failed=0
+# date +%N есть не везде (busybox печатает %N как есть) — тогда точность в секундах
+now_ms() {
+    t=$(date +%s%N)
+    case $t in
+        *[!0-9]*) echo $(( $(date +%s) * 1000 )) ;;
+        *) echo $(( t / 1000000 )) ;;
+    esac
+}
+step() {
+    printf '{"step": "%s", "event": "start"}\\n' "$1"
+    start=$(now_ms)
+    sh -c "$3" >&2
+    rc=$?
+    ms=$(( $(now_ms) - start ))
+    if [ $rc -ne 0 ] && [ "$2" = 1 ]; then failed=1; fi
+    printf '{"step": "%s", "event": "done", "rc": %d, "ms": %d}\\n' "$1" "$rc" "$ms"
+}
+"""
+
+
+def bootstrap_steps(pending: dict, lists_max_age: int = APT_LISTS_MAX_AGE) -> list[tuple[str, str, bool]]:
+    """Шаги bootstrap для pending: (имя, команда, обязательный).
+
+    apt-get update пропускается, если списки обновлялись не раньше
+    lists_max_age секунд назад и sources.list не менялся.
+    """
+    steps = []
+    if "apt_proxy" in pending:
+        # Прокси настраивается первым: через него идут apt-get update и install
+        steps.append(("apt_proxy", apt_proxy_script(pending["apt_proxy"]), True))
+    if "locale" in pending:
+        locale = shlex.quote(pending["locale"])
+        steps.append(("locale", f"locale-gen {locale} && update-locale LANG={locale}", True))
+    if "timezone" in pending:
+        zoneinfo = shlex.quote(f"/usr/share/zoneinfo/{pending['timezone']}")
+        steps.append(("timezone", f"ln -sf {zoneinfo} /etc/localtime", True))
+    if "packages" in pending:
+        # Ошибка apt-get update не фатальна: пакеты могут поставиться из старых списков
+        steps.append(("apt_update", apt_update_script(lists_max_age), False))
+        packages = " ".join(shlex.quote(package) for package in pending["packages"])
+        steps.append(("packages", f"apt-get install -y -qq {packages}", True))
+    return steps
+
+
+def bootstrap_script(steps: list[tuple[str, str, bool]], stamp: dict) -> str:
+    """Скрипт bootstrap: все шаги в одном pct exec, штамп пишется при успехе."""
+    lines = [BOOTSTRAP_SCRIPT_HEADER]
+    for name, command, required in steps:
+        lines.append(f"step {name} {int(required)} {shlex.quote(command)}")
+    stamp_path = shlex.quote(BOOTSTRAP_STAMP)
+    stamp_json = shlex.quote(json.dumps(stamp, sort_keys=True))
+    lines.append(
+        f'if [ $failed -eq 0 ]; then mkdir -p "$(dirname {stamp_path})" && '
+        f"printf '%s\\n' {stamp_json} > {stamp_path}; fi"
+    )
+    lines.append("exit $failed")
+    return "\n".join(lines) + "\n"
+
+
+class BootstrapProgress:
+    """Разбор JSON событий скрипта bootstrap в шаги Logger."""
+
+    def __init__(self, logger: Logger, titles: dict[str, str]):
+        self.logger = logger
+        self.titles = titles
+        self.results: dict[str, dict] = {}
+        self._current = 0
+        self._partial = ""
+
+    def feed(self, chunk: OutputChunk) -> None:
+        """Обработать фрагмент вывода скрипта."""
+        if chunk.stream != "stdout":
+            return
+        *lines, self._partial = (self._partial + chunk.data).split("\n")
+        for line in lines:
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            self._event(event)
+
+    def _event(self, event: dict) -> None:
+        name = event.get("step")
+        title = self.titles.get(name, name)
+        if event.get("event") == "start":
+            self._current += 1
+            self.logger.step(title, current=self._current, total=len(self.titles))
+        elif event.get("event") == "done":
+            self.results[name] = event
+            self.logger.debug(f"{title}: rc={event['rc']}, {event['ms']} ms", step=name, rc=event["rc"], ms=event["ms"])
+
+
+def bootstrap_container(
+    logger: Logger,
+    ctid: int,
+    executor = None,
+    force: bool = False,
+    packages: list[str] = None
+) -> bool:
+    """Выполнить базовую настройку контейнера.
+    
+    Недостающие шаги собираются в один скрипт и выполняются одним pct exec,
+    пакеты bootstrap и packages (зависимости приложения) ставятся одной
+    транзакцией apt. Применённые шаги записываются в штамп BOOTSTRAP_STAMP
+    внутри контейнера (force — выполнить все заново).
+    """
     config = ConfigLoader().load_user_config().merge()
     bootstrap_config = config.get("bootstrap", {})
+    locale = bootstrap_config.get("locale", "en_US.UTF-8")
+    timezone = bootstrap_config.get("timezone", "UTC")
+    wanted = list(dict.fromkeys(
+        bootstrap_config.get("packages", ["curl", "wget", "git", "vim", "htop"]) + (packages or [])
+    ))
+    apt_proxy = config.get("apt", {}).get("proxy")
     
     pve = PVE(logger, executor=executor)
     
-    # Настройка locale
-    locale = bootstrap_config.get("locale", "en_US.UTF-8")
-    logger.step("Setting locale", current=1, total=4)
-    pve.exec(ctid, ["locale-gen", locale])
-    pve.exec(ctid, ["update-locale", f"LANG={locale}"])
+    stamp = {} if force else read_bootstrap_stamp(pve, ctid)
+    pending = pending_bootstrap(stamp, locale, timezone, wanted, apt_proxy)
+    if not pending:
+        logger.success("Bootstrap already applied")
+        return True
     
-    # Настройка timezone
-    timezone = bootstrap_config.get("timezone", "UTC")
-    logger.step("Setting timezone", current=2, total=4)
-    pve.exec(ctid, ["ln", "-sf", f"/usr/share/zoneinfo/{timezone}", "/etc/localtime"])
+    steps = bootstrap_steps(pending, config.get("apt", {}).get("lists_max_age", APT_LISTS_MAX_AGE))
+    applied = {**stamp, **{key: value for key, value in pending.items() if key != "packages"}}
+    if "packages" in pending:
+        applied["packages"] = sorted(set(stamp.get("packages") or []) | set(pending["packages"]))
+    
+    titles = {
+        "apt_proxy": "Configuring APT proxy",
+        "locale": "Setting locale",
+        "timezone": "Setting timezone",
+        "apt_update": "Updating packages",
+        "packages": f"Installing packages: {', '.join(pending.get('packages', []))}",
+    }
+    progress = BootstrapProgress(logger, {name: titles[name] for name, _, _ in steps})
+    result = collect_output(
+        pve.exec_stream(ctid, ["sh", "-c", bootstrap_script(steps, applied)]),
+        on_chunk=progress.feed,
+        limit=64 * 1024
+    )
     
-    # Обновление пакетов
-    logger.step("Updating packages", current=3, total=4)
-    pve.exec(ctid, ["apt-get", "update", "-qq"])
+    failed = [
+        name for name, _, required in steps
+        if required and progress.results.get(name, {}).get("rc") != 0
+    ]
+    if not failed and result.success:
+        logger.success("Bootstrap completed")
+        return True
     
-    # Установка базовых пакетов
-    packages = bootstrap_config.get("packages", ["curl", "wget", "git", "vim", "htop"])
-    logger.step(f"Installing packages: {', '.join(packages)}", current=4, total=4)
-    pve.exec(ctid, ["apt-get", "install", "-y", "-qq"] + packages)
+    # Записываем только успешно применённые шаги
+    for key in failed:
+        if key in stamp:
+            applied[key] = stamp[key]
+        else:
+            applied.pop(key, None)
+    if not write_bootstrap_stamp(pve, ctid, applied):
+        logger.warn(f"Failed to write bootstrap stamp {BOOTSTRAP_STAMP}")
     
-    logger.success("Bootstrap completed")
-    return True
+    logger.error(f"Bootstrap steps failed: {', '.join(failed) or 'script'}", stderr=result.stderr[-4096:])
+    return False
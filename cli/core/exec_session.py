@@ -0,0 +1,121 @@
+"""Долгоживущая exec-сессия в контейнере.
+
+Вместо отдельного pct exec на каждую команду запускается один pct exec
+с небольшим shell-агентом. Агент читает команды из stdin (строка base64)
+и для каждой возвращает кадр:
+
+    @@PVE-LXC@@ <exit code>
+    <последние output_limit байт stdout в base64>
+    <последние output_limit байт stderr в base64>
+"""
+
+from pathlib import Path
+import base64
+import shlex
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from lib.exceptions import PVELXCError
+from lib.system import CommandResult
+
+
+MARKER = b"@@PVE-LXC@@"
+
+AGENT_SCRIPT = r"""
+out=$(mktemp) && err=$(mktemp) || exit 1
+trap 'rm -f "$out" "$err"' EXIT
+echo '@@PVE-LXC@@ ready'
+while IFS= read -r line; do
+    cmd=$(printf '%s' "$line" | base64 -d)
+    sh -c "$cmd" </dev/null >"$out" 2>"$err"
+    rc=$?
+    printf '@@PVE-LXC@@ %s\n' "$rc"
+    tail -c "$1" "$out" | base64 | tr -d '\n'; echo
+    tail -c "$1" "$err" | base64 | tr -d '\n'; echo
+done
+"""
+
+
+class ExecSessionError(PVELXCError):
+    """Сессия завершилась или вернула некорректный ответ."""
+    pass
+
+
+class ExecSessionLost(ExecSessionError):
+    """Сессия оборвалась после отправки команды: команда могла выполниться."""
+    pass
+
+
+class ExecSession:
+    """Одна сессия pct exec для выполнения последовательности команд."""
+
+    # Сколько последнего вывода команды возвращать (байт на поток)
+    OUTPUT_LIMIT = 1024 * 1024
+
+    def __init__(self, executor, ctid: int, output_limit: int = OUTPUT_LIMIT):
+        self.executor = executor
+        self.ctid = ctid
+        self.output_limit = output_limit
+        self._process = None
+
+    def start(self) -> "ExecSession":
+        """Запустить агент в контейнере."""
+        self._process = self.executor.open_process(
+            ["pct", "exec", str(self.ctid), "--", "sh", "-c", AGENT_SCRIPT, "sh", str(self.output_limit)]
+        )
+        header = self._readline()
+        if not header.startswith(MARKER + b" ready"):
+            self.close()
+            raise ExecSessionError(f"Exec session in container {self.ctid} failed to start")
+        return self
+
+    def run(self, cmd: list[str]) -> CommandResult:
+        """Выполнить команду в сессии.
+        
+        ExecSessionError — команда не отправлена (можно выполнить её иначе),
+        ExecSessionLost — сессия оборвалась после отправки.
+        """
+        if self._process is None:
+            raise ExecSessionError("Exec session is not started")
+
+        line = base64.b64encode(shlex.join(cmd).encode()) + b"\n"
+        try:
+            self._process.stdin.write(line)
+            self._process.stdin.flush()
+        except OSError as e:
+            raise ExecSessionError(f"Exec session in container {self.ctid} closed: {e}")
+
+        try:
+            header = self._readline()
+            fields = header.split()
+            if len(fields) != 2 or fields[0] != MARKER or not fields[1].isdigit():
+                raise ExecSessionError(f"Unexpected exec session response: {header[:100]!r}")
+            stdout = base64.b64decode(self._readline()).decode(errors="replace")
+            stderr = base64.b64decode(self._readline()).decode(errors="replace")
+        except (ExecSessionError, ValueError) as e:
+            raise ExecSessionLost(f"Exec session in container {self.ctid} lost during command: {e}")
+        return CommandResult(returncode=int(fields[1]), stdout=stdout, stderr=stderr)
+
+    def _readline(self) -> bytes:
+        """Прочитать строку ответа агента."""
+        line = self._process.stdout.readline()
+        if not line:
+            raise ExecSessionError(f"Exec session in container {self.ctid} closed")
+        return line.rstrip(b"\n")
+
+    def close(self) -> None:
+        """Завершить агент."""
+        if self._process is None:
+            return
+        try:
+            self._process.stdin.close()
+            self._process.wait()
+        except OSError:
+            self._process.kill()
+        self._process = None
+
+    def __enter__(self) -> "ExecSession":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
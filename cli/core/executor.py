@@ -1,23 +1,107 @@
 """Абстракция выполнения команд: локально или через SSH."""
 
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Callable, Iterator, Optional
+import codecs
+import os
+import selectors
 import shutil
 import subprocess
+import threading
 
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 from lib.system import CommandResult
 
 
+# Размер блока чтения вывода команд
+CHUNK_SIZE = 32768
+
+# Окно SFTP канала: при стандартных 2 МБ скорость передачи на каналах
+# с задержкой ограничена окном, а не пропускной способностью сети
+SFTP_WINDOW_SIZE = 64 * 1024 * 1024
+SFTP_MAX_PACKET_SIZE = 32768
+
+
+@dataclass
+class OutputChunk:
+    """Фрагмент вывода команды.
+    
+    stream: stdout, stderr или exit (последний фрагмент, с returncode).
+    """
+    stream: str
+    data: str = ""
+    returncode: Optional[int] = None
+
+
+def collect_output(
+    chunks: Iterator[OutputChunk],
+    on_chunk: Callable[[OutputChunk], None] = None,
+    limit: int = None
+) -> CommandResult:
+    """Собрать потоковый вывод в CommandResult.
+    
+    Если задан limit, для stdout и stderr сохраняются только последние
+    limit символов, чтобы большой вывод не держался в памяти целиком.
+    """
+    buffers = {"stdout": [], "stderr": []}
+    sizes = {"stdout": 0, "stderr": 0}
+    returncode = 1
+    
+    for chunk in chunks:
+        if on_chunk:
+            on_chunk(chunk)
+        if chunk.stream == "exit":
+            returncode = chunk.returncode
+            continue
+        
+        buffer = buffers[chunk.stream]
+        buffer.append(chunk.data)
+        sizes[chunk.stream] += len(chunk.data)
+        if limit is not None:
+            while sizes[chunk.stream] - len(buffer[0]) >= limit:
+                sizes[chunk.stream] -= len(buffer.pop(0))
+    
+    stdout, stderr = "".join(buffers["stdout"]), "".join(buffers["stderr"])
+    if limit is not None:
+        stdout, stderr = stdout[-limit:], stderr[-limit:]
+    
+    return CommandResult(returncode=returncode, stdout=stdout, stderr=stderr)
+
+
 class CommandExecutor(ABC):
     """Абстракция выполнения команд."""
     
+    # Кэш метаданных хоста (MetadataCache), назначается HostManager
+    cache = None
+    
     @abstractmethod
     def run(self, cmd: list[str], check: bool = True) -> CommandResult:
         """Выполнить команду."""
         pass
     
+    def stream(self, cmd: list[str]) -> Iterator[OutputChunk]:
+        """Выполнить команду, отдавая вывод по мере поступления.
+        
+        Реализация по умолчанию выполняет команду целиком через run.
+        """
+        result = self.run(cmd, check=False)
+        if result.stdout:
+            yield OutputChunk("stdout", result.stdout)
+        if result.stderr:
+            yield OutputChunk("stderr", result.stderr)
+        yield OutputChunk("exit", returncode=result.returncode)
+    
+    def open_process(self, cmd: list[str]):
+        """Запустить команду с открытыми stdin/stdout (бинарный режим).
+        
+        Возвращает объект с атрибутами stdin, stdout и методами wait(),
+        kill(). Поддерживается не всеми executor.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support interactive processes")
+    
     @abstractmethod
     def push_file(self, local_path: Path, remote_path: Path) -> bool:
         """Скопировать файл на целевую систему."""
@@ -46,6 +130,44 @@ class LocalExecutor(CommandExecutor):
             stderr=result.stderr or ""
         )
     
+    def stream(self, cmd: list[str]) -> Iterator[OutputChunk]:
+        """Выполнить команду локально с потоковым выводом."""
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        selector = selectors.DefaultSelector()
+        decoders = {}
+        for name, pipe in (("stdout", proc.stdout), ("stderr", proc.stderr)):
+            selector.register(pipe, selectors.EVENT_READ, name)
+            decoders[name] = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        
+        try:
+            while selector.get_map():
+                for key, _ in selector.select():
+                    data = os.read(key.fileobj.fileno(), CHUNK_SIZE)
+                    if not data:
+                        selector.unregister(key.fileobj)
+                        text = decoders[key.data].decode(b"", final=True)
+                    else:
+                        text = decoders[key.data].decode(data)
+                    if text:
+                        yield OutputChunk(key.data, text)
+            yield OutputChunk("exit", returncode=proc.wait())
+        finally:
+            selector.close()
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+            proc.stdout.close()
+            proc.stderr.close()
+    
+    def open_process(self, cmd: list[str]) -> subprocess.Popen:
+        """Запустить локальный процесс с открытыми stdin/stdout."""
+        return subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+    
     def push_file(self, local_path: Path, remote_path: Path) -> bool:
         """Скопировать файл локально."""
         try:
@@ -64,27 +186,71 @@ class LocalExecutor(CommandExecutor):
         pass
 
 
+class SSHProcess:
+    """Процесс на удалённом хосте, запущенный в отдельном SSH канале."""
+    
+    def __init__(self, channel):
+        self.channel = channel
+        self.stdin = channel.makefile_stdin("wb")
+        self.stdout = channel.makefile("rb")
+    
+    def wait(self) -> int:
+        """Дождаться завершения и вернуть exit code."""
+        return self.channel.recv_exit_status()
+    
+    def kill(self) -> None:
+        """Закрыть канал."""
+        self.channel.close()
+
+
 class SSHExecutor(CommandExecutor):
-    """Удалённое выполнение через SSH."""
+    """Удалённое выполнение через SSH.
+    
+    Если указан broker (путь к сокету брокера), команды выполняются через
+    постоянное соединение брокера, а при его недоступности — напрямую.
+    """
     
     def __init__(
         self, 
         host: str, 
         user: str = "root", 
         port: int = 22, 
-        key_path: Path = None
+        key_path: Path = None,
+        broker: Path = None,
+        broker_idle: int = 600,
+        connect_timeout: float = None,
+        compress: bool = False
     ):
         self.host = host
         self.user = user
         self.port = port
         self.key_path = key_path
+        self.broker = broker
+        self.broker_idle = broker_idle
+        self.connect_timeout = connect_timeout
+        self.compress = compress
         self._client = None
+        self._lock = threading.Lock()
+        # SFTP сессия и уже существующие директории живут вместе с соединением
+        self._sftp = None
+        self._sftp_dirs: set[str] = set()
     
     def _ensure_connected(self) -> None:
         """Установить SSH соединение если не установлено."""
-        if self._client is not None:
-            return
-        
+        with self._lock:
+            if self._client is not None:
+                transport = self._client.get_transport()
+                if transport is not None and transport.is_active():
+                    return
+                # Соединение разорвано — переподключаемся
+                self._client.close()
+                self._client = None
+            self._sftp = None
+            self._sftp_dirs.clear()
+            self._connect()
+    
+    def _connect(self) -> None:
+        """Открыть новое SSH соединение."""
         import paramiko
         from lib.exceptions import ConnectionError, AuthenticationError
         
@@ -100,6 +266,15 @@ class SSHExecutor(CommandExecutor):
         if self.key_path:
             connect_kwargs["key_filename"] = str(self.key_path)
         
+        if self.compress:
+            connect_kwargs["compress"] = True
+        
+        if self.connect_timeout:
+            # TCP, баннер и аутентификация: недоступный хост не ждёт системного таймаута
+            connect_kwargs["timeout"] = self.connect_timeout
+            connect_kwargs["banner_timeout"] = self.connect_timeout
+            connect_kwargs["auth_timeout"] = self.connect_timeout
+        
         try:
             self._client.connect(**connect_kwargs)
         except paramiko.AuthenticationException:
@@ -109,61 +284,213 @@ class SSHExecutor(CommandExecutor):
             self._client = None
             raise ConnectionError(self.host, str(e))
     
+    def _broker_target(self) -> dict:
+        """Параметры подключения для запроса к брокеру."""
+        return {
+            "host": self.host,
+            "user": self.user,
+            "port": self.port,
+            "key_path": str(self.key_path) if self.key_path else None,
+            "compress": self.compress,
+            "connect_timeout": self.connect_timeout,
+        }
+    
+    def _broker_client(self):
+        """Клиент брокера: connect_timeout ограничивает подключение к сокету.
+        
+        Подключение брокера к хосту ограничивает тот же таймаут в target,
+        выполнение команды — нет.
+        """
+        from cli.core.ssh_broker import BrokerClient
+        
+        return BrokerClient(self.broker, connect_timeout=self.connect_timeout)
+    
+    def _broker_request(self, request: dict):
+        """Выполнить запрос через брокер. None — брокер недоступен."""
+        if not self.broker:
+            return None
+        
+        from cli.core.ssh_broker import BrokerUnavailableError
+        
+        client = self._broker_client()
+        request["target"] = self._broker_target()
+        try:
+            return client.request(request)
+        except BrokerUnavailableError:
+            pass
+        
+        # Пробуем запустить брокер один раз, иначе работаем напрямую
+        if client.start(idle_timeout=self.broker_idle):
+            try:
+                return client.request(request)
+            except BrokerUnavailableError:
+                pass
+        self.broker = None
+        return None
+    
     def run(self, cmd: list[str], check: bool = True) -> CommandResult:
         """Выполнить команду через SSH."""
+        response = self._broker_request({"op": "run", "cmd": cmd, "check": check})
+        if response is not None:
+            return CommandResult(
+                returncode=response["returncode"],
+                stdout=response["stdout"],
+                stderr=response["stderr"]
+            )
+        
+        # Читаем вывод по мере поступления, иначе большой вывод
+        # заполняет окно канала и команда не может завершиться
+        return collect_output(self._stream_direct(cmd))
+    
+    def stream(self, cmd: list[str]) -> Iterator[OutputChunk]:
+        """Выполнить команду через SSH с потоковым выводом."""
+        if self.broker:
+            from cli.core.ssh_broker import BrokerUnavailableError
+            
+            try:
+                yield from self._broker_stream(cmd)
+                return
+            except BrokerUnavailableError:
+                # Брокер недоступен до начала вывода — работаем напрямую
+                self.broker = None
+        
+        yield from self._stream_direct(cmd)
+    
+    def _broker_stream(self, cmd: list[str]) -> Iterator[OutputChunk]:
+        """Потоковое выполнение через брокер."""
+        client = self._broker_client()
+        request = {"op": "stream", "cmd": cmd, "target": self._broker_target()}
+        if not client.is_running():
+            client.start(idle_timeout=self.broker_idle)
+        for frame in client.stream(request):
+            yield OutputChunk(frame["stream"], frame.get("data", ""), frame.get("returncode"))
+    
+    def _stream_direct(self, cmd: list[str]) -> Iterator[OutputChunk]:
+        """Потоковое выполнение через собственное SSH соединение."""
+        import select
         import shlex
         
         self._ensure_connected()
         
         cmd_str = " ".join(shlex.quote(c) for c in cmd)
-        stdin, stdout, stderr = self._client.exec_command(cmd_str)
+        channel = self._client.get_transport().open_session()
+        try:
+            channel.exec_command(cmd_str)
+            decoders = {
+                "stdout": codecs.getincrementaldecoder("utf-8")(errors="replace"),
+                "stderr": codecs.getincrementaldecoder("utf-8")(errors="replace"),
+            }
+            
+            while True:
+                got_data = False
+                if channel.recv_ready():
+                    got_data = True
+                    if text := decoders["stdout"].decode(channel.recv(CHUNK_SIZE)):
+                        yield OutputChunk("stdout", text)
+                if channel.recv_stderr_ready():
+                    got_data = True
+                    if text := decoders["stderr"].decode(channel.recv_stderr(CHUNK_SIZE)):
+                        yield OutputChunk("stderr", text)
+                if got_data:
+                    continue
+                # EOF приходит после всего вывода команды
+                if channel.eof_received or channel.closed:
+                    break
+                select.select([channel], [], [], 1.0)
+            
+            for name, decoder in decoders.items():
+                if text := decoder.decode(b"", final=True):
+                    yield OutputChunk(name, text)
+            yield OutputChunk("exit", returncode=channel.recv_exit_status())
+        finally:
+            channel.close()
+    
+    def open_process(self, cmd: list[str]) -> SSHProcess:
+        """Запустить команду в отдельном канале с открытыми stdin/stdout.
         
-        return CommandResult(
-            returncode=stdout.channel.recv_exit_status(),
-            stdout=stdout.read().decode(),
-            stderr=stderr.read().decode()
-        )
+        Интерактивные процессы не проходят через брокер и всегда
+        используют собственное соединение.
+        """
+        import shlex
+        
+        self._ensure_connected()
+        channel = self._client.get_transport().open_session()
+        channel.exec_command(" ".join(shlex.quote(c) for c in cmd))
+        return SSHProcess(channel)
     
     def push_file(self, local_path: Path, remote_path: Path) -> bool:
         """Скопировать файл на удалённый хост через SFTP."""
         try:
-            self._ensure_connected()
+            response = self._broker_request({
+                "op": "push_file",
+                "local_path": str(Path(local_path).resolve()),
+                "remote_path": str(remote_path),
+            })
+            if response is not None:
+                return response["ok"]
             
-            sftp = self._client.open_sftp()
+            sftp = self._get_sftp()
             
             # Создаём родительские директории
             remote_dir = str(remote_path.parent)
             self._mkdir_p(sftp, remote_dir)
             
+            # put пишет конвейером (без ожидания ответа на каждый пакет)
             sftp.put(str(local_path), str(remote_path))
-            sftp.close()
             return True
         except Exception:
             return False
     
+    def _get_sftp(self):
+        """SFTP сессия соединения (открывается один раз)."""
+        import paramiko
+        
+        self._ensure_connected()
+        with self._lock:
+            if self._sftp is None or self._sftp.sock.closed:
+                self._sftp = paramiko.SFTPClient.from_transport(
+                    self._client.get_transport(),
+                    window_size=SFTP_WINDOW_SIZE,
+                    max_packet_size=SFTP_MAX_PACKET_SIZE
+                )
+                self._sftp_dirs.clear()
+            return self._sftp
+    
     def _mkdir_p(self, sftp, remote_dir: str) -> None:
         """Рекурсивно создать директории на удалённом хосте."""
-        if remote_dir == "/" or remote_dir == "":
+        if remote_dir == "/" or remote_dir == "" or remote_dir in self._sftp_dirs:
             return
         
         try:
             sftp.stat(remote_dir)
         except FileNotFoundError:
             self._mkdir_p(sftp, str(Path(remote_dir).parent))
-            sftp.mkdir(remote_dir)
+            try:
+                sftp.mkdir(remote_dir)
+            except OSError:
+                # Создана параллельно другим потоком
+                sftp.stat(remote_dir)
+        self._sftp_dirs.add(remote_dir)
     
     def read_file(self, remote_path: Path) -> str:
         """Прочитать файл с удалённого хоста через SFTP."""
-        self._ensure_connected()
+        response = self._broker_request({"op": "read_file", "remote_path": str(remote_path)})
+        if response is not None:
+            return response["content"]
         
-        sftp = self._client.open_sftp()
+        sftp = self._get_sftp()
         with sftp.open(str(remote_path)) as f:
+            # Запрашиваем все блоки сразу, не дожидаясь ответа на каждый
+            f.prefetch()
             content = f.read().decode()
-        sftp.close()
         return content
     
     def close(self) -> None:
         """Закрыть SSH соединение."""
+        if self._sftp:
+            self._sftp.close()
+            self._sftp = None
+            self._sftp_dirs.clear()
         if self._client:
             self._client.close()
             self._client = None
@@ -1,7 +1,7 @@
 """Управление PVE хостами."""
 
 from pathlib import Path
-from typing import Optional
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
 import yaml
 
 import sys
@@ -9,8 +9,10 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from cli.core.ssh_config import SSHConfigParser
 from cli.core.executor import CommandExecutor, LocalExecutor, SSHExecutor
+from cli.core.cache import MetadataCache
 from lib.config import ConfigLoader
 from lib.exceptions import HostNotFoundError
+from lib.system import CommandResult
 
 
 class HostManager:
@@ -46,6 +48,7 @@ class HostManager:
         # Если это default host, сбрасываем
         if self.get_default() == name:
             self._save_default(None)
+        self.get_cache(name).clear()
         return self.ssh_config.remove_host(name)
     
     def list(self) -> list[dict]:
@@ -58,54 +61,153 @@ class HostManager:
     
     def test(self, name: str) -> dict:
         """Проверить подключение и PVE."""
-        result = {
-            "name": name,
-            "connected": False,
-            "pve_version": None,
-            "error": None
-        }
-        
         try:
             executor = self.get_executor(name)
             
             # Проверяем подключение
             pve_result = executor.run(["pveversion"])
             
-            if pve_result.success:
-                result["connected"] = True
-                result["pve_version"] = pve_result.stdout.strip()
-            else:
-                result["error"] = "PVE tools not found"
-            
             executor.close()
         except Exception as e:
-            result["error"] = str(e)
+            pve_result = e
+        
+        return self._test_result(name, pve_result)
+    
+    async def test_all(self, names: "list[str]" = None, timeout: float = 10.0) -> AsyncIterator[dict]:
+        """Проверить хосты одновременно; результаты отдаются по мере готовности."""
+        async def probe(name: str, executor) -> CommandResult:
+            return await executor.run(["pveversion"])
+        
+        async for name, outcome in self.map_hosts(probe, names, timeout):
+            yield self._test_result(name, outcome)
+    
+    def _test_result(self, name: str, outcome) -> dict:
+        """Результат проверки хоста по ответу pveversion (или исключению)."""
+        result = {
+            "name": name,
+            "connected": False,
+            "pve_version": None,
+            "error": None
+        }
+        
+        if isinstance(outcome, Exception):
+            result["error"] = str(outcome)
+        elif outcome.success:
+            result["connected"] = True
+            result["pve_version"] = outcome.stdout.strip()
+        else:
+            result["error"] = "PVE tools not found"
         
         return result
     
-    def get_executor(self, name: str = None) -> CommandExecutor:
-        """Получить executor для хоста."""
+    async def map_hosts(
+        self,
+        func: Callable[[str, "AsyncCommandExecutor"], Awaitable[Any]],
+        names: "list[str]" = None,
+        timeout: float = 10.0
+    ) -> AsyncIterator[tuple[str, Any]]:
+        """Выполнить func(name, executor) для хостов одновременно.
+        
+        По умолчанию — для всех хостов из SSH config. Пары (name, результат)
+        отдаются по мере завершения; ошибка или превышение timeout (на
+        подключение и выполнение) возвращается как исключение вместо результата.
+        """
+        # asyncio нужен только многохостовым командам: не замедляем запуск остальных
+        import asyncio
+        
+        if names is None:
+            names = [host["name"] for host in self.list()]
+        
+        async def one(name: str) -> tuple[str, Any]:
+            executor = None
+            try:
+                executor = self.get_async_executor(name, connect_timeout=timeout)
+                return name, await asyncio.wait_for(func(name, executor), timeout)
+            except asyncio.TimeoutError:
+                return name, TimeoutError(f"No response from {name} in {timeout:g}s")
+            except Exception as e:
+                return name, e
+            finally:
+                if executor:
+                    await executor.close()
+        
+        for future in asyncio.as_completed([one(name) for name in names]):
+            yield await future
+    
+    def get_executor(self, name: str = None, use_cache: bool = True) -> CommandExecutor:
+        """Получить executor для хоста.
+        
+        К executor привязывается кэш метаданных хоста (use_cache=False —
+        кэш не читается и не обновляется, как при --no-cache).
+        """
         # Если имя не указано, используем default
         if not name:
             name = self.get_default()
         
         # Если всё ещё нет имени, используем локальный executor
         if not name:
-            return LocalExecutor()
+            executor = LocalExecutor()
+            executor.cache = self.get_cache(None, enabled=use_cache)
+            return executor
         
-        # Получаем конфигурацию хоста
+        executor = SSHExecutor(**self._ssh_params(name))
+        executor.cache = self.get_cache(name, enabled=use_cache)
+        return executor
+    
+    def get_async_executor(self, name: str = None, connect_timeout: float = None) -> "AsyncCommandExecutor":
+        """Получить асинхронный executor для хоста."""
+        from cli.core.async_executor import AsyncLocalExecutor, AsyncSSHExecutor
+        
+        name = name or self.get_default()
+        if not name:
+            executor = AsyncLocalExecutor()
+        else:
+            executor = AsyncSSHExecutor(**self._ssh_params(name), connect_timeout=connect_timeout)
+        executor.cache = self.get_cache(name)
+        return executor
+    
+    def _ssh_params(self, name: str) -> dict:
+        """Параметры SSH подключения к хосту из SSH config и настроек брокера."""
         host_config = self.ssh_config.get_host(name)
         if not host_config:
             available = [h["name"] for h in self.list()]
             raise HostNotFoundError(name, available)
         
-        return SSHExecutor(
-            host=host_config.get("hostname", name),
-            user=host_config.get("user", "root"),
-            port=int(host_config.get("port", 22)),
-            key_path=Path(host_config["identityfile"]) if host_config.get("identityfile") else None
+        broker = self.get_broker_settings()
+        
+        return {
+            "host": host_config.get("hostname", name),
+            "user": host_config.get("user", "root"),
+            "port": int(host_config.get("port", 22)),
+            "key_path": Path(host_config["identityfile"]) if host_config.get("identityfile") else None,
+            "broker": broker["socket"] if broker["enabled"] else None,
+            "broker_idle": broker["idle"],
+            "compress": broker["compress"],
+        }
+    
+    def get_cache(self, name: str = None, enabled: bool = True) -> MetadataCache:
+        """Кэш метаданных хоста (секция cache в config.yaml)."""
+        settings = self._load_config().get("cache") or {}
+        return MetadataCache(
+            host=name or "local",
+            root=Path(settings.get("path", self.config_path.parent / "cache")).expanduser(),
+            enabled=enabled and bool(settings.get("enabled", True)),
+            ttl=settings.get("ttl")
         )
     
+    def get_broker_settings(self) -> dict:
+        """Настройки брокера SSH соединений (секция ssh в config.yaml)."""
+        from cli.core.ssh_broker import DEFAULT_SOCKET, DEFAULT_IDLE
+        
+        ssh = self._load_config().get("ssh") or {}
+        return {
+            "enabled": bool(ssh.get("broker", False)),
+            "socket": Path(ssh.get("broker_socket", DEFAULT_SOCKET)).expanduser(),
+            "idle": int(ssh.get("broker_idle", DEFAULT_IDLE)),
+            # Сжатие SSH: выгодно для медленных каналов, на LAN только нагружает CPU
+            "compress": bool(ssh.get("compress", False)),
+        }
+    
     def set_default(self, name: str) -> None:
         """Установить хост по умолчанию."""
         # Проверяем что хост существует
@@ -131,6 +233,26 @@ class HostManager:
         except Exception:
             return {}
     
+    def save_settings(self, section: str, values: dict) -> None:
+        """Обновить секцию config.yaml (значение None удаляет ключ)."""
+        config = self._load_config()
+        settings = config.get(section) or {}
+        
+        for key, value in values.items():
+            if value is None:
+                settings.pop(key, None)
+            else:
+                settings[key] = value
+        
+        if settings:
+            config[section] = settings
+        else:
+            config.pop(section, None)
+        
+        self.config_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.config_path, "w") as f:
+            yaml.dump(config, f, default_flow_style=False)
+    
     def _save_default(self, name: Optional[str]) -> None:
         """Сохранить default_host в конфиг."""
         config = self._load_config()
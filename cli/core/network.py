@@ -1,7 +1,10 @@
 """Сетевые операции: IP, ping, автовыбор из диапазона."""
 
-from dataclasses import dataclass
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from dataclasses import asdict, dataclass
+from typing import Iterator, Optional
+import json
 import re
 import subprocess
 import socket
@@ -9,6 +12,7 @@ import socket
 import sys
 sys.path.insert(0, str(__file__).rsplit("/", 3)[0])
 from lib.logger import Logger
+from cli.core.cache import MetadataCache
 
 
 @dataclass
@@ -23,18 +27,36 @@ class HostNetwork:
 class Network:
     """Работа с сетью."""
 
-    def __init__(self, logger: Logger):
+    # Максимум одновременных ping при сканировании диапазона
+    PING_WORKERS = 64
+
+    def __init__(
+        self,
+        logger: Logger,
+        workers: Optional[int] = None,
+        pve=None,
+        reserved: set[str] = None,
+        cache: MetadataCache = None
+    ):
         self.logger = logger
+        self.workers = workers or self.PING_WORKERS
+        self.pve = pve
+        self.cache = cache or (pve.cache if pve else MetadataCache(root=None))
+        # IP, уже выделенные, но ещё не попавшие в конфиги контейнеров
+        self.reserved = reserved if reserved is not None else set()
 
     def get_host_network(self) -> HostNetwork:
         """Получить сетевые параметры PVE хоста."""
+        return HostNetwork(**self.cache.get_or_load(
+            "host_network", lambda: asdict(self._load_host_network())
+        ))
+
+    def _load_host_network(self) -> HostNetwork:
+        """Определить сетевые параметры по маршруту по умолчанию."""
         # Получаем default gateway и интерфейс
-        result = subprocess.run(
-            ["ip", "route", "show", "default"],
-            capture_output=True, text=True
-        )
+        result = self._host_run(["ip", "route", "show", "default"])
         # default via 192.168.1.1 dev vmbr0
-        match = re.search(r"default via ([\d.]+) dev (\S+)", result.stdout)
+        match = re.search(r"default via ([\d.]+) dev (\S+)", result)
         if not match:
             raise RuntimeError("Cannot determine default gateway")
         
@@ -42,12 +64,9 @@ class Network:
         interface = match.group(2)
         
         # Получаем IP и маску интерфейса
-        result = subprocess.run(
-            ["ip", "-o", "addr", "show", interface],
-            capture_output=True, text=True
-        )
+        result = self._host_run(["ip", "-o", "addr", "show", interface])
         # 2: vmbr0 inet 192.168.1.10/24 brd ...
-        match = re.search(r"inet ([\d.]+)/(\d+)", result.stdout)
+        match = re.search(r"inet ([\d.]+)/(\d+)", result)
         if not match:
             raise RuntimeError(f"Cannot get IP for interface {interface}")
         
@@ -56,6 +75,16 @@ class Network:
         
         return HostNetwork(ip=ip, mask=mask, gateway=gateway, interface=interface)
 
+    def _host_run(self, cmd: list[str]) -> str:
+        """stdout команды на PVE хосте: через executor pve, без него — локально.
+        
+        Результат кэшируется в кэше хоста pve, поэтому и выполняться команда
+        должна на нём, а не на машине, где запущен CLI.
+        """
+        if self.pve:
+            return self.pve.executor.run(cmd, check=False).stdout
+        return subprocess.run(cmd, capture_output=True, text=True).stdout
+
     def ping(self, ip: str, timeout: float = 1.0) -> bool:
         """Проверить доступность IP через ping."""
         result = subprocess.run(
@@ -64,6 +93,72 @@ class Network:
         )
         return result.returncode == 0
 
+    def known_used_ips(self) -> set[str]:
+        """IP, занятость которых известна без ping.
+        
+        Источники: таблица соседей ядра, IP из net0 контейнеров кластера
+        и зарезервированные адреса.
+        """
+        used = self._neighbour_ips() | self.reserved
+        if self.pve:
+            used |= self.pve.list_container_ips()
+        return used
+
+    def _neighbour_ips(self) -> set[str]:
+        """IP из таблицы соседей (ip -j neigh, fallback /proc/net/arp)."""
+        try:
+            result = subprocess.run(
+                ["ip", "-j", "neigh", "show"],
+                capture_output=True, text=True
+            )
+            entries = json.loads(result.stdout) if result.returncode == 0 else None
+        except (OSError, json.JSONDecodeError):
+            entries = None
+        
+        if entries is not None:
+            # [{"dst": "192.168.1.5", "lladdr": "...", "state": ["REACHABLE"]}, ...]
+            return {
+                entry["dst"] for entry in entries
+                if entry.get("lladdr")
+                and not {"FAILED", "INCOMPLETE"} & set(entry.get("state", []))
+            }
+        
+        # IP address  HW type  Flags  HW address  Mask  Device
+        ips = set()
+        try:
+            with open("/proc/net/arp") as f:
+                for line in f.readlines()[1:]:
+                    parts = line.split()
+                    # Flags 0x2 (ATF_COM) — запись с известным MAC
+                    if len(parts) >= 4 and int(parts[2], 16) & 0x2:
+                        ips.add(parts[0])
+        except OSError:
+            pass
+        return ips
+
+    def sweep(self, ips: list[str], timeout: float = 1.0) -> Iterator[tuple[str, bool]]:
+        """Параллельно пропинговать адреса.
+        
+        Результаты (ip, alive) отдаются в порядке адресов: очередной адрес
+        возвращается, как только завершены проверки всех предыдущих.
+        Адреса из known_used_ips считаются занятыми без ping.
+        При досрочном закрытии генератора оставшиеся проверки отменяются.
+        """
+        if not ips:
+            return
+        
+        used = self.known_used_ips()
+        probe = [ip for ip in ips if ip not in used]
+        self.logger.debug(f"Ping sweep: {len(ips) - len(probe)} known used, {len(probe)} to probe")
+        
+        pool = ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(probe))))
+        try:
+            futures = {ip: pool.submit(self.ping, ip, timeout) for ip in probe}
+            for ip in ips:
+                yield ip, ip in used or futures[ip].result()
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
     def resolve_ip(self, ip_arg: str) -> tuple[str, str, str]:
         """Разрешить IP аргумент.
         
@@ -102,10 +197,11 @@ class Network:
 
     def find_free_ip(self, start: int, end: int, subnet: str) -> Optional[str]:
         """Найти первый свободный IP в диапазоне через ping."""
-        for i in range(start, end + 1):
-            ip = f"{subnet}.{i}"
-            if not self.ping(ip, timeout=1.0):
-                return ip
+        ips = [f"{subnet}.{i}" for i in range(start, end + 1)]
+        with closing(self.sweep(ips, timeout=1.0)) as results:
+            for ip, alive in results:
+                if not alive:
+                    return ip
         return None
 
     def list_free_ips(self, ip_range: str) -> list[str]:
@@ -123,10 +219,5 @@ class Network:
         else:
             raise ValueError(f"Invalid IP range: {ip_range}")
         
-        free_ips = []
-        for i in range(start, end + 1):
-            ip = f"{subnet}.{i}"
-            if not self.ping(ip, timeout=1.0):
-                free_ips.append(ip)
-        
-        return free_ips
+        ips = [f"{subnet}.{i}" for i in range(start, end + 1)]
+        return [ip for ip, alive in self.sweep(ips, timeout=1.0) if not alive]
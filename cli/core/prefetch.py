@@ -0,0 +1,223 @@
+"""Предварительное скачивание шаблонов на хосты.
+
+Перед большим развёртыванием шаблоны скачиваются во все нужные хранилища
+всех хостов параллельно, чтобы pct create не ждал pveam download.
+Одинаковые запросы (тот же файл в то же хранилище хоста) выполняются
+один раз, скачанные файлы сверяются с sha512 из индекса aplinfo.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from lib.logger import Logger
+from cli.core.pve import PVE
+from cli.core.host_manager import HostManager
+
+
+@dataclass
+class PrefetchItem:
+    """Один шаблон в одном хранилище хоста."""
+    host: Optional[str]
+    storage: str
+    name: str                       # запрос пользователя: debian-12-standard
+    template: Optional[str] = None  # имя файла из pveam available
+    volid: Optional[str] = None     # уже есть в хранилище
+    status: str = "pending"         # pending, present, downloading, verifying, downloaded, failed
+    percent: int = 0
+    verified: Optional[bool] = None
+    message: str = ""
+
+    @property
+    def key(self) -> tuple:
+        return (self.host, self.storage, self.template or self.name)
+
+    def to_dict(self) -> dict:
+        return {
+            "host": self.host or "default",
+            "storage": self.storage,
+            "name": self.name,
+            "template": self.template,
+            "volid": self.volid,
+            "status": self.status,
+            "verified": self.verified,
+            "message": self.message,
+        }
+
+
+class TemplatePrefetcher:
+    """Параллельное скачивание шаблонов на несколько хостов и хранилищ."""
+
+    def __init__(
+        self,
+        manager: HostManager = None,
+        workers: int = 8,
+        json_output: bool = False,
+        use_cache: bool = True,
+        verify_existing: bool = False,
+        arch: str = "amd64"
+    ):
+        self.manager = manager or HostManager()
+        self.workers = workers
+        self.json_output = json_output
+        self.use_cache = use_cache
+        self.verify_existing = verify_existing
+        self.arch = arch
+
+    def _logger(self, host: Optional[str]) -> Logger:
+        logger = Logger(json_output=self.json_output)
+        logger.set_context(command="templates prefetch", host=host or "default")
+        return logger
+
+    def plan(self, hosts: list[Optional[str]], names: list[str], storages: list[str] = None) -> list[PrefetchItem]:
+        """Разрешить имена шаблонов на каждом хосте (хосты опрашиваются параллельно)."""
+        items: list[PrefetchItem] = []
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = [pool.submit(self._plan_host, host, names, storages) for host in hosts]
+            for future in futures:
+                items.extend(future.result())
+
+        # Разные запросы ("debian-12", "debian-12-standard") могут указывать на один файл
+        unique: dict[tuple, PrefetchItem] = {}
+        for item in items:
+            unique.setdefault(item.key, item)
+        return list(unique.values())
+
+    def _plan_host(self, host: Optional[str], names: list[str], storages: list[str] = None) -> list[PrefetchItem]:
+        """Шаблоны одного хоста: что уже есть и что нужно скачать."""
+        logger = self._logger(host)
+        executor = None
+        try:
+            executor = self.manager.get_executor(host, use_cache=self.use_cache)
+            pve = PVE(logger, executor=executor)
+            targets = storages or [pve.find_template_storage() or "local"]
+            available_index = pve.available_templates()
+
+            items = []
+            for storage in targets:
+                index = pve.template_index(storage)
+                for name in names:
+                    item = PrefetchItem(host=host, storage=storage, name=name)
+                    available = available_index.find(name, self.arch)
+                    if available:
+                        item.template = available.filename
+                        item.volid = index.find_volid(available.filename, self.arch)
+                    else:
+                        item.volid = index.find_volid(name, self.arch)
+                        if not item.volid:
+                            item.status = "failed"
+                            item.message = f"Template '{name}' not found in pveam available"
+                    if item.volid:
+                        item.template = item.volid.split("/")[-1]
+                        item.status = "present"
+                    items.append(item)
+            return items
+        except Exception as e:
+            return [
+                PrefetchItem(host=host, storage=storage, name=name, status="failed", message=str(e))
+                for storage in (storages or ["-"]) for name in names
+            ]
+        finally:
+            if executor:
+                executor.close()
+
+    def run(
+        self,
+        items: list[PrefetchItem],
+        on_progress: Callable[[PrefetchItem], None] = None
+    ) -> list[PrefetchItem]:
+        """Скачать недостающие шаблоны. on_progress вызывается при каждом изменении элемента."""
+        def notify(item: PrefetchItem) -> None:
+            if on_progress:
+                on_progress(item)
+
+        todo = [
+            item for item in items
+            if item.status == "pending" or (item.status == "present" and self.verify_existing)
+        ]
+        for item in items:
+            notify(item)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = [pool.submit(self._fetch, item, notify) for item in todo]
+            for future in as_completed(futures):
+                future.result()
+        return items
+
+    def _fetch(self, item: PrefetchItem, notify: Callable[[PrefetchItem], None]) -> None:
+        """Скачать и проверить один шаблон."""
+        logger = self._logger(item.host)
+        executor = None
+        try:
+            executor = self.manager.get_executor(item.host, use_cache=self.use_cache)
+            pve = PVE(logger, executor=executor)
+
+            if item.status == "present":
+                item.status = "verifying"
+                notify(item)
+                item.verified = pve.verify_template(item.volid)
+                if item.verified is False:
+                    # Повреждённый файл в хранилище: скачиваем заново
+                    logger.warn(f"Checksum mismatch for {item.volid}, downloading again")
+                    pve.remove_template(item.volid)
+                    self._download(pve, item, notify)
+                else:
+                    item.status = "present"
+                return
+
+            self._download(pve, item, notify)
+        except Exception as e:
+            item.status = "failed"
+            item.message = str(e)
+        finally:
+            if executor:
+                executor.close()
+            notify(item)
+
+    def _download(self, pve: PVE, item: PrefetchItem, notify: Callable[[PrefetchItem], None]) -> None:
+        """Скачать шаблон и сверить контрольную сумму."""
+        item.status = "downloading"
+        item.percent = 0
+        notify(item)
+
+        def progress(percent: int) -> None:
+            item.percent = percent
+            notify(item)
+
+        if not pve.download_template(item.template, item.storage, on_progress=progress):
+            item.status = "failed"
+            item.message = f"pveam download {item.template} failed"
+            return
+
+        item.volid = pve.template_index(item.storage).find_volid(item.template, self.arch)
+        if not item.volid:
+            item.status = "failed"
+            item.message = f"Template {item.template} not found in {item.storage} after download"
+            return
+
+        item.status = "verifying"
+        item.percent = 100
+        notify(item)
+        item.verified = pve.verify_template(item.volid)
+        if item.verified is False:
+            pve.remove_template(item.volid)
+            item.status = "failed"
+            item.message = f"Checksum mismatch for {item.volid}"
+            item.volid = None
+            return
+        item.status = "downloaded"
+
+
+def prefetch_templates(
+    hosts: list[Optional[str]],
+    names: list[str],
+    storages: list[str] = None,
+    on_progress: Callable[[PrefetchItem], None] = None,
+    **kwargs
+) -> list[PrefetchItem]:
+    """Скачать шаблоны names во все хранилища storages всех хостов hosts."""
+    prefetcher = TemplatePrefetcher(**kwargs)
+    return prefetcher.run(prefetcher.plan(hosts, names, storages), on_progress)
@@ -2,15 +2,19 @@
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Iterator, Optional
+import json
 import re
+import shutil
 import tempfile
 
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 from lib.logger import Logger
-from lib.system import CommandResult
-from cli.core.executor import CommandExecutor, LocalExecutor
+from lib.system import CommandResult, SyncResult, hash_tree
+from cli.core.executor import CommandExecutor, LocalExecutor, OutputChunk, collect_output
+from cli.core.cache import MetadataCache
+from cli.core.templates import TemplateIndex, download_once, parse_aplinfo
 
 
 @dataclass
@@ -25,12 +29,119 @@ class Container:
     disk: int
 
 
+LIST_CONTAINERS_CMD = ["pvesh", "get", "/nodes/localhost/lxc", "--output-format", "json"]
+
+
+def configs_dump_cmd(cluster: bool = False) -> list[str]:
+    """Команда чтения всех конфигов контейнеров ноды (или кластера) за один вызов."""
+    pattern = "/etc/pve/nodes/*/lxc/*.conf" if cluster else "/etc/pve/lxc/*.conf"
+    return ["sh", "-c", f"tail -v -n +1 {pattern} 2>/dev/null"]
+
+
+def parse_config(text: str) -> dict:
+    """Распарсить вывод pct config или содержимое файла конфигурации."""
+    config = {"_exists": True}
+    for line in text.strip().split("\n"):
+        # Секции снапшотов ([snapshot]) идут после основной конфигурации
+        if line.startswith("["):
+            break
+        if ":" in line:
+            key, value = line.split(":", 1)
+            key = key.strip()
+            value = value.strip()
+            
+            if key == "hostname":
+                config["hostname"] = value
+            elif key == "cores":
+                config["cores"] = int(value)
+            elif key == "memory":
+                config["memory"] = int(value)
+            elif key == "rootfs":
+                # local-lvm:vm-101-disk-0,size=8G
+                if match := re.search(r"size=(\d+)G", value):
+                    config["disk"] = int(match.group(1))
+            elif key == "net0":
+                # Парсим IP из net0
+                if match := re.search(r"ip=([\d./]+)", value):
+                    config["ip"] = match.group(1).split("/")[0]
+            elif key == "template":
+                config["template"] = value == "1"
+            elif key == "tags":
+                config["tags"] = [tag for tag in re.split(r"[;, ]", value) if tag]
+    
+    return config
+
+
+def net0_config(bridge: str = "vmbr0", ip: str = "dhcp", gateway: str = None) -> str:
+    """Значение net0 для pct create/pct set."""
+    net0 = f"name=eth0,bridge={bridge},ip={ip}"
+    if gateway and ip != "dhcp":
+        net0 += f",gw={gateway}"
+    return net0
+
+
+def parse_configs_dump(text: str) -> dict[int, dict]:
+    """Распарсить вывод configs_dump_cmd: {ctid: config}."""
+    # ==> /etc/pve/lxc/101.conf <==
+    parts = re.split(r"^==> (.+?) <==$", text, flags=re.MULTILINE)
+    configs = {}
+    for path, chunk in zip(parts[1::2], parts[2::2]):
+        if match := re.search(r"/(\d+)\.conf$", path):
+            configs[int(match.group(1))] = parse_config(chunk)
+    return configs
+
+
+def containers_from_resources(resources: list[dict], configs: dict[int, dict]) -> list[Container]:
+    """Собрать список контейнеров из ответа pvesh и конфигов."""
+    containers = []
+    for res in sorted(resources, key=lambda r: int(r.get("vmid", 0))):
+        ctid = int(res["vmid"])
+        config = configs.get(ctid, {})
+        containers.append(Container(
+            ctid=ctid,
+            name=config.get("hostname") or res.get("name", ""),
+            status=res.get("status", "unknown"),
+            ip=config.get("ip"),
+            cores=config.get("cores") or int(res.get("cpus") or 1),
+            memory=config.get("memory") or int(res.get("maxmem", 0)) // (1024 ** 2) or 512,
+            disk=config.get("disk") or int(res.get("maxdisk", 0)) // (1024 ** 3) or 8
+        ))
+    return containers
+
+
+def parse_template_list(text: str) -> list[str]:
+    """Распарсить вывод pveam list."""
+    templates = []
+    for line in text.strip().split("\n")[1:]:
+        if line.strip():
+            parts = line.split()
+            if parts:
+                templates.append(parts[0])
+    return templates
+
+
+# Размер блока при передаче файла в контейнер
+PUSH_CHUNK_SIZE = 1024 * 1024
+
+# Теги golden-образа: pve-lxc-golden;golden-<приложение>
+GOLDEN_TAG = "pve-lxc-golden"
+GOLDEN_APP_TAG = "golden-"
+
+# Индекс шаблонов pveam с контрольными суммами
+APLINFO_GLOB = "/var/lib/pve-manager/apl-info/*"
+
+_PERCENT_RE = re.compile(r"(\d{1,3})%")
+
+
 class PVE:
     """Работа с Proxmox VE."""
 
-    def __init__(self, logger: Logger, executor: CommandExecutor = None):
+    def __init__(self, logger: Logger, executor: CommandExecutor = None, cache: MetadataCache = None):
         self.logger = logger
         self.executor = executor or LocalExecutor()
+        # Кэш метаданных хоста: от HostManager через executor или только в памяти
+        self.cache = cache or self.executor.cache or MetadataCache(root=None)
+        self._template_indexes: dict[str, TemplateIndex] = {}
 
     def _run(self, cmd: list[str], check: bool = True) -> CommandResult:
         """Выполнить команду через executor."""
@@ -54,13 +165,7 @@ class PVE:
         """Создать контейнер."""
         self.logger.step(f"Creating container {ctid}")
 
-        # Формируем net0
-        if net_ip == "dhcp":
-            net0 = f"name=eth0,bridge={net_bridge},ip=dhcp"
-        else:
-            net0 = f"name=eth0,bridge={net_bridge},ip={net_ip}"
-            if net_gw:
-                net0 += f",gw={net_gw}"
+        net0 = net0_config(net_bridge, net_ip, net_gw)
 
         cmd = [
             "pct", "create", str(ctid), template,
@@ -80,6 +185,63 @@ class PVE:
             self.logger.error(f"Failed to create container: {result.stderr}")
         return result.success
 
+    def clone(self, source: int, ctid: int, hostname: str, storage: str = None) -> bool:
+        """Клонировать контейнер-шаблон.
+
+        Сначала пробуется связанный клон (мгновенный, на хранилищах со
+        снапшотами: lvmthin, zfs, rbd); если хранилище его не поддерживает —
+        полная копия.
+        """
+        self.logger.step(f"Cloning container {source} to {ctid}")
+        cmd = ["pct", "clone", str(source), str(ctid), "--hostname", hostname]
+        result = self._run(cmd, check=False)
+        if result.success:
+            return True
+
+        self.logger.debug(f"Linked clone failed, making full copy: {result.stderr.strip()}")
+        cmd += ["--full", "1"]
+        if storage:
+            cmd += ["--storage", storage]
+        result = self._run(cmd)
+        if not result.success:
+            self.logger.error(f"Failed to clone container: {result.stderr}")
+        return result.success
+
+    def set_options(self, ctid: int, **options) -> bool:
+        """Изменить параметры контейнера (pct set --key value)."""
+        cmd = ["pct", "set", str(ctid)]
+        for key, value in options.items():
+            if value is not None:
+                cmd += [f"--{key}", str(value)]
+        result = self._run(cmd)
+        if not result.success:
+            self.logger.error(f"Failed to configure container {ctid}: {result.stderr}")
+        return result.success
+
+    def resize(self, ctid: int, disk: int) -> bool:
+        """Увеличить rootfs до disk ГБ."""
+        result = self._run(["pct", "resize", str(ctid), "rootfs", f"{disk}G"])
+        return result.success
+
+    def to_template(self, ctid: int) -> bool:
+        """Превратить контейнер в шаблон (pct template)."""
+        result = self._run(["pct", "template", str(ctid)])
+        if not result.success:
+            self.logger.error(f"Failed to convert container {ctid} to template: {result.stderr}")
+        return result.success
+
+    def golden_images(self) -> dict[str, int]:
+        """Golden-образы ноды: {приложение: CTID} (самый новый на приложение)."""
+        images = {}
+        for ctid, config in sorted(self._get_all_configs().items()):
+            tags = config.get("tags", [])
+            if not config.get("template") or GOLDEN_TAG not in tags:
+                continue
+            for tag in tags:
+                if tag.startswith(GOLDEN_APP_TAG):
+                    images[tag[len(GOLDEN_APP_TAG):]] = ctid
+        return images
+
     def destroy(self, ctid: int, force: bool = False) -> bool:
         """Удалить контейнер."""
         self.logger.step(f"Destroying container {ctid}")
@@ -110,28 +272,177 @@ class PVE:
         full_cmd = ["pct", "exec", str(ctid), "--"] + cmd
         return self._run(full_cmd, check=False)
 
+    def exec_stream(self, ctid: int, cmd: list[str]) -> Iterator[OutputChunk]:
+        """Выполнить команду в контейнере с потоковым выводом."""
+        full_cmd = ["pct", "exec", str(ctid), "--"] + cmd
+        self.logger.debug(f"PVE: {' '.join(full_cmd)}")
+        return self.executor.stream(full_cmd)
+
+    def open_session(self, ctid: int, output_limit: int = None) -> "ExecSession":
+        """Открыть долгоживущую exec-сессию в контейнере."""
+        from cli.core.exec_session import ExecSession
+        
+        self.logger.debug(f"PVE: opening exec session in {ctid}")
+        return ExecSession(self.executor, ctid, output_limit or ExecSession.OUTPUT_LIMIT).start()
+
     def push(self, ctid: int, src: Path, dst: Path) -> bool:
-        """Скопировать файл в контейнер."""
-        # Для удалённого executor сначала копируем файл на хост, потом в контейнер
+        """Скопировать файл (или директорию) в контейнер.
+        
+        Для удалённого executor содержимое передаётся по SSH каналу прямо
+        в pct exec, без промежуточной копии на хосте.
+        """
+        src = Path(src)
+        if src.is_dir():
+            return self.push_tree(ctid, src, dst)
+        
         if isinstance(self.executor, LocalExecutor):
             result = self._run(["pct", "push", str(ctid), str(src), str(dst)])
             return result.success
-        else:
-            # Копируем файл на удалённый хост во временную директорию
-            remote_tmp = Path(f"/tmp/pve-lxc-{src.name}")
+        
+        mode = f"{src.stat().st_mode & 0o7777:o}"
+        script = 'mkdir -p "$(dirname "$1")" && cat > "$1" && chmod "$2" "$1"'
+        
+        def write(stdin) -> None:
+            with open(src, "rb") as f:
+                shutil.copyfileobj(f, stdin, PUSH_CHUNK_SIZE)
+        
+        try:
+            return self._pipe(ctid, script, [str(dst), mode], write)
+        except NotImplementedError:
+            return self._push_via_host(ctid, src, dst)
+    
+    def write_file(self, ctid: int, dst: Path, content: str, mode: int = 0o644) -> bool:
+        """Записать content в файл контейнера.
+        
+        Содержимое передаётся через stdin и не попадает в аргументы команды
+        и лог (важно для паролей и ключей).
+        """
+        data = content.encode()
+        script = 'mkdir -p "$(dirname "$1")" && (umask 077 && cat > "$1") && chmod "$2" "$1"'
+        try:
+            return self._pipe(ctid, script, [str(dst), f"{mode:o}"], lambda stdin: stdin.write(data))
+        except NotImplementedError:
+            with tempfile.TemporaryDirectory() as tmpdir:
+                src = Path(tmpdir) / "content"
+                src.write_bytes(data)
+                src.chmod(0o600)
+                if not self._push_via_host(ctid, src, dst):
+                    return False
+            return self.exec(ctid, ["chmod", f"{mode:o}", str(dst)]).success
+    
+    def push_tree(self, ctid: int, src: Path, dst: Path, names: list[str] = None) -> bool:
+        """Скопировать директорию в контейнер одним tar потоком.
+        
+        Содержимое src распаковывается в dst (создаётся при необходимости).
+        names — только эти файлы (пути относительно src).
+        """
+        import tarfile
+        
+        src = Path(src)
+        
+        def write(stdin) -> None:
+            with tarfile.open(fileobj=stdin, mode="w|", format=tarfile.PAX_FORMAT) as tar:
+                if names is None:
+                    for path in sorted(src.iterdir()):
+                        tar.add(path, arcname=path.name)
+                else:
+                    for name in names:
+                        tar.add(src / name, arcname=name)
+        
+        return self._pipe(ctid, 'mkdir -p "$1" && tar -xf - -C "$1"', [str(dst)], write)
+    
+    def sync(self, ctid: int, local_dir: Path, remote_dir: Path, delete: bool = False) -> SyncResult:
+        """Синхронизировать директорию с контейнером.
+        
+        Хэши файлов в контейнере считаются одной командой, изменённые файлы
+        передаются одним tar потоком. При delete удаляются файлы, которых
+        нет в local_dir.
+        """
+        local = hash_tree(local_dir)
+        remote = self._remote_hashes(ctid, remote_dir)
+        changed = [name for name, digest in local.items() if remote.get(name) != digest]
+        deleted = sorted(set(remote) - set(local)) if delete else []
+        
+        success = True
+        if changed:
+            success = self.push_tree(ctid, local_dir, remote_dir, names=changed)
+        if success and deleted:
+            result = self.exec(ctid, ["sh", "-c", 'cd "$1" && shift && rm -f -- "$@"', "sh", str(remote_dir), *deleted])
+            success = result.success
+        
+        self.logger.debug(
+            f"Sync {local_dir} -> {ctid}:{remote_dir}: "
+            f"{len(changed)} changed, {len(local) - len(changed)} unchanged, {len(deleted)} deleted"
+        )
+        return SyncResult(success, changed, len(local) - len(changed), deleted)
+    
+    def _remote_hashes(self, ctid: int, remote_dir: Path) -> dict[str, str]:
+        """SHA-256 файлов директории в контейнере (пустой словарь, если её нет)."""
+        result = self.exec(ctid, [
+            "sh", "-c", 'cd "$1" 2>/dev/null || exit 0; find . -type f -exec sha256sum {} +',
+            "sh", str(remote_dir)
+        ])
+        hashes = {}
+        for line in result.stdout.splitlines():
+            # <hex>  ./path; имена со спецсимволами sha256sum экранирует (\ в начале) —
+            # такие файлы просто считаются изменёнными
+            digest, sep, name = line.partition("  ./")
+            if sep and not digest.startswith("\\"):
+                hashes[name] = digest
+        return hashes
+    
+    def _pipe(self, ctid: int, script: str, args: list[str], write) -> bool:
+        """Запустить sh -c script в контейнере и передать данные в его stdin."""
+        self.logger.debug(f"PVE: pct exec {ctid} -- sh -c {script!r} {' '.join(args)}")
+        proc = self.executor.open_process(
+            ["pct", "exec", str(ctid), "--", "sh", "-c", script, "sh", *args]
+        )
+        try:
+            write(proc.stdin)
+            proc.stdin.close()
+        except OSError as e:
+            # Команда в контейнере завершилась раньше, чем приняла данные
+            self.logger.debug(f"Push to container {ctid} interrupted: {e}")
+            proc.kill()
+            proc.wait()
+            return False
+        finally:
+            proc.stdout.close()
+        return proc.wait() == 0
+    
+    def _push_via_host(self, ctid: int, src: Path, dst: Path) -> bool:
+        """Копирование через временный файл на хосте (executor без open_process)."""
+        result = self._run(["mktemp", "/tmp/pve-lxc-push.XXXXXX"])
+        if not result.success:
+            return False
+        remote_tmp = Path(result.stdout.strip())
+        try:
             if not self.executor.push_file(src, remote_tmp):
                 return False
-            
-            # Затем используем pct push на удалённом хосте
-            result = self._run(["pct", "push", str(ctid), str(remote_tmp), str(dst)])
-            
-            # Удаляем временный файл
+            return self._run(["pct", "push", str(ctid), str(remote_tmp), str(dst)]).success
+        finally:
             self.executor.run(["rm", "-f", str(remote_tmp)])
-            
-            return result.success
 
     def list_containers(self) -> list[Container]:
-        """Получить список контейнеров."""
+        """Получить список контейнеров.
+
+        Статусы берутся одним запросом к API ноды, параметры — одним чтением
+        всех конфигов из /etc/pve/lxc. При недоступности pvesh используется
+        медленный путь через pct list + pct config.
+        """
+        result = self._run(LIST_CONTAINERS_CMD, check=False)
+        if not result.success:
+            return self._list_containers_slow()
+        
+        try:
+            resources = json.loads(result.stdout)
+        except json.JSONDecodeError:
+            return self._list_containers_slow()
+        
+        return containers_from_resources(resources, self._get_all_configs())
+
+    def _list_containers_slow(self) -> list[Container]:
+        """Список контейнеров через pct list и pct config для каждого."""
         result = self._run(["pct", "list"])
         if not result.success:
             return []
@@ -191,84 +502,187 @@ class PVE:
         if not result.success:
             return {}
         
-        config = {"_exists": True}
-        for line in result.stdout.strip().split("\n"):
-            if ":" in line:
-                key, value = line.split(":", 1)
-                key = key.strip()
-                value = value.strip()
-                
-                if key == "hostname":
-                    config["hostname"] = value
-                elif key == "cores":
-                    config["cores"] = int(value)
-                elif key == "memory":
-                    config["memory"] = int(value)
-                elif key == "net0":
-                    # Парсим IP из net0
-                    if match := re.search(r"ip=([\d./]+)", value):
-                        config["ip"] = match.group(1).split("/")[0]
-        
-        return config
-
-    def next_ctid(self) -> int:
-        """Получить следующий свободный CTID."""
+        return parse_config(result.stdout)
+
+    def list_container_ips(self) -> set[str]:
+        """IP из net0 всех контейнеров кластера."""
+        configs = self._get_all_configs(cluster=True)
+        return {config["ip"] for config in configs.values() if config.get("ip")}
+
+    def _get_all_configs(self, cluster: bool = False) -> dict[int, dict]:
+        """Получить конфигурации всех контейнеров ноды (или кластера) за один вызов."""
+        result = self._run(configs_dump_cmd(cluster), check=False)
+        if not result.success:
+            return {}
+        
+        return parse_configs_dump(result.stdout)
+
+    def next_ctid(self, exclude: set[int] = frozenset()) -> int:
+        """Получить следующий свободный CTID.
+        
+        exclude — CTID, зарезервированные под ещё не созданные контейнеры.
+        Кандидаты после них проверяются через pvesh: они могут быть заняты
+        существующими контейнерами и VM.
+        """
         result = self._run(["pvesh", "get", "/cluster/nextid"])
         if result.success:
-            return int(result.stdout.strip())
+            first = ctid = int(result.stdout.strip())
+            while ctid in exclude or (ctid != first and not self._ctid_available(ctid)):
+                ctid += 1
+            return ctid
         
         # Fallback: найти максимальный CTID + 1
         containers = self.list_containers()
-        if containers:
-            return max(c.ctid for c in containers) + 1
-        return 100
+        ctid = max(c.ctid for c in containers) + 1 if containers else 100
+        while ctid in exclude:
+            ctid += 1
+        return ctid
+    
+    def _ctid_available(self, ctid: int) -> bool:
+        """CTID не занят контейнером или VM кластера."""
+        return self._run(["pvesh", "get", "/cluster/nextid", "--vmid", str(ctid)], check=False).success
 
     def list_templates(self, storage: str = "local") -> list[str]:
         """Список доступных шаблонов."""
+        return self.cache.get_or_load(
+            f"templates:{storage}", lambda: self._load_templates(storage)
+        ) or []
+
+    def _load_templates(self, storage: str) -> Optional[list[str]]:
+        """Запросить список шаблонов у pveam."""
         result = self._run(["pveam", "list", storage])
         if not result.success:
-            return []
+            return None
+        
+        return parse_template_list(result.stdout)
+
+    def template_index(self, storage: str = "local") -> TemplateIndex:
+        """Индекс шаблонов хранилища (строится один раз на список шаблонов)."""
+        if storage not in self._template_indexes:
+            self._template_indexes[storage] = TemplateIndex(self.list_templates(storage))
+        return self._template_indexes[storage]
+
+    def available_templates(self) -> TemplateIndex:
+        """Индекс шаблонов, доступных для скачивания (pveam available)."""
+        return TemplateIndex(self.cache.get_or_load("available", self._load_available) or [])
+
+    def _load_available(self) -> Optional[list[str]]:
+        """Запросить список доступных шаблонов у pveam."""
+        result = self._run(["pveam", "available"])
+        if not result.success:
+            return None
+        # system          debian-12-standard_12.7-1_amd64.tar.zst
+        return [line.split()[1] for line in result.stdout.splitlines() if len(line.split()) == 2]
+
+    def find_template(self, name: str, storage: str = None, arch: str = "amd64") -> Optional[str]:
+        """Найти самую новую версию шаблона по имени (например 'debian-12-standard')."""
+        if not storage:
+            storage = self.find_template_storage() or "local"
         
-        templates = []
-        for line in result.stdout.strip().split("\n")[1:]:
-            if line.strip():
-                parts = line.split()
-                if parts:
-                    templates.append(parts[0])
-        return templates
+        # tpl = "pool2-dir:vztmpl/debian-12-standard_12.7-1_amd64.tar.zst"
+        tpl = self.template_index(storage).find_volid(name, arch)
+        if tpl:
+            self.logger.debug(f"Found template: {tpl}")
+        return tpl
 
-    def find_template(self, name: str, storage: str = None) -> Optional[str]:
-        """Найти шаблон по имени (например 'debian-12-standard')."""
+    def ensure_template(self, name: str, storage: str = None, arch: str = "amd64") -> Optional[str]:
+        """Найти шаблон, а если его нет в хранилище — скачать самый новый из pveam available."""
         if not storage:
             storage = self.find_template_storage() or "local"
         
-        templates = self.list_templates(storage)
-        for tpl in templates:
-            # tpl = "pool2-dir:vztmpl/debian-12-standard_12.7-1_amd64.tar.zst"
-            filename = tpl.split("/")[-1] if "/" in tpl else tpl
-            if filename.startswith(name):
-                self.logger.debug(f"Found template: {tpl}")
-                return tpl
+        if tpl := self.find_template(name, storage, arch):
+            return tpl
         
-        return None
+        available = self.available_templates().find(name, arch)
+        if not available:
+            return None
+        if not self.download_template(available.filename, storage):
+            return None
+        return self.find_template(available.filename, storage, arch)
+
+    def download_template(
+        self,
+        template: str,
+        storage: str = "local",
+        on_progress: Callable[[int], None] = None
+    ) -> bool:
+        """Скачать шаблон.
 
-    def download_template(self, template: str, storage: str = "local") -> bool:
-        """Скачать шаблон."""
+        Одновременные запросы того же шаблона в то же хранилище хоста
+        (из других потоков процесса) ждут первого скачивания.
+        on_progress получает процент выполнения из вывода pveam.
+        """
+        key = (getattr(self.executor, "host", "local"), storage, template)
+        return download_once(key, lambda: self._download_template(template, storage, on_progress))
+
+    def _download_template(self, template: str, storage: str, on_progress: Callable[[int], None]) -> bool:
+        """Скачать шаблон через pveam download."""
         self.logger.step(f"Downloading template {template}")
-        result = self._run(["pveam", "download", storage, template])
+        cmd = ["pveam", "download", storage, template]
+        self.logger.debug(f"PVE: {' '.join(cmd)}")
+
+        def report(chunk: OutputChunk) -> None:
+            if on_progress and (percents := _PERCENT_RE.findall(chunk.data)):
+                on_progress(min(int(percents[-1]), 100))
+
+        result = collect_output(self.executor.stream(cmd), on_chunk=report, limit=64 * 1024)
+        self.cache.invalidate(f"templates:{storage}")
+        self._template_indexes.pop(storage, None)
+        if not result.success:
+            self.logger.error(f"Failed to download template {template}: {result.stderr.strip()}")
+        return result.success
+
+    def template_checksum(self, filename: str) -> Optional[str]:
+        """sha512 шаблона из индекса aplinfo (None — шаблон не из pveam available)."""
+        checksums = self.cache.get_or_load("aplinfo", self._load_aplinfo) or {}
+        return checksums.get(filename)
+
+    def _load_aplinfo(self) -> Optional[dict[str, str]]:
+        """Прочитать индекс aplinfo хоста."""
+        result = self._run(["sh", "-c", f"cat {APLINFO_GLOB} 2>/dev/null"], check=False)
+        if not result.stdout:
+            return None
+        return parse_aplinfo(result.stdout)
+
+    def verify_template(self, volid: str) -> Optional[bool]:
+        """Сверить sha512 скачанного шаблона с индексом aplinfo.
+
+        None — контрольная сумма шаблона неизвестна.
+        """
+        expected = self.template_checksum(volid.split("/")[-1])
+        if not expected:
+            return None
+
+        path = self._run(["pvesm", "path", volid], check=False)
+        if not path.success:
+            return False
+        result = self._run(["sha512sum", path.stdout.strip()], check=False)
+        if not result.success:
+            return False
+        return result.stdout.split()[0].lower() == expected
+
+    def remove_template(self, volid: str) -> bool:
+        """Удалить шаблон из хранилища."""
+        storage = volid.split(":")[0]
+        result = self._run(["pveam", "remove", volid], check=False)
+        self.cache.invalidate(f"templates:{storage}")
+        self._template_indexes.pop(storage, None)
         return result.success
 
     def _get_storages(self) -> list[dict]:
         """Получить список хранилищ."""
+        return self.cache.get_or_load("storages", self._load_storages) or []
+
+    def _load_storages(self) -> Optional[list[dict]]:
+        """Запросить список хранилищ у pvesh."""
         result = self._run(["pvesh", "get", "/storage", "--output-format", "json"])
         if not result.success:
-            return []
+            return None
         
-        import json
         try:
             return json.loads(result.stdout)
         except json.JSONDecodeError:
-            return []
+            return None
 
     def find_rootfs_storage(self) -> Optional[str]:
         """Найти первое хранилище, подходящее для rootfs контейнеров."""
@@ -304,3 +718,4 @@ class PVE:
                 return storage["storage"]
         
         return None
+
@@ -0,0 +1,118 @@
+"""Ожидание готовности контейнера после создания или запуска.
+
+Все проверки (probes) собираются в один скрипт, который выполняется одним
+pct exec за попытку. Попытки повторяются с экспоненциальной задержкой,
+начиная с десятков миллисекунд: развёртывание начинается, как только
+контейнер действительно готов, а при таймауте известно, какая проверка
+не прошла.
+"""
+
+from dataclasses import dataclass
+from typing import Callable
+import shlex
+import time
+
+from pathlib import Path
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from lib.logger import Logger
+
+# Проверки готовности: имя -> shell условие (код возврата 0 — готово).
+# exec проверяется самим фактом выполнения скрипта
+PROBES = {
+    "exec": "true",
+    # Без systemd в роли PID 1 проверка не применяется. offline не принимается:
+    # так отвечает systemctl и без работающего systemd, проверка проходила бы всегда
+    "systemd": (
+        '[ "$(cat /proc/1/comm 2>/dev/null)" = systemd ] || exit 0; '
+        "case $(systemctl is-system-running 2>/dev/null) in running|degraded) exit 0;; esac; exit 1"
+    ),
+    "route": "awk '$2 == \"00000000\" { found = 1 } END { exit !found }' /proc/net/route",
+    "dns": "getent hosts {dns_name}",
+}
+
+# dns не входит по умолчанию: без доступа к внешнему DNS (изолированная сеть,
+# установка через APT прокси) контейнер готов, а проверка не прошла бы никогда
+DEFAULT_PROBES = ["exec", "systemd", "route"]
+
+
+def register_probe(name: str, condition: str) -> None:
+    """Добавить проверку готовности (shell условие, код 0 — готово)."""
+    PROBES[name] = condition
+
+
+@dataclass
+class ReadinessResult:
+    """Результат ожидания готовности."""
+    ready: bool
+    attempts: int
+    elapsed: float
+    failed_probe: str = ""
+    message: str = ""
+
+
+def readiness_script(probes: list[str], dns_name: str = "deb.debian.org") -> str:
+    """Скрипт проверок: печатает ready или имя первой непрошедшей проверки."""
+    lines = ['probe() { if ! sh -c "$2" >/dev/null 2>&1; then echo "$1"; exit 1; fi; }']
+    for name in probes:
+        if name == "exec":
+            continue
+        condition = PROBES[name].replace("{dns_name}", shlex.quote(dns_name))
+        lines.append(f"probe {name} {shlex.quote(condition)}")
+    lines.append("echo ready")
+    return "\n".join(lines) + "\n"
+
+
+def wait_ready(
+    logger: Logger,
+    pve,
+    ctid: int,
+    probes: list[str] = None,
+    timeout: float = 60.0,
+    initial_delay: float = 0.05,
+    max_delay: float = 2.0,
+    dns_name: str = "deb.debian.org",
+    clock: Callable[[], float] = time.monotonic,
+    sleep: Callable[[float], None] = time.sleep
+) -> ReadinessResult:
+    """Ждать, пока все проверки probes пройдут, но не дольше timeout секунд.
+
+    probes=None — DEFAULT_PROBES, пустой список — не ждать.
+    """
+    probes = DEFAULT_PROBES if probes is None else probes
+    if not probes:
+        return ReadinessResult(ready=True, attempts=0, elapsed=0.0)
+    unknown = [name for name in probes if name not in PROBES]
+    if unknown:
+        raise ValueError(f"Unknown readiness probes: {', '.join(unknown)}")
+
+    script = readiness_script(probes, dns_name)
+    start = clock()
+    delay = initial_delay
+    attempts = 0
+    failed, message = "", ""
+
+    while True:
+        attempts += 1
+        result = pve.exec(ctid, ["sh", "-c", script])
+        output = result.stdout.strip()
+        if result.success and output.endswith("ready"):
+            elapsed = clock() - start
+            logger.debug(f"Container {ctid} ready in {elapsed:.2f}s ({attempts} attempts)")
+            return ReadinessResult(ready=True, attempts=attempts, elapsed=elapsed)
+
+        # Непустой вывод — имя проверки; иначе не выполнился сам pct exec
+        if output and output.splitlines()[-1] in PROBES:
+            failed, message = output.splitlines()[-1], ""
+        else:
+            failed, message = "exec", result.stderr.strip()
+        logger.debug(f"Container {ctid} not ready: {failed} (attempt {attempts})")
+
+        elapsed = clock() - start
+        if elapsed + delay > timeout:
+            return ReadinessResult(
+                ready=False, attempts=attempts, elapsed=elapsed,
+                failed_probe=failed, message=message
+            )
+        sleep(delay)
+        delay = min(delay * 2, max_delay)
@@ -0,0 +1,371 @@
+"""Локальный брокер SSH соединений (аналог OpenSSH ControlMaster).
+
+Брокер — фоновый процесс, который держит аутентифицированные SSH
+соединения к PVE хостам и выполняет команды по запросам CLI через
+Unix сокет. Каждый запуск pve-lxc переиспользует уже открытый транспорт
+вместо нового key exchange и аутентификации.
+
+Протокол: кадры JSON с 4-байтовым префиксом длины (big-endian).
+"""
+
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+import argparse
+import json
+import os
+import socket
+import socketserver
+import struct
+import subprocess
+import threading
+import time
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+from lib.exceptions import PVELXCError, ConnectionError, AuthenticationError
+
+
+DEFAULT_SOCKET = Path.home() / ".pve-lxc" / "ssh-broker.sock"
+DEFAULT_IDLE = 600
+
+
+class BrokerUnavailableError(PVELXCError):
+    """Брокер не запущен или не отвечает."""
+    pass
+
+
+def send_frame(sock: socket.socket, data: dict) -> None:
+    """Отправить JSON кадр."""
+    payload = json.dumps(data).encode()
+    sock.sendall(struct.pack(">I", len(payload)) + payload)
+
+
+def recv_frame(sock: socket.socket) -> Optional[dict]:
+    """Прочитать JSON кадр. None — соединение закрыто."""
+    header = _recv_exact(sock, 4)
+    if header is None:
+        return None
+    payload = _recv_exact(sock, struct.unpack(">I", header)[0])
+    if payload is None:
+        return None
+    return json.loads(payload)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> Optional[bytes]:
+    """Прочитать ровно size байт."""
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 65536))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+class BrokerClient:
+    """Клиент брокера SSH соединений."""
+
+    def __init__(self, socket_path: Path = None, timeout: float = None, connect_timeout: float = None):
+        self.socket_path = Path(socket_path or DEFAULT_SOCKET)
+        # timeout — на любую операцию с сокетом, connect_timeout — только на
+        # подключение к брокеру: долгие run и stream он не ограничивает
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+
+    def _connect(self) -> socket.socket:
+        """Подключиться к сокету брокера."""
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.settimeout(self.connect_timeout if self.connect_timeout is not None else self.timeout)
+            sock.connect(str(self.socket_path))
+            sock.settimeout(self.timeout)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def request(self, data: dict) -> dict:
+        """Отправить запрос и получить ответ."""
+        try:
+            sock = self._connect()
+        except OSError as e:
+            raise BrokerUnavailableError(f"SSH broker not available: {e}")
+
+        try:
+            send_frame(sock, data)
+            response = recv_frame(sock)
+        except OSError as e:
+            # Обрыв или таймаут ответа: брокер мог начать выполнение, повторять напрямую нельзя
+            raise ConnectionError(data.get("target", {}).get("host", "broker"), f"SSH broker: {e}")
+        finally:
+            sock.close()
+
+        if response is None:
+            raise BrokerUnavailableError("SSH broker closed connection")
+
+        # Ошибки подключения к хосту пробрасываем как есть
+        if response.get("error") == "auth":
+            raise AuthenticationError(data["target"]["host"], data["target"]["user"])
+        if response.get("error") == "connection":
+            raise ConnectionError(data["target"]["host"], response.get("message"))
+        if response.get("error"):
+            raise PVELXCError(response.get("message", "SSH broker error"))
+
+        return response
+
+    def stream(self, request: dict) -> Iterator[dict]:
+        """Отправить запрос и получать кадры вывода до кадра exit."""
+        try:
+            sock = self._connect()
+            send_frame(sock, request)
+        except OSError as e:
+            raise BrokerUnavailableError(f"SSH broker not available: {e}")
+
+        try:
+            while True:
+                try:
+                    frame = recv_frame(sock)
+                except OSError as e:
+                    raise ConnectionError(request["target"]["host"], f"SSH broker: {e}")
+                if frame is None:
+                    raise PVELXCError("SSH broker closed connection")
+                if frame.get("error") == "auth":
+                    raise AuthenticationError(request["target"]["host"], request["target"]["user"])
+                if frame.get("error") == "connection":
+                    raise ConnectionError(request["target"]["host"], frame.get("message"))
+                if frame.get("error"):
+                    raise PVELXCError(frame.get("message", "SSH broker error"))
+                yield frame
+                if frame.get("stream") == "exit":
+                    return
+        finally:
+            sock.close()
+
+    def is_running(self) -> bool:
+        """Проверить, что брокер запущен."""
+        try:
+            self.request({"op": "ping"})
+            return True
+        except PVELXCError:
+            return False
+
+    def start(self, idle_timeout: int = DEFAULT_IDLE, wait: float = 3.0) -> bool:
+        """Запустить брокер в фоне и дождаться готовности сокета."""
+        if self.is_running():
+            return True
+
+        subprocess.Popen(
+            [
+                sys.executable, "-m", "cli.core.ssh_broker",
+                "--socket", str(self.socket_path),
+                "--idle", str(idle_timeout),
+            ],
+            cwd=str(Path(__file__).parent.parent.parent),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+
+        deadline = time.monotonic() + wait
+        while time.monotonic() < deadline:
+            if self.is_running():
+                return True
+            time.sleep(0.05)
+        return False
+
+
+class _BrokerHandler(socketserver.BaseRequestHandler):
+    """Обработчик одного клиентского соединения."""
+
+    def handle(self) -> None:
+        request = recv_frame(self.request)
+        if request is None:
+            return
+
+        try:
+            if request.get("op") == "stream":
+                # Потоковый вывод: кадр на каждый фрагмент, последний — exit
+                for chunk in self.server.broker.stream(request):
+                    send_frame(self.request, chunk)
+                return
+            response = self.server.broker.handle(request)
+        except AuthenticationError as e:
+            response = {"error": "auth", "message": str(e)}
+        except ConnectionError as e:
+            response = {"error": "connection", "message": e.reason or str(e)}
+        except Exception as e:
+            response = {"error": "internal", "message": str(e)}
+
+        send_frame(self.request, response)
+
+
+class _BrokerServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class SSHBroker:
+    """Сервер брокера: пул SSH соединений с закрытием по простою."""
+
+    def __init__(self, socket_path: Path = None, idle_timeout: int = DEFAULT_IDLE):
+        self.socket_path = Path(socket_path or DEFAULT_SOCKET)
+        self.idle_timeout = idle_timeout
+        self._executors: dict[tuple, "SSHExecutor"] = {}
+        self._last_used: dict[tuple, float] = {}
+        # Число выполняющихся запросов на соединение: такие не закрываются по простою
+        self._in_flight: dict[tuple, int] = {}
+        self._lock = threading.Lock()
+        self._last_activity = time.monotonic()
+        self._server: Optional[_BrokerServer] = None
+
+    def _key(self, target: dict) -> tuple:
+        """Ключ соединения в пуле."""
+        # connect_timeout входит в ключ: соединение не наследует таймаут чужого запроса
+        return (
+            target["host"], target["user"], target["port"], target.get("key_path"),
+            target.get("compress", False), target.get("connect_timeout")
+        )
+
+    @contextmanager
+    def _acquire(self, target: dict):
+        """Соединение к хосту (из пула или новое) на время одного запроса."""
+        from cli.core.executor import SSHExecutor
+
+        key = self._key(target)
+        with self._lock:
+            executor = self._executors.get(key)
+            if executor is None:
+                executor = SSHExecutor(
+                    host=target["host"],
+                    user=target["user"],
+                    port=target["port"],
+                    key_path=Path(target["key_path"]) if target.get("key_path") else None,
+                    compress=target.get("compress", False),
+                    connect_timeout=target.get("connect_timeout")
+                )
+                self._executors[key] = executor
+            self._in_flight[key] = self._in_flight.get(key, 0) + 1
+            self._last_used[key] = time.monotonic()
+        try:
+            yield executor
+        finally:
+            with self._lock:
+                self._in_flight[key] -= 1
+                self._last_used[key] = time.monotonic()
+            self._last_activity = time.monotonic()
+
+    def handle(self, request: dict) -> dict:
+        """Выполнить запрос клиента."""
+        self._last_activity = time.monotonic()
+        op = request.get("op")
+
+        if op == "ping":
+            return {"ok": True}
+
+        if op == "status":
+            with self._lock:
+                hosts = [
+                    {"host": key[0], "user": key[1], "port": key[2],
+                     "idle": int(time.monotonic() - self._last_used[key])}
+                    for key in self._executors
+                ]
+            return {"ok": True, "pid": os.getpid(), "hosts": hosts}
+
+        if op == "shutdown":
+            threading.Thread(target=self._server.shutdown, daemon=True).start()
+            return {"ok": True}
+
+        if op not in ("run", "push_file", "read_file"):
+            return {"error": "internal", "message": f"Unknown operation: {op}"}
+
+        # Долгие run/push_file (pveam download, большие файлы) держат соединение
+        with self._acquire(request["target"]) as executor:
+            if op == "run":
+                result = executor.run(request["cmd"], check=request.get("check", True))
+                return {
+                    "ok": True,
+                    "returncode": result.returncode,
+                    "stdout": result.stdout,
+                    "stderr": result.stderr,
+                }
+
+            if op == "push_file":
+                # Брокер работает от того же пользователя и читает файл сам
+                ok = executor.push_file(Path(request["local_path"]), Path(request["remote_path"]))
+                return {"ok": ok}
+
+            return {"ok": True, "content": executor.read_file(Path(request["remote_path"]))}
+
+    def stream(self, request: dict) -> Iterator[dict]:
+        """Выполнить команду с потоковым выводом."""
+        self._last_activity = time.monotonic()
+        with self._acquire(request["target"]) as executor:
+            for chunk in executor.stream(request["cmd"]):
+                yield {"stream": chunk.stream, "data": chunk.data, "returncode": chunk.returncode}
+
+    def _reap(self, now: float) -> bool:
+        """Закрыть простаивающие соединения. True — брокеру пора завершиться."""
+        with self._lock:
+            for key in [
+                k for k, t in self._last_used.items()
+                if now - t > self.idle_timeout and not self._in_flight.get(k)
+            ]:
+                self._executors.pop(key).close()
+                del self._last_used[key]
+                self._in_flight.pop(key, None)
+            idle = not self._executors
+        return idle and now - self._last_activity > self.idle_timeout
+
+    def _reap_idle(self) -> None:
+        """Закрывать простаивающие соединения, завершиться при полном простое."""
+        interval = max(1, min(30, self.idle_timeout / 10))
+        while True:
+            time.sleep(interval)
+            if self._reap(time.monotonic()):
+                self._server.shutdown()
+                return
+
+    def serve(self) -> None:
+        """Запустить сервер (блокирующий вызов)."""
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Сокет от упавшего брокера
+        if self.socket_path.exists():
+            if BrokerClient(self.socket_path, timeout=1).is_running():
+                return
+            self.socket_path.unlink()
+
+        old_umask = os.umask(0o177)
+        try:
+            self._server = _BrokerServer(str(self.socket_path), _BrokerHandler)
+        finally:
+            os.umask(old_umask)
+        self._server.broker = self
+
+        threading.Thread(target=self._reap_idle, daemon=True).start()
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            with self._lock:
+                for executor in self._executors.values():
+                    executor.close()
+                self._executors.clear()
+            if self.socket_path.exists():
+                self.socket_path.unlink()
+
+
+def main() -> None:
+    """Точка входа фонового процесса брокера."""
+    parser = argparse.ArgumentParser(description="pve-lxc SSH connection broker")
+    parser.add_argument("--socket", default=str(DEFAULT_SOCKET))
+    parser.add_argument("--idle", type=int, default=DEFAULT_IDLE)
+    args = parser.parse_args()
+
+    SSHBroker(Path(args.socket), idle_timeout=args.idle).serve()
+
+
+if __name__ == "__main__":
+    main()
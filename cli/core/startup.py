@@ -0,0 +1,134 @@
+"""Профилирование времени запуска CLI.
+
+pve-lxc --profile-startup [аргументы команды] перезапускает CLI с
+python -X importtime и показывает, сколько стоил импорт каждого модуля.
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+import re
+import subprocess
+import sys
+import time
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+
+# Группы модулей в отчёте (по первому компоненту имени)
+GROUPS = ("typer", "click", "rich", "paramiko", "yaml", "apps", "cli", "lib")
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+@dataclass
+class ImportRecord:
+    """Время импорта одного модуля (микросекунды)."""
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+    @property
+    def group(self) -> str:
+        """Группа модуля для сводки."""
+        top = self.module.split(".")[0]
+        return top if top in GROUPS else "other"
+
+
+@dataclass
+class StartupProfile:
+    """Результат профилирования запуска."""
+    argv: list[str]
+    wall_time: float
+    returncode: int
+    imports: list[ImportRecord]
+
+    def by_group(self) -> dict[str, int]:
+        """Суммарное собственное время импорта по группам (мкс)."""
+        totals: dict[str, int] = {}
+        for record in self.imports:
+            totals[record.group] = totals.get(record.group, 0) + record.self_us
+        return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+    def slowest(self, count: int = 20) -> list[ImportRecord]:
+        """Модули с наибольшим собственным временем импорта."""
+        return sorted(self.imports, key=lambda r: -r.self_us)[:count]
+
+    def to_dict(self, count: int = 20) -> dict:
+        return {
+            "argv": self.argv,
+            "wall_time": round(self.wall_time, 4),
+            "import_time": round(sum(r.self_us for r in self.imports) / 1e6, 4),
+            "modules": len(self.imports),
+            "groups": {k: round(v / 1e6, 4) for k, v in self.by_group().items()},
+            "slowest": [
+                {"module": r.module, "self": round(r.self_us / 1e6, 4), "cumulative": round(r.cumulative_us / 1e6, 4)}
+                for r in self.slowest(count)
+            ],
+        }
+
+
+def parse_importtime(text: str) -> list[ImportRecord]:
+    """Разобрать вывод python -X importtime."""
+    records = []
+    for line in text.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            records.append(ImportRecord(module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return records
+
+
+def profile_startup(argv: list[str], prelude: str = None) -> StartupProfile:
+    """Запустить CLI в отдельном процессе с -X importtime.
+
+    prelude — код, выполняемый перед запуском CLI (например, подмена executor
+    в бенчмарках). Вывод команды отбрасывается.
+    """
+    if prelude:
+        cmd = [sys.executable, "-X", "importtime", "-c",
+               f"{prelude}\nimport sys\nsys.argv = ['pve-lxc'] + {argv!r}\n"
+               "from cli.main import run\nrun()"]
+    else:
+        cmd = [sys.executable, "-X", "importtime", "-m", "cli.main", *argv]
+
+    start = time.perf_counter()
+    result = subprocess.run(
+        cmd, cwd=PROJECT_ROOT, stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+    )
+    wall_time = time.perf_counter() - start
+    return StartupProfile(argv, wall_time, result.returncode, parse_importtime(result.stderr))
+
+
+def print_profile(profile: StartupProfile, json_output: bool = False, count: int = 20) -> None:
+    """Показать отчёт профилирования."""
+    if json_output:
+        import json
+        print(json.dumps(profile.to_dict(count), ensure_ascii=False))
+        return
+
+    from rich.console import Console
+    from rich.table import Table
+
+    console = Console()
+    groups = Table(title="Import time by package")
+    groups.add_column("Package", style="cyan")
+    groups.add_column("Time, ms", justify="right")
+    for group, total in profile.by_group().items():
+        groups.add_row(group, f"{total / 1000:.1f}")
+
+    modules = Table(title=f"Slowest {count} modules")
+    modules.add_column("Module", style="green")
+    modules.add_column("Self, ms", justify="right")
+    modules.add_column("Cumulative, ms", justify="right")
+    for record in profile.slowest(count):
+        modules.add_row(record.module, f"{record.self_us / 1000:.1f}", f"{record.cumulative_us / 1000:.1f}")
+
+    console.print(groups)
+    console.print(modules)
+    total = sum(r.self_us for r in profile.imports) / 1000
+    command = " ".join(profile.argv) or "(no command)"
+    console.print(
+        f"pve-lxc {command}: {profile.wall_time * 1000:.0f} ms wall, "
+        f"{total:.0f} ms in {len(profile.imports)} imports"
+    )
@@ -0,0 +1,168 @@
+"""Индекс шаблонов контейнеров.
+
+Имя шаблона PVE: <distro>-<release>-<variant>_<version>_<arch>.tar.<ext>,
+например debian-12-standard_12.7-1_amd64.tar.zst. Индекс разбирает имена
+один раз и отвечает на запросы вида "debian", "debian-12",
+"debian-12-standard" самой новой подходящей версией.
+"""
+
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional
+import re
+import threading
+
+_NAME_RE = re.compile(r"^(?P<name>[^_]+)_(?P<version>[^_]+)_(?P<arch>[^_.]+)\.tar\.\w+$")
+
+
+@dataclass(frozen=True)
+class TemplateInfo:
+    """Разобранное имя шаблона."""
+    volid: str        # local:vztmpl/debian-12-standard_12.7-1_amd64.tar.zst или имя файла
+    name: str         # debian-12-standard
+    distro: str       # debian
+    release: str      # 12
+    variant: str      # standard
+    version: str      # 12.7-1
+    arch: str         # amd64
+
+    @property
+    def filename(self) -> str:
+        return self.volid.split("/")[-1]
+
+    @property
+    def sort_key(self) -> tuple:
+        """Ключ сортировки: новее релиз, затем новее версия."""
+        return (version_key(self.release), version_key(self.version))
+
+
+def version_key(version: str) -> tuple:
+    """Ключ сравнения версий: числа сравниваются как числа (12.10 > 12.9)."""
+    return tuple(
+        (1, int(part), "") if part.isdigit() else (0, 0, part)
+        for part in re.findall(r"\d+|[a-z]+", version.lower())
+    )
+
+
+def parse_template(volid: str) -> Optional[TemplateInfo]:
+    """Разобрать volid или имя файла шаблона. None — имя не по формату PVE."""
+    filename = volid.split("/")[-1]
+    match = _NAME_RE.match(filename)
+    if not match:
+        return None
+
+    name = match.group("name")
+    parts = name.split("-")
+    distro = parts[0]
+    variant = parts[-1] if len(parts) > 1 else ""
+    release = "-".join(parts[1:-1])
+    return TemplateInfo(
+        volid=volid,
+        name=name,
+        distro=distro,
+        release=release,
+        variant=variant,
+        version=match.group("version"),
+        arch=match.group("arch"),
+    )
+
+
+class TemplateIndex:
+    """Индекс шаблонов одного хранилища (или списка pveam available)."""
+
+    def __init__(self, volids: Iterable[str]):
+        self.templates: list[TemplateInfo] = []
+        self._unparsed: list[str] = []
+        # (префикс имени по "-", arch) -> самый новый шаблон
+        self._best: dict[tuple[str, str], TemplateInfo] = {}
+
+        for volid in volids:
+            info = parse_template(volid)
+            if info is None:
+                self._unparsed.append(volid)
+                continue
+            self.templates.append(info)
+
+            parts = info.name.split("-")
+            for i in range(1, len(parts) + 1):
+                key = ("-".join(parts[:i]), info.arch)
+                current = self._best.get(key)
+                if current is None or info.sort_key > current.sort_key:
+                    self._best[key] = info
+
+    def __len__(self) -> int:
+        return len(self.templates) + len(self._unparsed)
+
+    def find(self, query: str, arch: str = "amd64") -> Optional[TemplateInfo]:
+        """Самый новый шаблон, имя которого начинается с query.
+
+        Запросы по границе "-" ("debian", "debian-12") отвечают из индекса;
+        произвольный префикс имени файла ищется перебором.
+        """
+        if info := self._best.get((query, arch)):
+            return info
+
+        matches = [
+            t for t in self.templates
+            if t.arch == arch and t.filename.startswith(query)
+        ]
+        return max(matches, key=lambda t: t.sort_key, default=None)
+
+    def find_volid(self, query: str, arch: str = "amd64") -> Optional[str]:
+        """volid самого нового подходящего шаблона (включая имена не по формату)."""
+        if info := self.find(query, arch):
+            return info.volid
+        for volid in self._unparsed:
+            if volid.split("/")[-1].startswith(query):
+                return volid
+        return None
+
+
+def parse_aplinfo(text: str) -> dict[str, str]:
+    """Контрольные суммы sha512 из индекса aplinfo: {имя файла: sha512}.
+
+    Индекс (/var/lib/pve-manager/apl-info/*) состоит из блоков "Ключ: значение",
+    разделённых пустой строкой; имя файла берётся из Location.
+    """
+    checksums = {}
+    for block in re.split(r"\n\s*\n", text):
+        fields = {}
+        for line in block.splitlines():
+            key, sep, value = line.partition(":")
+            if sep and not line[:1].isspace():
+                fields[key.strip().lower()] = value.strip()
+        if fields.get("location") and fields.get("sha512sum"):
+            checksums[fields["location"].split("/")[-1]] = fields["sha512sum"].lower()
+    return checksums
+
+
+# Скачивания, выполняющиеся в этом процессе: (хост, хранилище, файл) -> Future
+_inflight: dict[tuple, Future] = {}
+_inflight_lock = threading.Lock()
+
+
+def download_once(key: tuple, download: Callable[[], bool]) -> bool:
+    """Выполнить download, если такое же скачивание ещё не идёт.
+
+    Параллельные запросы с тем же ключом ждут результата первого вместо
+    повторного скачивания того же файла.
+    """
+    with _inflight_lock:
+        future = _inflight.get(key)
+        owner = future is None
+        if owner:
+            future = _inflight[key] = Future()
+
+    if not owner:
+        return future.result()
+
+    try:
+        result = download()
+        future.set_result(result)
+        return result
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
@@ -3,24 +3,34 @@
 import typer
 from typing import Optional
 
+import importlib
 import sys
 from pathlib import Path
 
 # Добавляем корень проекта в путь
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from cli.commands.create import create
-from cli.commands.destroy import destroy
-from cli.commands.bootstrap import bootstrap
-from cli.commands.ip import ip as free_ip
-from cli.commands.list import list_containers
-from cli.commands.apps import apps_command
-from cli.commands.deploy import deploy
-from cli.commands.host import host_app
-
-from rich.panel import Panel
-from rich.console import Console, Group
-from rich.text import Text
+# Команды импортируются лениво: при вызове конкретной команды загружается
+# только её модуль, все модули — только для общего --help
+COMMANDS = {
+    "create": ("cli.commands.create", "create"),
+    "destroy": ("cli.commands.destroy", "destroy"),
+    "bootstrap": ("cli.commands.bootstrap", "bootstrap"),
+    "free-ip": ("cli.commands.ip", "ip"),
+    "list": ("cli.commands.list", "list_containers"),
+    "apps": ("cli.commands.apps", "apps_command"),
+    "deploy": ("cli.commands.deploy", "deploy"),
+    "fleet": ("cli.commands.fleet", "fleet"),
+}
+GROUPS = {
+    "host": ("cli.commands.host", "host_app"),
+    "templates": ("cli.commands.templates", "templates_app"),
+    "golden": ("cli.commands.golden", "golden_app"),
+    "cache": ("cli.commands.cache", "cache_app"),
+}
+
+# Глобальные опции со значением (значение не является именем команды)
+OPTIONS_WITH_VALUE = {"--host", "-H"}
 
 SAMPLES_TEXT = """\
 [dim]# Создание контейнера на локальном хосте[/]
@@ -38,12 +48,25 @@ pve-lxc create -n mycontainer --bootstrap --app docker
 [dim]# Создание с автоматическим выбором свободного IP[/]
 pve-lxc create -n mycontainer --ip 192.168.1.21-50
 
+[dim]# Собрать golden-образ и создать из него контейнер за секунды[/]
+pve-lxc golden build --app docker
+pve-lxc create -n docker1 --from-golden docker
+
 [dim]# Найти свободные IP в диапазоне[/]
 pve-lxc free-ip 192.168.1.21-50
 
 [dim]# Установить приложение в существующий контейнер[/]
 pve-lxc deploy -c mycontainer -a docker
 
+[dim]# Развернуть приложения по манифесту на нескольких хостах[/]
+pve-lxc fleet rollout.yaml --workers 16 --per-host 4
+
+[dim]# Развернуть кэш APT и подключить его ко всем установкам[/]
+pve-lxc cache apt --ip 192.168.1.5
+
+[dim]# Заранее скачать шаблон на все хосты[/]
+pve-lxc templates prefetch debian-12-standard --all-hosts
+
 [dim]# Добавить хост в SSH config[/]
 pve-lxc host add mycontainer\
 """
@@ -61,14 +84,19 @@ def main(
     verbose: bool = typer.Option(False, "--verbose", "-v", help="Подробный вывод"),
     json_output: bool = typer.Option(False, "--json", help="Вывод в JSON формате"),
     host: Optional[str] = typer.Option(None, "--host", "-H", help="PVE хост для подключения"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Не использовать кэш метаданных хоста"),
 ):
     """pve-lxc - CLI для управления LXC контейнерами в Proxmox VE."""
     ctx.ensure_object(dict)
     ctx.obj["verbose"] = verbose
     ctx.obj["json_output"] = json_output
     ctx.obj["host"] = host
+    ctx.obj["no_cache"] = no_cache
     
     if ctx.invoked_subcommand is None:
+        from rich.panel import Panel
+        from rich.console import Console
+        
         # Показываем стандартный help
         typer.echo(ctx.get_help())
         # Добавляем панель Samples
@@ -77,19 +105,50 @@ def main(
         console.print(Panel(SAMPLES_TEXT, title="Samples", title_align="left", border_style="dim"))
 
 
-# Регистрация команд
-app.command("create")(create)
-app.command("destroy")(destroy)
-app.command("bootstrap")(bootstrap)
-app.command("free-ip")(free_ip)
-app.command("list")(list_containers)
-app.command("apps")(apps_command)
-app.command("deploy")(deploy)
-app.add_typer(host_app, name="host")
+def requested_command(argv: list[str]) -> Optional[str]:
+    """Имя вызываемой команды из аргументов (None — команда не указана)."""
+    skip_value = False
+    for arg in argv:
+        if skip_value:
+            skip_value = False
+            continue
+        if arg in OPTIONS_WITH_VALUE:
+            skip_value = True
+            continue
+        if arg.startswith("-"):
+            continue
+        return arg
+    return None
+
+
+def register_commands(argv: list[str] = None) -> None:
+    """Зарегистрировать команды: только вызываемую или все (для --help)."""
+    name = requested_command(sys.argv[1:] if argv is None else argv)
+    
+    if name in COMMANDS or name in GROUPS:
+        names = [name]
+    else:
+        names = list(COMMANDS) + list(GROUPS)
+    
+    for name in names:
+        if name in COMMANDS:
+            module, attr = COMMANDS[name]
+            app.command(name)(getattr(importlib.import_module(module), attr))
+        else:
+            module, attr = GROUPS[name]
+            app.add_typer(getattr(importlib.import_module(module), attr), name=name)
 
 
 def run():
     """Запуск CLI."""
+    if "--profile-startup" in sys.argv[1:]:
+        # Обрабатывается до typer: профилируется отдельный запуск CLI
+        from cli.core.startup import profile_startup, print_profile
+        argv = [arg for arg in sys.argv[1:] if arg != "--profile-startup"]
+        print_profile(profile_startup(argv), json_output="--json" in argv)
+        return
+    
+    register_commands()
     app()
 
 
@@ -32,6 +32,19 @@ class ConfigLoader:
             "timezone": "UTC",
             "packages": ["curl", "wget", "git", "vim", "htop"],
         },
+        "apt": {
+            # URL apt-cacher-ng (pve-lxc cache apt), например http://192.168.1.30:3142
+            "proxy": None,
+            # apt-get update пропускается, если списки обновлялись раньше (секунды)
+            # и sources.list не менялся; 0 — обновлять всегда
+            "lists_max_age": 3600,
+        },
+        "readiness": {
+            "timeout": 60,
+            # dns (getent hosts dns_name) — по запросу: в изолированной сети не пройдёт
+            "probes": ["exec", "systemd", "route"],
+            "dns_name": "deb.debian.org",
+        },
         "logging": {
             "level": "INFO",
             "json": False,
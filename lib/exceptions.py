@@ -55,3 +55,8 @@ class AuthenticationError(PVELXCError):
             f"Authentication failed for {user}@{host}. "
             "Check SSH key or password."
         )
+
+
+class DeployError(PVELXCError):
+    """Ошибка развёртывания приложения до запуска установщика."""
+    pass
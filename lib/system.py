@@ -2,10 +2,16 @@
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
+import hashlib
+import posixpath
+import re
+import shlex
+import shutil
 import subprocess
 
 from .logger import Logger
+from .timing import Timings
 
 
 @dataclass
@@ -20,15 +26,223 @@ class CommandResult:
         return self.returncode == 0
 
 
+def hash_tree(root: Path) -> dict[str, str]:
+    """SHA-256 всех файлов директории: {относительный путь: hex}."""
+    hashes = {}
+    for path in sorted(Path(root).rglob("*")):
+        if path.is_file() and not path.is_symlink():
+            digest = hashlib.sha256()
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(block)
+            hashes[path.relative_to(root).as_posix()] = digest.hexdigest()
+    return hashes
+
+
+# Настройка APT прокси (apt-cacher-ng), которую добавляет pve-lxc
+APT_PROXY_CONF = "/etc/apt/apt.conf.d/01pve-lxc-proxy"
+
+
+def apt_proxy_script(url: Optional[str]) -> str:
+    """Shell команда, задающая APT прокси (url=None — удаляющая настройку).
+
+    Через прокси идёт только http: https репозитории apt-cacher-ng не кэширует.
+    """
+    if not url:
+        return f"rm -f {APT_PROXY_CONF}"
+    content = f'Acquire::http::Proxy "{url}";\nAcquire::https::Proxy "DIRECT";\n'
+    return f"mkdir -p {posixpath.dirname(APT_PROXY_CONF)} && printf '%s' {shlex.quote(content)} > {APT_PROXY_CONF}"
+
+
+# Отпечаток sources.list на момент последнего apt-get update через pve-lxc;
+# время изменения файла — время обновления списков
+APT_LISTS_STATE = "/var/lib/pve-lxc/apt-lists"
+APT_LISTS_DIR = "/var/lib/apt/lists"
+APT_SOURCES = ["/etc/apt/sources.list", "/etc/apt/sources.list.d/*"]
+APT_LISTS_MAX_AGE = 3600
+APT_LISTS_FRESH = "pve-lxc: package lists are up to date"
+
+
+def apt_update_script(max_age: int = APT_LISTS_MAX_AGE) -> str:
+    """Shell скрипт apt-get update, пропускающий обновление свежих списков.
+
+    Списки свежие, если с обновления прошло меньше max_age секунд, файлы
+    sources.list(.d) с тех пор не менялись (например, не добавлен репозиторий)
+    и сами списки на месте (их удаляют apt-get clean и запечатывание golden).
+    """
+    state = APT_LISTS_STATE
+    return (
+        f"sources=$(cat {' '.join(APT_SOURCES)} 2>/dev/null | cksum); "
+        f'if [ "$(cat {state} 2>/dev/null)" = "$sources" ] && '
+        f"ls {APT_LISTS_DIR}/*_Packages >/dev/null 2>&1 && "
+        f"[ $(( $(date +%s) - $(stat -c %Y {state}) )) -lt {int(max_age)} ]; "
+        f"then echo '{APT_LISTS_FRESH}'; exit 0; fi; "
+        f'apt-get update -qq && mkdir -p {posixpath.dirname(state)} && echo "$sources" > {state}'
+    )
+
+
+# Команды, которым не нужны пакеты из очереди apt: утилиты базовой системы и
+# загрузчики (если curl сам стоит в очереди, команду выдаёт упоминание пакета)
+APT_INDEPENDENT_COMMANDS = frozenset({
+    "cat", "chmod", "chown", "cp", "curl", "dpkg-query", "echo", "getent", "grep", "groupadd",
+    "gzip", "id", "install", "ln", "ls", "mkdir", "mv", "printf", "rm", "sed", "tar", "tee",
+    "test", "touch", "true", "unzip", "useradd", "usermod", "wget",
+})
+# Загрузчикам по https нужен ca-certificates, если он стоит в очереди
+APT_FETCH_COMMANDS = frozenset({"curl", "wget"})
+_SHELL_SEPARATORS = {";", "&&", "||", "|", "&", "(", ")"}
+
+
+def _command_words(cmd) -> Optional[tuple[list[str], list[str]]]:
+    """Программы и все слова команды; для sh -c разбирается скрипт.
+
+    None — скрипт не разобрать надёжно (несколько строк, подстановка команд).
+    """
+    if isinstance(cmd, str):
+        return None
+    if len(cmd) >= 3 and posixpath.basename(cmd[0]) in ("sh", "bash") and cmd[1] == "-c":
+        script = cmd[2]
+        if "\n" in script or "$(" in script or "`" in script:
+            return None
+        try:
+            lexer = shlex.shlex(script, posix=True, punctuation_chars=True)
+            lexer.whitespace_split = True
+            words = list(lexer)
+        except ValueError:
+            return None
+        programs = [word for i, word in enumerate(words) if i == 0 or words[i - 1] in _SHELL_SEPARATORS]
+        return [p for p in programs if p not in _SHELL_SEPARATORS], words
+    return list(cmd[:1]), list(cmd)
+
+
+def _package_stem(package: str) -> str:
+    """Часть имени пакета, по которой его узнают в команде (gitlab-ce -> gitlab)."""
+    stem = re.split(r"[-.:]", package)[0]
+    return stem if len(stem) >= 3 else package
+
+
+class AptTransactions:
+    """Операции apt без лишних запусков apt-get и dpkg.
+
+    apt_install ставит пакеты в очередь, и они устанавливаются одной
+    транзакцией при flush. Владелец вызывает barrier перед любой другой
+    командой: очередь устанавливается, только если команда может от неё
+    зависеть (см. needs_queue), поэтому подготовительные команды между
+    apt_install не дробят транзакцию. apt_update пропускается, если списки
+    свежие.
+    """
+
+    def __init__(self, run: Callable[..., CommandResult], logger: Logger, max_age: int = APT_LISTS_MAX_AGE):
+        self._run = run
+        self.logger = logger
+        self.max_age = max_age
+        self.queue: list[str] = []
+        # Списки обновлены, и после этого не выполнялось ни одной команды
+        self._fresh = False
+
+    def update(self) -> CommandResult:
+        """Обновить списки пакетов, если они устарели."""
+        if self._fresh:
+            self.logger.debug("Package lists are up to date, skipping apt-get update")
+            return CommandResult(0, "", "")
+        self.logger.info("Updating package lists")
+        result = self._run(["sh", "-c", apt_update_script(self.max_age)])
+        if APT_LISTS_FRESH in result.stdout:
+            self.logger.debug("Package lists are up to date, skipping apt-get update")
+        self._fresh = result.success
+        return result
+
+    def install(self, packages: list[str]) -> CommandResult:
+        """Добавить пакеты в очередь установки."""
+        self.queue.extend(package for package in packages if package not in self.queue)
+        self.logger.debug(f"Queued packages: {', '.join(packages)}")
+        return CommandResult(0, "", "")
+
+    def flush(self) -> CommandResult:
+        """Установить пакеты из очереди одной транзакцией."""
+        if not self.queue:
+            return CommandResult(0, "", "")
+        packages, self.queue = self.queue, []
+        # Пакет может добавить свой репозиторий в sources.list.d
+        self._fresh = False
+        self.logger.info(f"Installing packages: {', '.join(packages)}")
+        return self._run(["apt-get", "install", "-y", "-qq"] + packages)
+
+    def barrier(self, cmd: Optional[list[str]] = None) -> None:
+        """Перед командой cmd: установить очередь, если команде она может быть нужна.
+
+        cmd=None — команда неизвестна, очередь устанавливается. Списки пакетов
+        после любой команды снова проверяются: она могла добавить репозиторий.
+        """
+        if self.queue and (cmd is None or self.needs_queue(cmd)):
+            self.flush()
+        self._fresh = False
+
+    def needs_queue(self, cmd: list[str]) -> bool:
+        """Может ли команда зависеть от пакетов из очереди.
+
+        Не зависит команда (или каждая команда sh -c скрипта) из
+        APT_INDEPENDENT_COMMANDS, которая не упоминает ещё не установленный
+        пакет из очереди: curl для очереди с curl, /etc/nginx для nginx.
+        """
+        parsed = _command_words(cmd)
+        if parsed is None:
+            return True
+        programs, words = parsed
+        if any(posixpath.basename(program) not in APT_INDEPENDENT_COMMANDS for program in programs):
+            return True
+        mentioned = [
+            package for package in self.queue
+            if any(_package_stem(package) in word for word in words)
+        ]
+        if "ca-certificates" in self.queue and any(posixpath.basename(p) in APT_FETCH_COMMANDS for p in programs):
+            mentioned.append("ca-certificates")
+        if not mentioned:
+            return False
+        # Упомянутые пакеты могут быть уже установлены (curl из bootstrap)
+        return bool(set(mentioned) - self._installed(mentioned))
+
+    def _installed(self, packages: list[str]) -> set[str]:
+        """Установленные пакеты из списка (один вызов dpkg-query)."""
+        result = self._run(
+            ["dpkg-query", "-W", "--showformat=${Package} ${Status}\\n", *packages], check=False
+        )
+        return {
+            line.split()[0] for line in result.stdout.splitlines()
+            if line.endswith("install ok installed")
+        }
+        self._fresh = False
+
+
+@dataclass
+class SyncResult:
+    """Результат синхронизации директории."""
+    success: bool
+    transferred: list[str]
+    unchanged: int
+    deleted: list[str]
+
+
 class System:
     """Обёртка над системными операциями."""
 
-    def __init__(self, logger: Logger):
+    def __init__(self, logger: Logger, apt_lists_max_age: int = APT_LISTS_MAX_AGE):
         self.logger = logger
+        self.apt = AptTransactions(self._run, logger, apt_lists_max_age)
+        # Замеры команд; фазы размечает AppInstaller
+        self.timings = Timings()
+        # Команды с check=True, завершившиеся ошибкой (фаза с ними не checkpoint)
+        self.failed_commands: list[str] = []
 
     def run(self, cmd: list[str], check: bool = True, capture: bool = True) -> CommandResult:
-        """Выполнить команду."""
+        """Выполнить команду (после установки нужных ей пакетов из очереди apt)."""
+        self.apt.barrier(cmd)
+        return self._run(cmd, check, capture)
+
+    def _run(self, cmd: list[str], check: bool = True, capture: bool = True) -> CommandResult:
+        """Выполнить команду, не трогая очередь apt."""
         self.logger.debug(f"Running: {' '.join(cmd)}")
+        start = self.timings.clock()
         
         try:
             result = subprocess.run(
@@ -45,22 +259,28 @@ class System:
             
             if check and not cmd_result.success:
                 self.logger.error(f"Command failed: {' '.join(cmd)}", stderr=cmd_result.stderr)
-            
-            return cmd_result
+                self.failed_commands.append(" ".join(cmd))
         except Exception as e:
             self.logger.error(f"Command error: {e}")
-            return CommandResult(returncode=1, stdout="", stderr=str(e))
+            cmd_result = CommandResult(returncode=1, stdout="", stderr=str(e))
+            if check:
+                self.failed_commands.append(" ".join(cmd))
+        
+        output_bytes = len(cmd_result.stdout.encode()) + len(cmd_result.stderr.encode())
+        self.timings.command(cmd, start, cmd_result.returncode, output_bytes)
+        return cmd_result
 
     def apt_update(self) -> CommandResult:
-        """Обновить списки пакетов."""
-        self.logger.step("Updating package lists")
-        return self.run(["apt-get", "update", "-qq"])
+        """Обновить списки пакетов (пропускается, если они свежие)."""
+        return self.apt.update()
 
     def apt_install(self, packages: list[str]) -> CommandResult:
-        """Установить пакеты."""
-        self.logger.step(f"Installing packages: {', '.join(packages)}")
-        cmd = ["apt-get", "install", "-y", "-qq"] + packages
-        return self.run(cmd)
+        """Поставить пакеты в очередь: они устанавливаются перед следующей командой."""
+        return self.apt.install(packages)
+
+    def apt_flush(self) -> CommandResult:
+        """Установить пакеты из очереди."""
+        return self.apt.flush()
 
     def systemctl(self, action: str, service: str) -> CommandResult:
         """Управление systemd сервисом."""
@@ -69,6 +289,7 @@ class System:
 
     def write_file(self, path: Path, content: str, mode: int = 0o644) -> None:
         """Записать файл."""
+        self.apt.barrier(["tee", str(path)])
         self.logger.debug(f"Writing file: {path}")
         path.parent.mkdir(parents=True, exist_ok=True)
         path.write_text(content)
@@ -76,13 +297,35 @@ class System:
 
     def read_file(self, path: Path) -> str:
         """Прочитать файл."""
+        self.apt.barrier(["cat", str(path)])
         return path.read_text()
 
     def file_exists(self, path: Path) -> bool:
         """Проверить существование файла."""
+        self.apt.barrier(["test", "-e", str(path)])
         return path.exists()
 
     def mkdir(self, path: Path, mode: int = 0o755) -> None:
         """Создать директорию."""
+        self.apt.barrier(["mkdir", str(path)])
         path.mkdir(parents=True, exist_ok=True)
         path.chmod(mode)
+
+    def sync(self, local_dir: Path, remote_dir: Path, delete: bool = False) -> SyncResult:
+        """Синхронизировать директорию: копируются только изменённые файлы."""
+        self.apt.barrier(["cp", str(local_dir), str(remote_dir)])
+        local = hash_tree(local_dir)
+        existing = hash_tree(remote_dir) if remote_dir.exists() else {}
+        changed = [name for name, digest in local.items() if existing.get(name) != digest]
+        
+        for name in changed:
+            target = remote_dir / name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(local_dir / name, target)
+        
+        deleted = sorted(set(existing) - set(local)) if delete else []
+        for name in deleted:
+            (remote_dir / name).unlink()
+        
+        self.logger.debug(f"Synced {local_dir} -> {remote_dir}: {len(changed)} changed, {len(deleted)} deleted")
+        return SyncResult(True, changed, len(local) - len(changed), deleted)
@@ -0,0 +1,89 @@
+"""Замеры времени установки: фаза -> команда -> длительность."""
+
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, Optional
+import time
+
+
+@dataclass
+class CommandSpan:
+    """Замер одной команды."""
+    command: str
+    duration: float
+    returncode: int
+    output_bytes: int
+
+    def to_dict(self) -> dict:
+        return {
+            "command": self.command,
+            "duration": round(self.duration, 3),
+            "returncode": self.returncode,
+            "output_bytes": self.output_bytes,
+        }
+
+
+@dataclass
+class PhaseSpan:
+    """Замер фазы установки и выполненных в ней команд."""
+    name: str
+    duration: float = 0.0
+    commands: list[CommandSpan] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "duration": round(self.duration, 3),
+            "commands": [command.to_dict() for command in self.commands],
+        }
+
+
+class Timings:
+    """Замеры фаз и команд одной установки.
+
+    Команда записывается в текущую фазу, команды вне фаз (например, запись
+    APT прокси) — отдельным списком.
+    """
+
+    # Длинные sh -c скрипты обрезаются до этой длины
+    COMMAND_WIDTH = 200
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.phases: list[PhaseSpan] = []
+        self.commands: list[CommandSpan] = []
+        self._current: Optional[PhaseSpan] = None
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[PhaseSpan]:
+        """Замерить фазу: команды внутри блока попадают в неё."""
+        span = PhaseSpan(name)
+        self.phases.append(span)
+        previous, self._current = self._current, span
+        start = self.clock()
+        try:
+            yield span
+        finally:
+            span.duration = self.clock() - start
+            self._current = previous
+
+    def command(self, cmd: list[str], start: float, returncode: int, output_bytes: int) -> CommandSpan:
+        """Записать команду, начатую в момент start (по self.clock)."""
+        text = " ".join(cmd)
+        if len(text) > self.COMMAND_WIDTH:
+            text = text[:self.COMMAND_WIDTH - 3] + "..."
+        span = CommandSpan(text, self.clock() - start, returncode, output_bytes)
+        (self._current.commands if self._current else self.commands).append(span)
+        return span
+
+    @property
+    def total(self) -> float:
+        """Общее время: фазы и команды вне фаз."""
+        return sum(phase.duration for phase in self.phases) + sum(c.duration for c in self.commands)
+
+    def to_dict(self) -> dict:
+        return {
+            "total": round(self.total, 3),
+            "phases": [phase.to_dict() for phase in self.phases],
+            "commands": [command.to_dict() for command in self.commands],
+        }
@@ -136,3 +136,205 @@ def test_install_result_failure_has_log_path():
     
     assert not result.success
     assert result.log_path is not None
+
+
+# **Feature: lazy-registry, Property 1: Индекс приложений совпадает с установщиками**
+def test_app_index_is_up_to_date():
+    """apps/index.json соответствует метаданным установщиков (python -m apps.registry)."""
+    import json
+    from apps.registry import INDEX_PATH, build_index
+    
+    assert json.loads(INDEX_PATH.read_text()) == build_index()
+
+
+# **Feature: lazy-registry, Property 2: Выбор команды не зависит от глобальных опций**
+@settings(max_examples=50)
+@given(
+    host=st.text(min_size=1, max_size=10, alphabet=st.characters(whitelist_categories=('L', 'N'))),
+    flags=st.lists(st.sampled_from(["-v", "--verbose", "--json"]), max_size=3),
+    command=st.sampled_from(["list", "deploy", "host", "fleet"])
+)
+def test_requested_command_skips_options(host, flags, command):
+    """Значение --host не принимается за имя команды."""
+    from cli.main import requested_command
+    
+    assert requested_command(flags + ["--host", host, command, "--help"]) == command
+    assert requested_command(flags) is None
+
+
+def test_pre_install_installs_only_missing_packages():
+    """Базовый pre_install ставит только пакеты, которых нет по dpkg-query."""
+    from unittest.mock import MagicMock
+    from lib.system import CommandResult
+
+    class PackagesInstaller(MockInstaller):
+        packages = ["curl", "jq", "gnupg"]
+        pre_install = AppInstaller.pre_install
+
+    system = MagicMock()
+    system.run.return_value = CommandResult(
+        1, "curl install ok installed\ngnupg deinstall ok config-files\n", "dpkg-query: no packages found matching jq"
+    )
+    installer = PackagesInstaller(Logger(json_output=True), system, {})
+    installer.pre_install()
+
+    system.apt_update.assert_called_once()
+    system.apt_install.assert_called_once_with(["jq", "gnupg"])
+
+    system.reset_mock()
+    system.run.return_value = CommandResult(0, "".join(f"{p} install ok installed\n" for p in installer.packages), "")
+    installer.pre_install()
+    system.apt_update.assert_not_called()
+
+
+def test_run_records_phase_and_command_timings(tmp_path, monkeypatch):
+    """run размечает фазы, команды system попадают в текущую фазу, замеры сохраняются."""
+    import json
+
+    class CommandsInstaller(MockInstaller):
+        def install(self):
+            self.system.run(["sh", "-c", "printf 12345"])
+            self.system.run(["false"], check=False)
+
+    monkeypatch.setattr(AppInstaller, "LOG_DIR", tmp_path)
+    installer = CommandsInstaller(Logger(json_output=True), System(Logger(json_output=True)), {"param1": "x"})
+    assert installer.run().success
+
+    timings = installer.timings.to_dict()
+    assert [phase["name"] for phase in timings["phases"]] == [
+        "validate", "pre_install", "install", "post_install", "configure"
+    ]
+    install = timings["phases"][2]
+    assert [(c["command"], c["returncode"], c["output_bytes"]) for c in install["commands"]] == [
+        ("sh -c printf 12345", 0, 5), ("false", 1, 0)
+    ]
+    assert timings["total"] >= sum(c["duration"] for c in install["commands"])
+    assert json.loads((tmp_path / "test-timings.json").read_text()) == timings
+
+
+class FlakyInstaller(MockInstaller):
+    """Установщик, падающий в фазе fail_in; шаги install отмечаются checkpoint."""
+
+    checkpoint_attrs = ["secret"]
+
+    def __init__(self, logger, system, config, fail_in=None):
+        super().__init__(logger, system, config)
+        self.fail_in = fail_in
+        self.steps = []
+
+    def _phase(self, phase):
+        self.call_order.append(phase)
+        if phase == self.fail_in:
+            raise RuntimeError(f"{phase} failed")
+
+    def pre_install(self):
+        self._phase("pre_install")
+
+    def install(self):
+        for step in ("download", "unpack"):
+            if not self.passed_checkpoint(step):
+                self.steps.append(step)
+                self.checkpoint(step)
+        self.secret = "generated"
+        self._phase("install")
+
+    def post_install(self):
+        self._phase("post_install")
+
+    def configure(self):
+        self._phase("configure")
+
+
+# **Feature: checkpoints, Property 1: resume выполняет только незавершённые фазы**
+@settings(max_examples=20)
+@given(fail_in=st.sampled_from(["pre_install", "install", "post_install", "configure"]),
+       changed=st.booleans())
+def test_resume_skips_completed_phases(fail_in, changed):
+    """После ошибки в фазе resume начинает с неё, а при смене параметров — сначала."""
+    import tempfile
+    import apps.base as base_module
+
+    phases = ["pre_install", "install", "post_install", "configure"]
+    logger = Logger(json_output=True)
+    with tempfile.TemporaryDirectory() as tmp:
+        original, base_module.CHECKPOINT_DIR = base_module.CHECKPOINT_DIR, tmp
+        try:
+            first = FlakyInstaller(logger, System(logger), {"param1": "x"}, fail_in=fail_in)
+            assert not first.run().success
+
+            config = {"param1": "y" if changed else "x"}
+            second = FlakyInstaller(logger, System(logger), config)
+            assert second.run(resume=True).success
+        finally:
+            base_module.CHECKPOINT_DIR = original
+
+    expected = phases if changed else phases[phases.index(fail_in):]
+    assert second.call_order == ["validate"] + expected + ["get_result"]
+    # Шаги install, отмеченные до ошибки, не повторяются
+    assert second.steps == ([] if fail_in != "pre_install" and not changed else ["download", "unpack"])
+    assert second.secret == "generated"
+
+
+def test_run_without_resume_resets_checkpoints(tmp_path, monkeypatch):
+    """Запуск без resume начинает заново, даже если прошлый завершился."""
+    import apps.base as base_module
+
+    monkeypatch.setattr(base_module, "CHECKPOINT_DIR", str(tmp_path))
+    logger = Logger(json_output=True)
+    assert FlakyInstaller(logger, System(logger), {"param1": "x"}).run().success
+    assert FlakyInstaller(logger, System(logger), {"param1": "x"}, fail_in="pre_install").run().success is False
+
+    resumed = FlakyInstaller(logger, System(logger), {"param1": "x"})
+    assert resumed.run(resume=True).success
+    assert resumed.call_order[1] == "pre_install"
+
+
+def test_trailing_apt_install_is_timed_in_its_phase(tmp_path, monkeypatch):
+    """apt_install в конце фазы выполняется внутри её замера, а не на следующей команде."""
+    import apps.base as base_module
+
+    class TrailingInstall(MockInstaller):
+        def install(self):
+            self.system.apt_install(["gitlab-runner"])
+
+    class RecordingSystem(System):
+        def _run(self, cmd, check=True, capture=True):
+            self.timings.command(cmd, self.timings.clock(), 0, 0)
+            return CommandResult(0, "", "")
+
+    from lib.system import CommandResult
+    monkeypatch.setattr(base_module, "CHECKPOINT_DIR", str(tmp_path))
+    monkeypatch.setattr(AppInstaller, "LOG_DIR", tmp_path)
+    installer = TrailingInstall(Logger(json_output=True), RecordingSystem(Logger(json_output=True)), {"param1": "x"})
+    assert installer.run().success
+
+    install = next(phase for phase in installer.timings.phases if phase.name == "install")
+    assert [c.command for c in install.commands] == ["apt-get install -y -qq gitlab-runner"]
+
+
+def test_phase_with_failed_command_is_not_checkpointed(tmp_path, monkeypatch):
+    """Фаза с упавшей командой (check=True) при resume выполняется заново; секреты не в командах."""
+    import json
+    import apps.base as base_module
+
+    class NetworkFailure(FlakyInstaller):
+        def install(self):
+            super().install()
+            self.system.run(["false"])
+
+    monkeypatch.setattr(base_module, "CHECKPOINT_DIR", str(tmp_path))
+    monkeypatch.setattr(AppInstaller, "LOG_DIR", tmp_path)
+    logger = Logger(json_output=True)
+    first = NetworkFailure(logger, System(logger), {"param1": "x"})
+    first.secret = "s3cr3t"
+    assert first.run().success
+
+    state = json.loads((tmp_path / "test.json").read_text())
+    assert state["phases"] == ["pre_install"]
+    assert (tmp_path / "test.json").stat().st_mode & 0o777 == 0o600
+    commands = json.dumps(first.timings.to_dict())
+    assert "s3cr3t" not in commands and "generated" not in commands
+
+    resumed = FlakyInstaller(logger, System(logger), {"param1": "x"})
+    assert resumed.run(resume=True).success
+    assert resumed.call_order == ["validate", "install", "post_install", "configure", "get_result"]
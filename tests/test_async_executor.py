@@ -0,0 +1,123 @@
+"""Property-based tests для асинхронных executor."""
+
+import asyncio
+import json
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from hypothesis import given, strategies as st, settings
+
+sys.path.insert(0, ".")
+from cli.core.async_executor import AsyncCommandExecutor, AsyncLocalExecutor, AsyncSSHExecutor
+from cli.core.async_pve import AsyncPVE
+from cli.core.executor import LocalExecutor
+from cli.core.pve import PVE
+from lib.logger import Logger
+from lib.system import CommandResult
+from tests.test_pve import FakeExecutor, make_config
+
+
+class AsyncFakeExecutor(AsyncCommandExecutor):
+    """Асинхронная обёртка над FakeExecutor."""
+
+    def __init__(self, executor: FakeExecutor):
+        self.executor = executor
+
+    async def run(self, cmd: list[str], check: bool = True) -> CommandResult:
+        await asyncio.sleep(0)
+        return self.executor.run(cmd, check)
+
+    async def push_file(self, local_path: Path, remote_path: Path) -> bool:
+        return True
+
+    async def read_file(self, remote_path: Path) -> str:
+        return ""
+
+    async def close(self) -> None:
+        pass
+
+
+# **Feature: async-executor, Property 1: AsyncLocalExecutor совпадает с LocalExecutor**
+@settings(max_examples=30, deadline=None)
+@given(
+    text=st.text(max_size=100, alphabet=st.characters(
+        whitelist_categories=('L', 'N', 'P', 'S', 'Zs'),
+        blacklist_characters='\x00'
+    )),
+    code=st.integers(min_value=0, max_value=255)
+)
+def test_async_local_matches_local(text, code):
+    """stdout, stderr и exit code совпадают с синхронным executor."""
+    cmd = ["bash", "-c", 'printf "%s" "$1"; printf "%s" "$1" >&2; exit $2', "_", text, str(code)]
+    assert asyncio.run(AsyncLocalExecutor().run(cmd)) == LocalExecutor().run(cmd)
+
+
+# **Feature: async-executor, Property 2: AsyncPVE разбирает ответы так же, как PVE**
+@settings(max_examples=30)
+@given(ctids=st.lists(st.integers(min_value=100, max_value=9999), max_size=20, unique=True))
+def test_async_pve_matches_pve(ctids):
+    """list_containers даёт одинаковый результат для PVE и AsyncPVE."""
+    resources = [{"vmid": ctid, "status": "running", "name": f"ct{ctid}"} for ctid in ctids]
+    configs = "\n".join(f"==> /etc/pve/lxc/{ctid}.conf <==\n{make_config(ctid)}" for ctid in ctids)
+    responses = {
+        "pvesh get /nodes/localhost/lxc": CommandResult(0, json.dumps(resources), ""),
+        "sh -c tail": CommandResult(0, configs, ""),
+    }
+    logger = Logger(json_output=True)
+
+    expected = PVE(logger, executor=FakeExecutor(responses)).list_containers()
+    actual = asyncio.run(AsyncPVE(logger, AsyncFakeExecutor(FakeExecutor(responses))).list_containers())
+
+    assert actual == expected
+
+
+# **Feature: async-executor, Property 3: Число каналов на соединение ограничено**
+@settings(max_examples=10, deadline=None)
+@given(commands=st.integers(min_value=1, max_value=40), max_sessions=st.integers(min_value=1, max_value=8))
+def test_async_ssh_limits_sessions(commands, max_sessions):
+    """Одновременно выполняется не больше max_sessions команд на хост."""
+    executor = AsyncSSHExecutor("pve1", max_sessions=max_sessions)
+    lock = threading.Lock()
+    state = {"active": 0, "peak": 0}
+
+    def fake_run(cmd, check=True):
+        with lock:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        time.sleep(0.002)
+        with lock:
+            state["active"] -= 1
+        return CommandResult(0, " ".join(cmd), "")
+
+    executor._executor.run = fake_run
+
+    async def main():
+        return await asyncio.gather(*(executor.run(["echo", str(i)]) for i in range(commands)))
+
+    results = asyncio.run(main())
+
+    assert [r.stdout for r in results] == [f"echo {i}" for i in range(commands)]
+    assert state["peak"] <= max_sessions
+
+
+def test_hung_ssh_call_does_not_block_exit():
+    """Зависший в потоке вызов paramiko не задерживает выход интерпретатора."""
+    script = """
+import asyncio, sys, time
+sys.path.insert(0, ".")
+from cli.core.async_executor import AsyncSSHExecutor
+executor = AsyncSSHExecutor("pve1")
+executor._executor.run = lambda cmd, check=True: time.sleep(60)
+async def main():
+    try:
+        await asyncio.wait_for(executor.run(["true"]), 0.1)
+    except asyncio.TimeoutError:
+        print("timeout")
+asyncio.run(main())
+"""
+    start = time.monotonic()
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, timeout=50)
+    assert result.stdout == "timeout\n"
+    assert time.monotonic() - start < 30
@@ -0,0 +1,111 @@
+"""Property-based tests для кэша метаданных хоста."""
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from hypothesis import given, strategies as st, settings
+
+sys.path.insert(0, ".")
+from cli.core.cache import MetadataCache
+from cli.core.pve import PVE
+from lib.exceptions import DeployError
+from lib.logger import Logger
+from lib.system import CommandResult
+from tests.test_pve import FakeExecutor
+
+
+json_values = st.recursive(
+    st.none() | st.booleans() | st.integers() | st.text(max_size=20),
+    lambda children: st.lists(children, max_size=5) | st.dictionaries(st.text(max_size=10), children, max_size=5),
+    max_leaves=20
+)
+
+
+# **Feature: metadata-cache, Property 1: Значение переживает перезапуск до истечения TTL**
+@settings(max_examples=50)
+@given(key=st.sampled_from(["storages", "templates:local", "host_network"]), value=json_values)
+def test_cache_roundtrip_between_processes(key, value):
+    """Новый экземпляр кэша читает значение с диска, после TTL — нет."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        MetadataCache("pve1", root=Path(tmpdir)).set(key, value)
+
+        assert MetadataCache("pve1", root=Path(tmpdir)).get(key) == value
+        assert MetadataCache("pve2", root=Path(tmpdir)).get(key) is None
+
+        ttl = MetadataCache("pve1", root=Path(tmpdir)).ttl
+        with patch("cli.core.cache.time.time", return_value=10 ** 10):
+            assert MetadataCache("pve1", root=Path(tmpdir), ttl=ttl).get(key) is None
+
+
+# **Feature: metadata-cache, Property 2: Инвалидация и --no-cache**
+@settings(max_examples=30)
+@given(storages=st.lists(st.text(min_size=1, max_size=8, alphabet="abcdefgh-"), min_size=1, max_size=4, unique=True))
+def test_cache_invalidate_and_disabled(storages):
+    """invalidate с префиксом удаляет все ключи, выключенный кэш не читается."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cache = MetadataCache("pve1", root=Path(tmpdir))
+        cache.set("storages", [1])
+        for storage in storages:
+            cache.set(f"templates:{storage}", [storage])
+
+        assert MetadataCache("pve1", root=Path(tmpdir), enabled=False).get("storages") is None
+
+        cache.invalidate("templates:*")
+        fresh = MetadataCache("pve1", root=Path(tmpdir))
+        assert all(fresh.get(f"templates:{s}") is None for s in storages)
+        assert fresh.get("storages") == [1]
+
+
+def test_pve_reuses_cached_metadata():
+    """Повторные запросы хранилищ и шаблонов не вызывают команды на хосте."""
+    storages = [
+        {"storage": "local", "content": "vztmpl,iso"},
+        {"storage": "local-zfs", "content": "rootdir,images"},
+    ]
+    responses = {
+        "pvesh get /storage": CommandResult(returncode=0, stdout=json.dumps(storages), stderr=""),
+        "pveam list local": CommandResult(
+            returncode=0,
+            stdout="NAME SIZE\nlocal:vztmpl/debian-12-standard_12.7-1_amd64.tar.zst 120MB\n",
+            stderr=""
+        ),
+        "pveam download": CommandResult(returncode=0, stdout="", stderr=""),
+    }
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for _ in range(3):
+            executor = FakeExecutor(responses)
+            pve = PVE(Logger(json_output=True), executor=executor, cache=MetadataCache("pve1", root=Path(tmpdir)))
+            assert pve.find_rootfs_storage() == "local-zfs"
+            assert pve.find_template("debian-12").endswith(".tar.zst")
+        # Последний запуск полностью обслужен кэшем
+        assert executor.calls == []
+
+        pve.download_template("debian-13-standard", "local")
+        pve.list_templates("local")
+        assert executor.calls[-1][:2] == ["pveam", "list"]
+
+
+def test_cache_apt_on_host_uses_management_address():
+    """--on-host обновляет списки перед установкой и берёт адрес интерфейса маршрута по умолчанию."""
+    from cli.commands.cache import _setup_on_host
+
+    executor = FakeExecutor({
+        "sh -c": CommandResult(0, "", ""),
+        "ip route show default": CommandResult(0, "default via 192.168.1.1 dev vmbr0 proto kernel\n", ""),
+        "ip -o addr show vmbr0": CommandResult(0, "4: vmbr0    inet 192.168.1.10/24 brd 192.168.1.255 scope global\n", ""),
+        # Первый адрес hostname -I — внутренний мост, недоступный контейнерам
+        "hostname -I": CommandResult(0, "10.10.10.1 192.168.1.10\n", ""),
+    })
+
+    assert _setup_on_host(Logger(json_output=True), executor, port=3150) == "192.168.1.10"
+    script = executor.calls[0][2]
+    assert script.index("apt-get update") < script.index("apt-get install")
+    # Прокси слушает порт, который попадёт в сохранённый URL
+    assert "Port: 3150" in script and script.index("Port: 3150") < script.index("restart apt-cacher-ng")
+
+    with pytest.raises(DeployError, match="--url"):
+        _setup_on_host(Logger(json_output=True), FakeExecutor({"sh -c": CommandResult(0, "", "")}))
@@ -0,0 +1,167 @@
+"""Tests для высокоуровневых операций с контейнерами."""
+
+import json
+import os
+import sys
+from pathlib import Path
+from hypothesis import given, strategies as st, settings
+
+sys.path.insert(0, ".")
+import cli.core.container as container_module
+import lib.system as system_module
+from cli.core.container import bootstrap_container, pending_bootstrap
+from cli.core.executor import LocalExecutor
+from lib.logger import Logger
+
+
+packages = st.lists(st.sampled_from(["curl", "wget", "git", "vim", "htop", "jq"]), unique=True, max_size=6)
+stamps = st.fixed_dictionaries({}, optional={
+    "locale": st.sampled_from(["en_US.UTF-8", "ru_RU.UTF-8"]),
+    "timezone": st.sampled_from(["UTC", "Europe/Moscow"]),
+    "packages": packages,
+})
+
+
+# **Feature: bootstrap-stamp, Property 1: После применения недостающих шагов bootstrap не нужен**
+@settings(max_examples=100)
+@given(stamp=stamps, locale=st.sampled_from(["en_US.UTF-8", "ru_RU.UTF-8"]),
+       timezone=st.sampled_from(["UTC", "Europe/Moscow"]), wanted=packages)
+def test_pending_bootstrap_converges(stamp, locale, timezone, wanted):
+    """Шаги из pending, применённые к штампу, дают пустой pending; лишние шаги не выполняются."""
+    pending = pending_bootstrap(stamp, locale, timezone, wanted)
+    assert set(pending.get("packages", [])) == set(wanted) - set(stamp.get("packages", []))
+
+    applied = dict(stamp)
+    applied.update({k: v for k, v in pending.items() if k != "packages"})
+    applied["packages"] = sorted(set(stamp.get("packages", [])) | set(pending.get("packages", [])))
+    assert pending_bootstrap(applied, locale, timezone, wanted) == {}
+
+
+class ShellContainer(LocalExecutor):
+    """Контейнер, в котором pct exec выполняется локальным sh.
+
+    locale-gen, update-locale, ln и apt-get подменены заглушками, которые
+    записывают вызовы в журнал; fail — команды, завершающиеся ошибкой.
+    """
+
+    def __init__(self, root: Path, fail: set = ()):
+        self.bin = root / "bin"
+        self.bin.mkdir()
+        self.journal = root / "journal"
+        for name in ("locale-gen", "update-locale", "ln", "apt-get"):
+            rc = 1 if name in fail else 0
+            stub = self.bin / name
+            stub.write_text(f'#!/bin/sh\necho "{name} $*" >> {self.journal}\nexit {rc}\n')
+            stub.chmod(0o755)
+        self.calls: list[list[str]] = []
+
+    def _local(self, cmd: list[str]) -> list[str]:
+        self.calls.append(cmd)
+        assert cmd[:2] == ["pct", "exec"]
+        return ["env", f"PATH={self.bin}:{os.environ['PATH']}"] + cmd[4:]
+
+    def run(self, cmd, check=True):
+        return super().run(self._local(cmd), check)
+
+    def stream(self, cmd):
+        return super().stream(self._local(cmd))
+
+    def commands(self) -> list[str]:
+        return self.journal.read_text().splitlines() if self.journal.exists() else []
+
+
+def test_bootstrap_runs_single_script(tmp_path, monkeypatch):
+    """Bootstrap — один pct exec со скриптом, повторный — одно чтение штампа."""
+    monkeypatch.setattr(container_module, "BOOTSTRAP_STAMP", str(tmp_path / "stamp" / "bootstrap.json"))
+    monkeypatch.setattr(system_module, "APT_LISTS_STATE", str(tmp_path / "apt-lists"))
+    container = ShellContainer(tmp_path)
+    steps = []
+    logger = Logger(json_output=True)
+    logger.step = lambda message, current=None, total=None: steps.append((current, total))
+
+    assert bootstrap_container(logger, 101, executor=container, packages=["jq", "curl"])
+    assert len(container.calls) == 2  # чтение штампа + скрипт
+    assert steps == [(1, 4), (2, 4), (3, 4), (4, 4)]
+    installs = [c for c in container.commands() if c.startswith("apt-get install")]
+    assert installs == ["apt-get install -y -qq curl wget git vim htop jq"]
+
+    stamp = json.loads((tmp_path / "stamp" / "bootstrap.json").read_text())
+    assert stamp["packages"] == sorted(["curl", "wget", "git", "vim", "htop", "jq"])
+
+    assert bootstrap_container(logger, 101, executor=container, packages=["jq"])
+    assert len(container.calls) == 3
+
+    assert bootstrap_container(logger, 101, executor=container, force=True)
+    assert len(container.calls) == 4
+
+
+def test_bootstrap_records_only_successful_steps(tmp_path, monkeypatch):
+    """При ошибке шага штамп содержит только выполненные шаги."""
+    monkeypatch.setattr(container_module, "BOOTSTRAP_STAMP", str(tmp_path / "stamp" / "bootstrap.json"))
+    monkeypatch.setattr(system_module, "APT_LISTS_STATE", str(tmp_path / "apt-lists"))
+    container = ShellContainer(tmp_path, fail={"locale-gen"})
+
+    assert not bootstrap_container(Logger(json_output=True), 101, executor=container)
+    stamp = json.loads((tmp_path / "stamp" / "bootstrap.json").read_text())
+    assert "locale" not in stamp
+    assert stamp["timezone"] == "UTC"
+
+
+def test_bootstrap_without_nanosecond_date(tmp_path, monkeypatch):
+    """Bootstrap работает с date без %N (busybox): время шагов в секундах."""
+    import shutil
+
+    monkeypatch.setattr(container_module, "BOOTSTRAP_STAMP", str(tmp_path / "stamp" / "bootstrap.json"))
+    monkeypatch.setattr(system_module, "APT_LISTS_STATE", str(tmp_path / "apt-lists"))
+    container = ShellContainer(tmp_path)
+    date = container.bin / "date"
+    real_date = shutil.which("date")
+    # Как busybox: неизвестный спецификатор %N выводится как есть
+    date.write_text(f'#!/bin/sh\ncase "$1" in *%N) echo "$({real_date} +%s)%N" ;; *) exec {real_date} "$@" ;; esac\n')
+    date.chmod(0o755)
+    events = []
+    logger = Logger(json_output=True)
+    logger.debug = lambda message, **fields: "ms" in fields and events.append(fields)
+
+    assert bootstrap_container(logger, 101, executor=container, packages=["jq"])
+    assert events and all(event["rc"] == 0 and event["ms"] % 1000 == 0 for event in events)
+
+
+def test_deploy_stops_when_bootstrap_fails():
+    """deploy --create не запускает установщик в контейнере с неудавшимся bootstrap."""
+    from unittest.mock import MagicMock, patch
+    import pytest
+    from cli.commands.deploy import deploy_app
+    from cli.core.container import CreateResult
+    from cli.core.readiness import ReadinessResult
+    from lib.exceptions import DeployError
+
+    installer = MagicMock(packages=["curl"])
+    with patch("cli.commands.deploy.AppRegistry.get", return_value=installer), \
+         patch("cli.commands.deploy.create_container", return_value=CreateResult(True, 105)), \
+         patch("cli.commands.deploy.wait_ready", return_value=ReadinessResult(True, 1, 0.1)), \
+         patch("cli.commands.deploy.bootstrap_container", return_value=False):
+        with pytest.raises(DeployError, match="Bootstrap of container 105 failed"):
+            deploy_app(Logger(json_output=True), LocalExecutor(), "docker", create=True)
+
+    installer.assert_not_called()
+
+
+def test_apt_proxy_script(tmp_path, monkeypatch):
+    """Скрипт прокси записывает настройку APT, без url — удаляет её."""
+    import subprocess
+    from lib.system import apt_proxy_script
+
+    conf = tmp_path / "apt.conf.d" / "01pve-lxc-proxy"
+    monkeypatch.setattr(system_module, "APT_PROXY_CONF", str(conf))
+
+    subprocess.run(["sh", "-c", apt_proxy_script("http://10.0.0.2:3142")], check=True)
+    assert 'Acquire::http::Proxy "http://10.0.0.2:3142";' in conf.read_text()
+
+    subprocess.run(["sh", "-c", apt_proxy_script(None)], check=True)
+    assert not conf.exists()
+
+    # Прокси в штампе совпадает с настройкой — шаг не выполняется
+    assert "apt_proxy" in pending_bootstrap({}, "C", "UTC", [], "http://10.0.0.2:3142")
+    assert pending_bootstrap({"apt_proxy": "http://10.0.0.2:3142", "locale": "C", "timezone": "UTC"},
+                             "C", "UTC", [], "http://10.0.0.2:3142") == {}
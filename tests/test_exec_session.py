@@ -0,0 +1,74 @@
+"""Property-based tests для ExecSession."""
+
+import sys
+from hypothesis import given, strategies as st, settings
+
+sys.path.insert(0, ".")
+from cli.core.exec_session import ExecSession
+from cli.core.executor import LocalExecutor
+
+
+class HostExecutor(LocalExecutor):
+    """Выполняет команды pct exec локально, без контейнера."""
+
+    def open_process(self, cmd: list[str]):
+        # pct exec <ctid> -- <cmd...>
+        return super().open_process(cmd[cmd.index("--") + 1:])
+
+
+# **Feature: exec-session, Property 1: Результаты сессии совпадают с отдельным запуском**
+@settings(max_examples=20, deadline=None)
+@given(
+    commands=st.lists(
+        st.tuples(
+            st.text(max_size=50, alphabet=st.characters(
+                whitelist_categories=('L', 'N', 'P', 'S', 'Zs'),
+                blacklist_characters='\x00'
+            )),
+            st.integers(min_value=0, max_value=255)
+        ),
+        min_size=1, max_size=10
+    )
+)
+def test_exec_session_matches_executor(commands):
+    """Команды в одной сессии дают тот же stdout, stderr и exit code."""
+    executor = HostExecutor()
+    with ExecSession(executor, 101) as session:
+        for text, code in commands:
+            cmd = ["bash", "-c", 'printf "%s" "$1"; printf "%s" "$1" >&2; exit $2', "_", text, str(code)]
+            assert session.run(cmd) == executor.run(cmd)
+
+
+def test_exec_session_close_is_idempotent():
+    """Повторное закрытие сессии не вызывает ошибок."""
+    session = ExecSession(HostExecutor(), 101).start()
+    assert session.run(["true"]).success
+    session.close()
+    session.close()
+
+
+def test_exec_session_lost_mid_command_is_not_retried(tmp_path):
+    """Обрыв сессии после отправки команды — ошибка, а не повтор через pct exec."""
+    from unittest.mock import MagicMock
+    from cli.commands.deploy import RemoteSystem
+    from lib.logger import Logger
+
+    journal = tmp_path / "journal"
+    pve = MagicMock()
+    session = ExecSession(HostExecutor(), 101).start()
+    system = RemoteSystem(Logger(json_output=True), pve, 101, session=session)
+
+    # Команда выполняется и убивает агента сессии
+    result = system.run(["sh", "-c", f"echo ran >> {journal}; kill -9 {session._process.pid}"])
+
+    assert not result.success
+    assert journal.read_text() == "ran\n"
+    pve.exec_stream.assert_not_called()
+    assert system.session is None
+
+
+def test_exec_session_output_limit():
+    """Сессия возвращает только последние output_limit байт вывода."""
+    with ExecSession(HostExecutor(), 101, output_limit=10) as session:
+        result = session.run(["sh", "-c", "printf '%0100d' 7"])
+    assert result.stdout == "0000000007"
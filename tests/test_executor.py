@@ -169,3 +169,181 @@ class TestSSHExecutor:
             assert not result.success
         finally:
             executor.close()
+
+
+# **Feature: ssh-broker, Property 1: Брокер отвечает и корректно завершается**
+def test_ssh_broker_lifecycle():
+    """Брокер принимает запросы через сокет и пробрасывает ошибки подключения."""
+    import threading
+    from cli.core.ssh_broker import SSHBroker, BrokerClient
+    from lib.exceptions import ConnectionError
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        socket_path = Path(tmpdir) / "broker.sock"
+        broker = SSHBroker(socket_path, idle_timeout=60)
+        thread = threading.Thread(target=broker.serve, daemon=True)
+        thread.start()
+        
+        client = BrokerClient(socket_path, timeout=10)
+        for _ in range(100):
+            if client.is_running():
+                break
+            threading.Event().wait(0.05)
+        assert client.is_running()
+        
+        status = client.request({"op": "status"})
+        assert status["hosts"] == []
+        
+        target = {"host": "127.0.0.1", "user": "root", "port": 1, "key_path": None}
+        with pytest.raises(ConnectionError):
+            client.request({"op": "run", "target": target, "cmd": ["true"]})
+        
+        client.request({"op": "shutdown"})
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+        assert not socket_path.exists()
+
+
+def test_ssh_broker_keeps_connections_with_requests_in_flight():
+    """Соединение с выполняющимся запросом (любым, не только stream) не закрывается по простою."""
+    import time
+    from unittest.mock import MagicMock
+    from cli.core.ssh_broker import SSHBroker
+    
+    broker = SSHBroker(Path("/nonexistent/broker.sock"), idle_timeout=600)
+    target = {"host": "pve1", "user": "root", "port": 22, "key_path": None}
+    executor = MagicMock()
+    broker._executors[broker._key(target)] = executor
+    
+    with broker._acquire(target) as acquired:
+        assert acquired is executor
+        # Долгий run: простой давно истёк, но запрос ещё выполняется
+        assert not broker._reap(time.monotonic() + 3600)
+        executor.close.assert_not_called()
+        assert broker._executors
+    
+    assert broker._reap(time.monotonic() + 3600)
+    executor.close.assert_called_once()
+    assert not broker._executors
+
+
+def test_ssh_executor_broker_connect_timeout_does_not_limit_command():
+    """connect_timeout передаётся брокеру, но не обрывает долгую команду; пул различает таймауты."""
+    import socket
+    import threading
+    import time
+    from cli.core.executor import SSHExecutor
+    from cli.core.ssh_broker import SSHBroker, recv_frame, send_frame
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        socket_path = Path(tmpdir) / "broker.sock"
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(str(socket_path))
+        server.listen()
+        requests = []
+        
+        def slow_broker():
+            conn, _ = server.accept()
+            requests.append(recv_frame(conn))
+            # Команда выполняется дольше connect_timeout
+            time.sleep(0.5)
+            send_frame(conn, {"returncode": 0, "stdout": "done\n", "stderr": ""})
+            conn.close()
+        
+        threading.Thread(target=slow_broker, daemon=True).start()
+        executor = SSHExecutor(host="pve1", broker=socket_path, connect_timeout=0.2)
+        assert executor.run(["sleep", "0.5"]).stdout == "done\n"
+        assert requests[0]["target"]["connect_timeout"] == 0.2
+        server.close()
+    
+    broker = SSHBroker(Path("/nonexistent/broker.sock"))
+    target = {"host": "pve1", "user": "root", "port": 22, "key_path": None}
+    assert broker._key({**target, "connect_timeout": 5}) != broker._key(target)
+
+
+def test_ssh_executor_without_broker_socket_falls_back():
+    """При недоступном брокере SSHExecutor отключает его и работает напрямую."""
+    from unittest.mock import patch
+    from cli.core.executor import SSHExecutor
+    from cli.core.ssh_broker import BrokerClient
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        executor = SSHExecutor(host="127.0.0.1", broker=Path(tmpdir) / "missing.sock")
+        with patch.object(BrokerClient, "start", return_value=False):
+            assert executor._broker_request({"op": "ping"}) is None
+        assert executor.broker is None
+
+
+# **Feature: streaming-output, Property 1: Потоковый вывод совпадает с run**
+@settings(max_examples=50, deadline=None)
+@given(
+    exit_code=st.integers(min_value=0, max_value=255),
+    lines=st.integers(min_value=0, max_value=2000)
+)
+def test_local_executor_stream_matches_run(exit_code, lines):
+    """stream() отдаёт тот же вывод и exit code, что и run()."""
+    from cli.core.executor import collect_output
+    
+    executor = LocalExecutor()
+    cmd = ["bash", "-c", f"for i in $(seq {lines}); do echo out$i; echo err$i >&2; done; exit {exit_code}"]
+    
+    chunks = list(executor.stream(cmd))
+    assert chunks[-1].stream == "exit"
+    assert chunks[-1].returncode == exit_code
+    
+    streamed = collect_output(iter(chunks))
+    direct = executor.run(cmd)
+    assert streamed == direct
+
+
+@settings(max_examples=100)
+@given(
+    parts=st.lists(st.text(max_size=50), max_size=30),
+    limit=st.integers(min_value=1, max_value=200)
+)
+def test_collect_output_keeps_tail(parts, limit):
+    """С лимитом сохраняется ровно хвост вывода."""
+    from cli.core.executor import OutputChunk, collect_output
+    
+    chunks = [OutputChunk("stdout", p) for p in parts] + [OutputChunk("exit", returncode=0)]
+    result = collect_output(iter(chunks), limit=limit)
+    assert result.stdout == "".join(parts)[-limit:]
+    assert result.success
+
+
+# **Feature: sftp-reuse, Property 1: Одна SFTP сессия и создание директорий один раз**
+@settings(max_examples=30)
+@given(
+    paths=st.lists(
+        st.lists(st.sampled_from(["a", "b", "c"]), min_size=1, max_size=4).map(lambda p: "/opt/" + "/".join(p)),
+        min_size=1, max_size=10
+    )
+)
+def test_ssh_push_reuses_sftp_session(paths):
+    """Повторные push_file не открывают новую SFTP сессию и не создают директории заново."""
+    from unittest.mock import MagicMock, patch
+    from cli.core.executor import SSHExecutor
+    
+    existing = {"/", "/opt"}
+    
+    def stat(path):
+        if path not in existing:
+            raise FileNotFoundError(path)
+    
+    sftp = MagicMock()
+    sftp.sock.closed = False
+    sftp.stat.side_effect = stat
+    sftp.mkdir.side_effect = existing.add
+    
+    executor = SSHExecutor("pve1")
+    executor._client = MagicMock()
+    executor._client.get_transport.return_value.is_active.return_value = True
+    
+    with patch("paramiko.SFTPClient.from_transport", return_value=sftp) as from_transport:
+        for path in paths:
+            assert executor.push_file(Path("/etc/hostname"), Path(path) / "file")
+    
+    assert from_transport.call_count == 1
+    created = [call.args[0] for call in sftp.mkdir.call_args_list]
+    assert len(created) == len(set(created))
+    assert sftp.stat.call_count <= len(existing)
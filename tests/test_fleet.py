@@ -0,0 +1,124 @@
+"""Property-based tests для fleet."""
+
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch, MagicMock
+from hypothesis import given, strategies as st, settings
+
+sys.path.insert(0, ".")
+from cli.commands.fleet import FleetRunner, FleetTarget, load_manifest
+
+
+# **Feature: fleet-deploy, Property 1: defaults применяются ко всем целям**
+def test_load_manifest_merges_defaults():
+    """Параметры из defaults наследуются и переопределяются целями."""
+    manifest = """
+defaults:
+  app: zabbix_agent
+  params: {server: 10.0.0.5, port: 10051}
+targets:
+  - host: pve1
+    container: 101
+  - host: pve2
+    create: true
+    app: nginx
+    params: {port: 8080}
+"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "fleet.yaml"
+        path.write_text(manifest)
+        targets = load_manifest(str(path))
+
+    assert targets[0] == FleetTarget(app="zabbix_agent", host="pve1", container=101,
+                                     params={"server": "10.0.0.5", "port": 10051})
+    assert targets[1].app == "nginx"
+    assert targets[1].create
+    assert targets[1].params == {"server": "10.0.0.5", "port": 8080}
+
+
+# **Feature: fleet-deploy, Property 2: Ограничение параллельности на хост**
+@settings(max_examples=10, deadline=None)
+@given(
+    hosts=st.lists(st.sampled_from(["pve1", "pve2", "pve3"]), min_size=1, max_size=20),
+    per_host=st.integers(min_value=1, max_value=3)
+)
+def test_fleet_respects_per_host_limit(hosts, per_host):
+    """Одновременно на хосте выполняется не больше per_host развёртываний."""
+    active: dict[str, int] = {}
+    peak: dict[str, int] = {}
+    lock = threading.Lock()
+
+    def fake_deploy(logger, executor, app_name, container=None, **kwargs):
+        host = executor.host
+        with lock:
+            active[host] = active.get(host, 0) + 1
+            peak[host] = max(peak.get(host, 0), active[host])
+        time.sleep(0.002)
+        with lock:
+            active[host] -= 1
+        return {"success": True, "ctid": container, "app": app_name}
+
+    manager = MagicMock()
+    manager.get_executor.side_effect = lambda host, **kwargs: MagicMock(host=host)
+    targets = [FleetTarget(app="docker", host=h, container=100 + i) for i, h in enumerate(hosts)]
+
+    runner = FleetRunner(workers=16, per_host=per_host, manager=manager)
+    with patch("cli.commands.fleet.deploy_app", side_effect=fake_deploy):
+        results = runner.run(targets)
+
+    assert all(r["success"] for r in results)
+    assert [r["ctid"] for r in results] == [t.container for t in targets]
+    assert all(count <= per_host for count in peak.values())
+
+
+def test_fleet_keeps_workers_busy_when_targets_grouped_by_host():
+    """Цели одного хоста подряд в манифесте не занимают все потоки пула."""
+    state = {"active": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def fake_deploy(logger, executor, app_name, container=None, **kwargs):
+        with lock:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        time.sleep(0.05)
+        with lock:
+            state["active"] -= 1
+        return {"success": True, "ctid": container}
+
+    manager = MagicMock()
+    manager.get_executor.side_effect = lambda host, **kwargs: MagicMock(host=host)
+    # 6 хостов по 4 цели подряд: 8 потоков, по 2 на хост
+    targets = [FleetTarget(app="docker", host=f"pve{h}", container=100 + 4 * h + i)
+               for h in range(6) for i in range(4)]
+
+    runner = FleetRunner(workers=8, per_host=2, manager=manager)
+    start = time.monotonic()
+    with patch("cli.commands.fleet.deploy_app", side_effect=fake_deploy):
+        results = runner.run(targets)
+    elapsed = time.monotonic() - start
+
+    assert [r["ctid"] for r in results] == [t.container for t in targets]
+    assert state["peak"] == 8
+    # 24 цели по 8 одновременно — 3 волны; с блокировкой по хосту было бы ~6
+    assert elapsed < 0.05 * 5
+
+
+def test_fleet_allocates_unique_ctids():
+    """Параллельно создаваемые контейнеры получают разные CTID."""
+    manager = MagicMock()
+    manager.get_executor.side_effect = lambda host, **kwargs: MagicMock(host=host)
+    targets = [FleetTarget(app="docker", host="pve1", create=True) for _ in range(10)]
+
+    runner = FleetRunner(workers=10, per_host=10, manager=manager)
+    with patch("cli.commands.fleet.PVE") as pve_cls, \
+         patch("cli.commands.fleet.deploy_app",
+               side_effect=lambda logger, executor, app_name, ctid=None, **kw: {"success": True, "ctid": ctid}):
+        pve_cls.return_value.next_ctid.side_effect = lambda exclude=(): next(
+            n for n in range(200, 300) if n not in exclude
+        )
+        results = runner.run(targets)
+
+    assert sorted(r["ctid"] for r in results) == list(range(200, 210))
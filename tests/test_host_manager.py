@@ -146,3 +146,56 @@ def test_remove_default_host_clears_default():
         
         manager.remove("test")
         assert manager.get_default() is None
+
+
+# **Feature: multi-host, Property 1: Хосты опрашиваются одновременно, зависший не блокирует остальные**
+@settings(max_examples=10, deadline=None)
+@given(delays=st.lists(st.sampled_from([0.0, 0.01, 0.05, None]), min_size=1, max_size=8))
+def test_test_all_streams_results_with_timeout(delays):
+    """Ответившие хосты приходят по мере готовности, зависшие — ошибкой таймаута."""
+    import asyncio
+    import time
+    from unittest.mock import patch
+    from lib.system import CommandResult
+    
+    names = [f"pve{i}" for i in range(len(delays))]
+    delay_by_name = dict(zip(names, delays))
+    
+    class SlowExecutor:
+        def __init__(self, name):
+            self.name = name
+        
+        async def run(self, cmd, check=True):
+            delay = delay_by_name[self.name]
+            # None — хост не отвечает
+            await asyncio.sleep(10 if delay is None else delay)
+            return CommandResult(0, f"pve-manager/8.2 {self.name}", "")
+        
+        async def close(self):
+            pass
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        manager = HostManager(
+            ssh_config=SSHConfigParser(Path(tmpdir) / "ssh_config"),
+            config_path=Path(tmpdir) / "config.yaml"
+        )
+        
+        async def collect():
+            return [result async for result in manager.test_all(names, timeout=0.2)]
+        
+        start = time.monotonic()
+        with patch.object(HostManager, "get_async_executor",
+                          lambda self, name, connect_timeout=None: SlowExecutor(name)):
+            results = asyncio.run(collect())
+        elapsed = time.monotonic() - start
+    
+    assert sorted(r["name"] for r in results) == names
+    assert elapsed < 1.0
+    for result in results:
+        if delay_by_name[result["name"]] is None:
+            assert not result["connected"] and "No response" in result["error"]
+        else:
+            assert result["connected"] and result["pve_version"].endswith(result["name"])
+    # Ответившие идут раньше зависших
+    connected = [r["connected"] for r in results]
+    assert connected == sorted(connected, reverse=True)
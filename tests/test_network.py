@@ -13,6 +13,8 @@ def make_mock_network():
     """Создать Network с замоканными системными вызовами."""
     logger = Logger(json_output=False)
     network = Network(logger)
+    # Таблица соседей тестовой машины не должна влиять на результат
+    network._neighbour_ips = lambda: set()
     return network
 
 
@@ -60,3 +62,83 @@ def test_full_ip_returned_unchanged(a, b, c, d, mask):
     
     assert ip == f"{a}.{b}.{c}.{d}"
     assert returned_mask == str(mask)
+
+
+# **Feature: ping-sweep, Property 1: Результаты в порядке адресов**
+@settings(max_examples=30, deadline=None)
+@given(busy=st.sets(st.integers(min_value=1, max_value=40)))
+def test_list_free_ips_ordered(busy):
+    """Параллельное сканирование возвращает свободные IP в порядке адресов."""
+    import random
+    import time
+    
+    network = make_mock_network()
+    
+    def fake_ping(ip, timeout=1.0):
+        time.sleep(random.random() / 1000)
+        return int(ip.split(".")[-1]) in busy
+    
+    with patch.object(network, 'ping', side_effect=fake_ping):
+        free_ips = network.list_free_ips("10.0.0.1-40")
+    
+    expected = [f"10.0.0.{i}" for i in range(1, 41) if i not in busy]
+    assert free_ips == expected
+
+
+# **Feature: ping-sweep, Property 2: Первый свободный IP — наименьший**
+@settings(max_examples=30, deadline=None)
+@given(busy=st.sets(st.integers(min_value=1, max_value=40)))
+def test_find_free_ip_returns_lowest(busy):
+    """find_free_ip возвращает наименьший свободный адрес диапазона."""
+    network = make_mock_network()
+    
+    def fake_ping(ip, timeout=1.0):
+        return int(ip.split(".")[-1]) in busy
+    
+    with patch.object(network, 'ping', side_effect=fake_ping):
+        ip = network.find_free_ip(1, 40, "10.0.0")
+    
+    free = [i for i in range(1, 41) if i not in busy]
+    assert ip == (f"10.0.0.{free[0]}" if free else None)
+
+
+# **Feature: ping-sweep, Property 3: Известные занятые IP не пингуются**
+@settings(max_examples=30, deadline=None)
+@given(known=st.sets(st.integers(min_value=1, max_value=40)))
+def test_known_used_ips_are_not_pinged(known):
+    """Адреса из таблицы соседей и конфигов контейнеров считаются занятыми без ping."""
+    network = make_mock_network()
+    network.pve = MagicMock()
+    network.pve.list_container_ips.return_value = {f"10.0.0.{i}" for i in known if i % 2}
+    network._neighbour_ips = lambda: {f"10.0.0.{i}" for i in known if not i % 2}
+    
+    pinged = []
+    
+    def fake_ping(ip, timeout=1.0):
+        pinged.append(ip)
+        return False
+    
+    with patch.object(network, 'ping', side_effect=fake_ping):
+        free_ips = network.list_free_ips("10.0.0.1-40")
+    
+    assert sorted(pinged) == sorted(f"10.0.0.{i}" for i in range(1, 41) if i not in known)
+    assert free_ips == [f"10.0.0.{i}" for i in range(1, 41) if i not in known]
+
+
+def test_host_network_is_read_through_pve_executor():
+    """Параметры сети берутся с PVE хоста через его executor, а не с локальной машины."""
+    from cli.core.pve import PVE
+    from lib.system import CommandResult
+    from tests.test_pve import FakeExecutor
+
+    executor = FakeExecutor({
+        "ip route show default": CommandResult(0, "default via 10.20.0.1 dev vmbr1 proto kernel\n", ""),
+        "ip -o addr show vmbr1": CommandResult(0, "5: vmbr1    inet 10.20.0.7/22 brd 10.20.3.255 scope global\n", ""),
+    })
+    network = Network(Logger(json_output=True), pve=PVE(Logger(json_output=True), executor=executor))
+
+    with patch("subprocess.run", side_effect=AssertionError("local command")):
+        host = network.get_host_network()
+
+    assert host == HostNetwork(ip="10.20.0.7", mask="22", gateway="10.20.0.1", interface="vmbr1")
+    assert executor.calls == [["ip", "route", "show", "default"], ["ip", "-o", "addr", "show", "vmbr1"]]
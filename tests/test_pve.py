@@ -0,0 +1,281 @@
+"""Tests для PVE."""
+
+import json
+import sys
+import tempfile
+from pathlib import Path
+from hypothesis import given, strategies as st, settings
+
+sys.path.insert(0, ".")
+from cli.core.executor import CommandExecutor, LocalExecutor
+from cli.core.pve import PVE
+from lib.logger import Logger
+from lib.system import CommandResult, hash_tree
+
+
+class FakeExecutor(CommandExecutor):
+    """Executor с заранее заданными ответами на команды."""
+
+    def __init__(self, responses: dict[str, CommandResult]):
+        self.responses = responses
+        self.calls: list[list[str]] = []
+
+    def run(self, cmd: list[str], check: bool = True) -> CommandResult:
+        self.calls.append(cmd)
+        key = " ".join(cmd)
+        for prefix, response in self.responses.items():
+            if key.startswith(prefix):
+                return response
+        return CommandResult(returncode=1, stdout="", stderr="unknown command")
+
+    def push_file(self, local_path: Path, remote_path: Path) -> bool:
+        return True
+
+    def read_file(self, remote_path: Path) -> str:
+        return ""
+
+    def close(self) -> None:
+        pass
+
+
+def make_config(ctid: int) -> str:
+    return (
+        f"arch: amd64\n"
+        f"cores: {ctid % 8 + 1}\n"
+        f"hostname: ct{ctid}\n"
+        f"memory: {ctid * 2}\n"
+        f"net0: name=eth0,bridge=vmbr0,ip=10.0.{ctid // 256}.{ctid % 256}/24,gw=10.0.0.1\n"
+        f"rootfs: local-lvm:vm-{ctid}-disk-0,size={ctid % 50 + 1}G\n"
+        f"\n[snap1]\nhostname: old{ctid}\nmemory: 1\n"
+    )
+
+
+# **Feature: bulk-inventory, Property 1: list_containers за два вызова**
+@settings(max_examples=50)
+@given(ctids=st.lists(st.integers(min_value=100, max_value=9999), max_size=30, unique=True))
+def test_list_containers_uses_bulk_calls(ctids):
+    """Список контейнеров строится из двух вызовов независимо от их количества."""
+    resources = [{"vmid": ctid, "status": "running", "name": f"ct{ctid}"} for ctid in ctids]
+    configs = "\n".join(f"==> /etc/pve/lxc/{ctid}.conf <==\n{make_config(ctid)}" for ctid in ctids)
+    executor = FakeExecutor({
+        "pvesh get /nodes/localhost/lxc": CommandResult(0, json.dumps(resources), ""),
+        "sh -c tail": CommandResult(0, configs, ""),
+    })
+    pve = PVE(Logger(json_output=True), executor=executor)
+
+    containers = pve.list_containers()
+
+    assert len(executor.calls) == 2
+    assert [c.ctid for c in containers] == sorted(ctids)
+    for c in containers:
+        assert c.name == f"ct{c.ctid}"
+        assert c.memory == c.ctid * 2
+        assert c.cores == c.ctid % 8 + 1
+        assert c.disk == c.ctid % 50 + 1
+        assert c.ip == f"10.0.{c.ctid // 256}.{c.ctid % 256}"
+
+
+def test_list_containers_falls_back_to_pct():
+    """Без pvesh используется pct list + pct config."""
+    executor = FakeExecutor({
+        "pct list": CommandResult(0, "VMID Status Lock Name\n101 running ct101\n", ""),
+        "pct config 101": CommandResult(0, make_config(101), ""),
+    })
+    pve = PVE(Logger(json_output=True), executor=executor)
+
+    containers = pve.list_containers()
+
+    assert len(containers) == 1
+    assert containers[0].ctid == 101
+    assert containers[0].status == "running"
+    assert containers[0].ip == "10.0.0.101"
+
+
+class PipeExecutor(FakeExecutor):
+    """Удалённый executor, у которого pct exec выполняется локально без контейнера."""
+
+    def open_process(self, cmd: list[str]):
+        # pct exec <ctid> -- <cmd...>
+        return LocalExecutor().open_process(cmd[cmd.index("--") + 1:])
+
+
+file_content = st.binary(max_size=200_000)
+file_name = st.text(min_size=1, max_size=12, alphabet="abcdefghij_-. ").filter(lambda n: n not in (".", ".."))
+
+
+# **Feature: streaming-push, Property 1: Файл передаётся в контейнер без копии на хосте**
+@settings(max_examples=30, deadline=None)
+@given(content=file_content, mode=st.sampled_from([0o600, 0o644, 0o755]))
+def test_push_streams_file(content, mode):
+    """Содержимое и права файла совпадают, временных файлов и pct push нет."""
+    executor = PipeExecutor({})
+    pve = PVE(Logger(json_output=True), executor=executor)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        src = Path(tmpdir) / "src.bin"
+        src.write_bytes(content)
+        src.chmod(mode)
+        dst = Path(tmpdir) / "container" / "opt" / "app.bin"
+
+        assert pve.push(101, src, dst)
+
+        assert dst.read_bytes() == content
+        assert dst.stat().st_mode & 0o777 == mode
+        assert executor.calls == []
+
+
+def test_write_file_passes_content_via_stdin():
+    """write_file пишет содержимое через stdin: в аргументах pct exec его нет."""
+    executor = PipeExecutor({})
+    opened = []
+    original = executor.open_process
+    executor.open_process = lambda cmd: opened.append(cmd) or original(cmd)
+    pve = PVE(Logger(json_output=True), executor=executor)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dst = Path(tmpdir) / "container" / "var" / "lib" / "state.json"
+        assert pve.write_file(101, dst, '{"password": "s3cr3t"}', mode=0o600)
+        assert dst.read_text() == '{"password": "s3cr3t"}'
+        assert dst.stat().st_mode & 0o777 == 0o600
+    assert not any("s3cr3t" in arg for arg in opened[0])
+
+
+# **Feature: streaming-push, Property 2: Директория передаётся одним tar потоком**
+@settings(max_examples=20, deadline=None)
+@given(files=st.dictionaries(
+    st.lists(file_name, min_size=1, max_size=3).map("/".join), file_content.map(lambda b: b[:2000]),
+    min_size=1, max_size=8
+))
+def test_push_tree_streams_directory(files):
+    """Дерево файлов в контейнере совпадает с исходным."""
+    pve = PVE(Logger(json_output=True), executor=PipeExecutor({}))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        src = Path(tmpdir) / "src"
+        expected = {}
+        for name, content in files.items():
+            path = src / name
+            # Путь может оказаться префиксом другого — пропускаем конфликтующие
+            if any(p.is_file() for p in path.parents) or path.is_dir():
+                continue
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(content)
+            expected[name] = content
+        src.mkdir(exist_ok=True)
+        dst = Path(tmpdir) / "container" / "srv"
+
+        assert pve.push(101, src, dst)
+
+        actual = {
+            str(p.relative_to(dst)): p.read_bytes()
+            for p in dst.rglob("*") if p.is_file()
+        }
+        assert actual == expected
+
+
+class ContainerExecutor(PipeExecutor):
+    """PipeExecutor, который выполняет и обычные pct exec локально."""
+
+    def run(self, cmd: list[str], check: bool = True) -> CommandResult:
+        self.calls.append(cmd)
+        return LocalExecutor().run(cmd[cmd.index("--") + 1:])
+
+
+# **Feature: dir-sync, Property 1: Повторная синхронизация ничего не передаёт**
+@settings(max_examples=20, deadline=None)
+@given(
+    files=st.dictionaries(file_name, file_content.map(lambda b: b[:2000]), min_size=1, max_size=8),
+    changed=st.sets(st.integers(min_value=0, max_value=7))
+)
+def test_sync_transfers_only_changed_files(files, changed):
+    """sync передаёт только изменённые файлы и удаляет лишние при delete."""
+    pve = PVE(Logger(json_output=True), executor=ContainerExecutor({}))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        src = Path(tmpdir) / "src"
+        (src / "conf").mkdir(parents=True)
+        for name, content in files.items():
+            (src / "conf" / name).write_bytes(content)
+        dst = Path(tmpdir) / "container" / "etc" / "app"
+
+        first = pve.sync(101, src, dst)
+        assert first.success and len(first.transferred) == len(files)
+
+        again = pve.sync(101, src, dst)
+        assert again.transferred == [] and again.unchanged == len(files)
+
+        names = sorted(files)
+        modified = {f"conf/{names[i]}" for i in changed if i < len(names)}
+        for name in modified:
+            (src / name).write_bytes((src / name).read_bytes() + b"!")
+        (dst / "stale.txt").write_text("old")
+
+        result = pve.sync(101, src, dst, delete=True)
+        assert set(result.transferred) == modified
+        assert result.deleted == ["stale.txt"]
+        assert hash_tree(src) == hash_tree(dst)
+
+
+class CloneHost(FakeExecutor):
+    """PVE хост, на хранилище которого нет связанных клонов."""
+
+    def __init__(self, configs: dict[int, str]):
+        super().__init__({})
+        self.configs = configs
+
+    def run(self, cmd, check=True):
+        self.calls.append(cmd)
+        if cmd[:2] == ["sh", "-c"] and "/etc/pve/lxc" in cmd[2]:
+            dump = "\n".join(f"==> /etc/pve/lxc/{ctid}.conf <==\n{text}" for ctid, text in self.configs.items())
+            return CommandResult(0, dump, "")
+        if cmd[:2] == ["pct", "clone"]:
+            if "--full" not in cmd:
+                return CommandResult(1, "", "linked clone feature is not supported for 'local:subvol'")
+            self.configs[int(cmd[3])] = self.configs[int(cmd[2])].replace("template: 1\n", "")
+            return CommandResult(0, "", "")
+        if cmd[:2] == ["pct", "config"]:
+            return CommandResult(0, self.configs[int(cmd[2])], "")
+        if cmd[:2] == ["pct", "exec"]:
+            return CommandResult(0, "ready\n", "")
+        if cmd[:2] in (["pct", "set"], ["pct", "start"], ["pct", "resize"], ["pct", "status"]):
+            return CommandResult(0, "status: stopped\n", "")
+        if cmd[:3] == ["pvesh", "get", "/cluster/nextid"]:
+            return CommandResult(0, "300\n", "")
+        return super().run(cmd, check)
+
+
+def test_create_from_golden_clones_newest_image():
+    """Клон берётся из самого нового golden-образа, при отказе linked clone — полная копия."""
+    from cli.core.container import create_from_golden
+
+    golden = "hostname: golden-docker\nrootfs: local:200/vm-200-disk-0,size=8G\ntemplate: 1\ntags: {tags}\n"
+    executor = CloneHost({
+        200: golden.format(tags="golden-docker;pve-lxc-golden"),
+        201: golden.format(tags="golden-docker;pve-lxc-golden"),
+        202: golden.format(tags="golden-nginx"),
+        203: "hostname: docker1\n",
+    })
+    pve = PVE(Logger(json_output=True), executor=executor)
+    assert pve.golden_images() == {"docker": 201}
+
+    result = create_from_golden(Logger(json_output=True), "docker", "web-1", disk=20, executor=executor)
+
+    assert result.success and result.ctid == 300
+    clones = [cmd for cmd in executor.calls if cmd[:2] == ["pct", "clone"]]
+    assert clones[0][:4] == ["pct", "clone", "201", "300"]
+    assert "--full" in clones[1]
+    net = next(cmd for cmd in executor.calls if cmd[:2] == ["pct", "set"])
+    assert net[net.index("--net0") + 1] == "name=eth0,bridge=vmbr0,ip=dhcp"
+    assert ["pct", "resize", "300", "rootfs", "20G"] in executor.calls
+
+    missing = create_from_golden(Logger(json_output=True), "nginx", "web-2", executor=executor)
+    assert not missing.success and "golden build" in missing.message
+
+
+def test_next_ctid_skips_reserved_and_existing():
+    """Следующий CTID не зарезервирован и не занят существующим контейнером."""
+    executor = FakeExecutor({
+        "pvesh get /cluster/nextid --vmid 102": CommandResult(0, "102\n", ""),
+        "pvesh get /cluster/nextid --vmid": CommandResult(2, "", "VM 101 already exists"),
+        "pvesh get /cluster/nextid": CommandResult(0, "100\n", ""),
+    })
+    pve = PVE(Logger(json_output=True), executor=executor)
+
+    assert pve.next_ctid() == 100
+    assert pve.next_ctid(exclude={100}) == 102
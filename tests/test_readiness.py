@@ -0,0 +1,128 @@
+"""Property-based tests для ожидания готовности контейнера."""
+
+import sys
+import subprocess
+from hypothesis import given, strategies as st, settings
+
+sys.path.insert(0, ".")
+from cli.core.readiness import DEFAULT_PROBES, readiness_script, wait_ready
+from lib.logger import Logger
+from lib.system import CommandResult
+
+
+class BootingContainer:
+    """pve.exec контейнера, проверки которого проходят с заданной попытки."""
+
+    def __init__(self, ready_at: dict[str, int]):
+        self.ready_at = ready_at
+        self.attempts = 0
+
+    def exec(self, ctid, cmd):
+        self.attempts += 1
+        if self.attempts < self.ready_at.get("exec", 0):
+            return CommandResult(255, "", "container is not running")
+        for probe in ["systemd", "route", "dns"]:
+            # Проверка выполняется, только если она есть в скрипте
+            if f"probe {probe} " in cmd[-1] and self.attempts < self.ready_at.get(probe, 0):
+                return CommandResult(1, f"{probe}\n", "")
+        return CommandResult(0, "ready\n", "")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, delay: float) -> None:
+        self.sleeps.append(delay)
+        self.now += delay
+
+
+# **Feature: readiness, Property 1: Готовность обнаруживается на первой успешной попытке**
+@settings(max_examples=100)
+@given(ready_at=st.fixed_dictionaries({probe: st.integers(0, 12) for probe in DEFAULT_PROBES}))
+def test_wait_ready_backoff(ready_at):
+    """Одна попытка — один pct exec, задержки растут экспоненциально от 50 мс до 2 с."""
+    container = BootingContainer(ready_at)
+    clock = FakeClock()
+
+    result = wait_ready(Logger(json_output=True), container, 101, timeout=60, clock=clock, sleep=clock.sleep)
+
+    assert result.ready
+    assert result.attempts == container.attempts == max(1, *ready_at.values())
+    assert clock.sleeps == [min(0.05 * 2 ** i, 2.0) for i in range(result.attempts - 1)]
+
+
+def test_wait_ready_reports_failed_probe():
+    """При таймауте возвращается проверка, которая не прошла."""
+    clock = FakeClock()
+    result = wait_ready(
+        Logger(json_output=True), BootingContainer({"exec": 0, "dns": 10 ** 6}), 101,
+        probes=DEFAULT_PROBES + ["dns"], timeout=5, clock=clock, sleep=clock.sleep
+    )
+    assert not result.ready
+    assert result.failed_probe == "dns"
+    assert result.elapsed <= 5
+
+    result = wait_ready(
+        Logger(json_output=True), BootingContainer({"exec": 10 ** 6}), 101,
+        timeout=1, clock=clock, sleep=clock.sleep
+    )
+    assert result.failed_probe == "exec"
+    assert result.message == "container is not running"
+
+
+def test_wait_ready_without_dns_by_default():
+    """DNS по умолчанию не проверяется; пустой список проверок не заменяется умолчаниями."""
+    container = BootingContainer({"dns": 10 ** 6})
+    clock = FakeClock()
+    result = wait_ready(Logger(json_output=True), container, 101, timeout=5, clock=clock, sleep=clock.sleep)
+    assert result.ready and "getent" not in readiness_script(DEFAULT_PROBES)
+
+    container = BootingContainer({"exec": 10 ** 6})
+    result = wait_ready(Logger(json_output=True), container, 101, probes=[], timeout=5, clock=clock, sleep=clock.sleep)
+    assert result.ready and container.attempts == 0
+
+
+def test_readiness_script_names_first_failed_probe():
+    """Скрипт выполняет проверки по порядку и печатает первую непрошедшую."""
+    from cli.core import readiness
+
+    readiness.register_probe("always", "true")
+    readiness.register_probe("never", "false")
+    try:
+        ok = subprocess.run(["sh", "-c", readiness_script(["exec", "always"])], capture_output=True, text=True)
+        failed = subprocess.run(
+            ["sh", "-c", readiness_script(["always", "never", "always"])], capture_output=True, text=True
+        )
+    finally:
+        del readiness.PROBES["always"], readiness.PROBES["never"]
+
+    assert (ok.returncode, ok.stdout) == (0, "ready\n")
+    assert (failed.returncode, failed.stdout) == (1, "never\n")
+
+
+def test_systemd_probe_requires_running_systemd(tmp_path):
+    """offline (systemd не запущен) не считается готовностью; без systemd в PID 1 проверка не применяется."""
+    from cli.core.readiness import PROBES
+
+    comm = tmp_path / "comm"
+    stub = tmp_path / "bin" / "systemctl"
+    stub.parent.mkdir()
+    condition = PROBES["systemd"].replace("/proc/1/comm", str(comm))
+    env = {"PATH": f"{stub.parent}:/usr/bin:/bin"}
+
+    def probe(init: str, state: str) -> int:
+        comm.write_text(f"{init}\n")
+        stub.write_text(f"#!/bin/sh\necho {state}\n")
+        stub.chmod(0o755)
+        return subprocess.run(["sh", "-c", condition], env=env).returncode
+
+    assert probe("systemd", "running") == 0
+    assert probe("systemd", "degraded") == 0
+    assert probe("systemd", "starting") == 1
+    assert probe("systemd", "offline") == 1
+    assert probe("init", "offline") == 0
@@ -0,0 +1,117 @@
+"""Тесты времени запуска CLI.
+
+По умолчанию проверяется, какие модули импортируются при запуске: тяжёлые
+пакеты не должны попадать в быстрый путь команды. Сравнение времени
+холодного старта с базой tests/startup_baseline.json зависит от машины и
+включается явно:
+
+    PVE_LXC_STARTUP_BENCH=1 python -m pytest tests/test_startup.py
+
+Обновить базу после осознанного изменения (тесты её не изменяют):
+
+    python -m tests.test_startup
+"""
+
+import json
+import os
+import statistics
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, ".")
+from cli.core.startup import profile_startup
+
+BASELINE_PATH = Path(__file__).parent / "startup_baseline.json"
+
+# Допустимое превышение базы (шум планировщика, холодный кэш ФС)
+TOLERANCE = 1.5
+RUNS = 5
+
+# Подмена executor: list выполняется без PVE хоста
+STUB_EXECUTOR = """\
+from cli.core.host_manager import HostManager
+from cli.core.executor import CommandExecutor
+from lib.system import CommandResult
+
+class StubExecutor(CommandExecutor):
+    def run(self, cmd, check=True):
+        return CommandResult(returncode=0, stdout="[]" if cmd[0] == "pvesh" else "", stderr="")
+    def push_file(self, local, remote):
+        pass
+    def read_file(self, remote):
+        return ""
+    def close(self):
+        pass
+
+HostManager.get_executor = lambda self, name=None, **kwargs: StubExecutor()
+"""
+
+COMMANDS = {
+    "help": (["--help"], None),
+    "list_json": (["list", "--json"], STUB_EXECUTOR),
+}
+
+# Модули, которые команда не должна импортировать
+FORBIDDEN = {
+    "help": {"paramiko", "asyncio", "cli.core.async_executor"},
+    "list_json": {
+        "paramiko", "asyncio", "rich", "apps",
+        "cli.commands.deploy", "cli.core.container", "cli.core.async_pve",
+    },
+}
+
+
+def measure(name: str) -> dict:
+    """Медиана времени запуска и числа импортов за RUNS запусков."""
+    argv, prelude = COMMANDS[name]
+    profiles = [profile_startup(argv, prelude=prelude) for _ in range(RUNS)]
+    assert all(p.returncode == 0 for p in profiles), f"pve-lxc {' '.join(argv)} failed"
+    return {
+        "wall_time": statistics.median(p.wall_time for p in profiles),
+        "modules": max(len(p.imports) for p in profiles),
+    }
+
+
+@pytest.mark.parametrize("name", list(COMMANDS))
+def test_startup_skips_heavy_imports(name):
+    """Команда не импортирует модули, ненужные для её выполнения."""
+    argv, prelude = COMMANDS[name]
+    profile = profile_startup(argv, prelude=prelude)
+    assert profile.returncode == 0, f"pve-lxc {' '.join(argv)} failed"
+
+    imported = {record.module for record in profile.imports}
+    # Пакет запрещён вместе со всеми подмодулями
+    leaked = sorted(
+        module for module in imported
+        if any(module == f or module.startswith(f + ".") for f in FORBIDDEN[name])
+    )
+    assert not leaked, f"{name}: unexpected imports {leaked}"
+
+
+@pytest.mark.skipif(not os.environ.get("PVE_LXC_STARTUP_BENCH"), reason="set PVE_LXC_STARTUP_BENCH=1")
+@pytest.mark.parametrize("name", list(COMMANDS))
+def test_startup_time_within_baseline(name):
+    """Время холодного старта не превышает базу более чем в TOLERANCE раз."""
+    baseline = json.loads(BASELINE_PATH.read_text())
+    if name not in baseline:
+        pytest.skip(f"no baseline for {name}, run python -m tests.test_startup")
+
+    current = measure(name)
+    expected = baseline[name]
+    assert current["wall_time"] <= expected["wall_time"] * TOLERANCE, (
+        f"{name}: {current['wall_time']:.3f}s > baseline {expected['wall_time']:.3f}s x {TOLERANCE}"
+    )
+    assert current["modules"] <= expected["modules"] * 1.1, (
+        f"{name}: {current['modules']} modules imported, baseline {expected['modules']}"
+    )
+
+
+if __name__ == "__main__":
+    baseline = {}
+    for name in COMMANDS:
+        current = measure(name)
+        baseline[name] = {"wall_time": round(current["wall_time"], 4), "modules": current["modules"]}
+    BASELINE_PATH.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+    print(f"Baseline written to {BASELINE_PATH}")
@@ -0,0 +1,170 @@
+"""Property-based tests для транзакций apt в System."""
+
+import os
+import subprocess
+import sys
+from hypothesis import given, strategies as st, settings
+
+sys.path.insert(0, ".")
+import lib.system as system_module
+from lib.logger import Logger
+from lib.system import APT_LISTS_FRESH, CommandResult, System, apt_update_script
+
+
+class RecordingSystem(System):
+    """System, который только записывает выполненные команды."""
+
+    def __init__(self):
+        super().__init__(Logger(json_output=True))
+        self.commands: list[list[str]] = []
+
+    def _run(self, cmd, check=True, capture=True):
+        self.commands.append(cmd)
+        return CommandResult(0, "", "")
+
+
+operations = st.lists(st.one_of(
+    st.tuples(st.just("install"), st.lists(st.sampled_from(["curl", "jq", "gnupg", "nginx"]), unique=True, max_size=3)),
+    st.tuples(st.just("update")),
+    st.tuples(st.just("run")),
+    st.tuples(st.just("prepare")),
+))
+
+
+# **Feature: apt-transactions, Property 1: Пакеты между зависимыми командами ставятся одной транзакцией**
+@settings(max_examples=100)
+@given(ops=operations)
+def test_apt_installs_coalesce_between_barriers(ops):
+    """Один apt-get install на отрезок между командами, которым нужны пакеты.
+
+    Подготовительная команда (mkdir) очередь не устанавливает, но после неё
+    списки пакетов снова проверяются.
+    """
+    system = RecordingSystem()
+    expected = []
+    queue: list[str] = []
+    fresh = False
+    for op in ops:
+        if op[0] == "install":
+            system.apt_install(op[1])
+            queue += [p for p in op[1] if p not in queue]
+        elif op[0] == "update":
+            system.apt_update()
+            if not fresh:
+                expected.append("update")
+            fresh = True
+        elif op[0] == "run":
+            system.run(["systemctl", "daemon-reload"])
+            if queue:
+                expected.append(["apt-get", "install", "-y", "-qq"] + queue)
+                queue = []
+            expected.append(["systemctl", "daemon-reload"])
+            fresh = False
+        else:
+            system.run(["mkdir", "-p", "/opt/app"])
+            expected.append(["mkdir", "-p", "/opt/app"])
+            fresh = False
+    system.apt_flush()
+    if queue:
+        expected.append(["apt-get", "install", "-y", "-qq"] + queue)
+
+    actual = ["update" if cmd[:2] == ["sh", "-c"] else cmd for cmd in system.commands]
+    assert actual == expected
+
+
+class InstalledSystem(RecordingSystem):
+    """RecordingSystem, в котором установлены пакеты installed (dpkg-query отвечает по ним)."""
+
+    def __init__(self, installed: set[str]):
+        super().__init__()
+        self.installed = installed
+
+    def _run(self, cmd, check=True, capture=True):
+        self.commands.append(cmd)
+        if cmd[0] == "dpkg-query":
+            status = "".join(f"{p} install ok installed\n" for p in cmd[3:] if p in self.installed)
+            return CommandResult(0, status, "")
+        return CommandResult(0, "", "")
+
+
+def test_jenkins_install_runs_single_apt_transaction():
+    """Шаги установщика jenkins между apt_install не дробят установку пакетов."""
+    from apps.jenkins.install import JenkinsInstaller
+
+    # curl уже стоит (bootstrap): загрузка ключа не ждёт openjdk и gnupg
+    system = InstalledSystem({"curl"})
+    JenkinsInstaller(Logger(json_output=True), system, {}).install()
+    system.apt_flush()
+
+    installs = [cmd for cmd in system.commands if cmd[:2] == ["apt-get", "install"]]
+    assert installs == [["apt-get", "install", "-y", "-qq", "openjdk-17-jdk", "curl", "gnupg", "jenkins"]]
+    # Пакеты ставятся до первой команды, которой они нужны
+    assert system.commands.index(installs[0]) < system.commands.index(["systemctl", "enable", "jenkins"])
+
+    # Без curl загрузка ключа ждёт установки очереди
+    system = InstalledSystem(set())
+    JenkinsInstaller(Logger(json_output=True), system, {}).install()
+    system.apt_flush()
+    installs = [cmd for cmd in system.commands if cmd[:2] == ["apt-get", "install"]]
+    assert len(installs) == 2
+    assert system.commands.index(installs[0]) < next(i for i, c in enumerate(system.commands) if c[0] == "curl")
+
+
+def test_apt_update_script_skips_fresh_lists(tmp_path, monkeypatch):
+    """apt-get update пропускается до истечения max_age и изменения sources.list."""
+    sources = tmp_path / "sources.list"
+    sources.write_text("deb http://deb.debian.org/debian bookworm main\n")
+    monkeypatch.setattr(system_module, "APT_SOURCES", [str(sources)])
+    monkeypatch.setattr(system_module, "APT_LISTS_STATE", str(tmp_path / "state" / "apt-lists"))
+    monkeypatch.setattr(system_module, "APT_LISTS_DIR", str(tmp_path / "lists"))
+
+    # apt-get update создаёт списки пакетов
+    stub = tmp_path / "bin" / "apt-get"
+    stub.parent.mkdir()
+    stub.write_text(
+        f'#!/bin/sh\necho "$*" >> {tmp_path / "journal"}\n'
+        f'mkdir -p {tmp_path / "lists"} && touch {tmp_path / "lists" / "deb.debian.org_bookworm_main_Packages"}\n'
+    )
+    stub.chmod(0o755)
+    env = {**os.environ, "PATH": f"{stub.parent}:{os.environ['PATH']}"}
+
+    def update(max_age=3600):
+        result = subprocess.run(["sh", "-c", apt_update_script(max_age)], env=env, capture_output=True, text=True)
+        assert result.returncode == 0
+        return APT_LISTS_FRESH not in result.stdout
+
+    assert update()
+    assert not update()
+    assert update(max_age=0)
+    sources.write_text(sources.read_text() + "deb https://download.docker.com/linux/debian bookworm stable\n")
+    assert update()
+    assert not update()
+    assert (tmp_path / "journal").read_text().splitlines() == ["update -qq"] * 3
+
+
+def test_apt_update_script_runs_in_sealed_clone(tmp_path, monkeypatch):
+    """Клон golden-образа обновляет списки, даже если отметка свежести осталась."""
+    from cli.core.container import APT_LISTS_STATE, GOLDEN_SEAL_SCRIPT
+
+    state = tmp_path / "state" / "apt-lists"
+    lists = tmp_path / "lists"
+    monkeypatch.setattr(system_module, "APT_SOURCES", [str(tmp_path / "sources.list")])
+    monkeypatch.setattr(system_module, "APT_LISTS_STATE", str(state))
+    monkeypatch.setattr(system_module, "APT_LISTS_DIR", str(lists))
+    (tmp_path / "sources.list").write_text("deb http://deb.debian.org/debian bookworm main\n")
+
+    stub = tmp_path / "bin" / "apt-get"
+    stub.parent.mkdir()
+    stub.write_text(f'#!/bin/sh\necho "$*" >> {tmp_path / "journal"}\n')
+    stub.chmod(0o755)
+    env = {**os.environ, "PATH": f"{stub.parent}:{os.environ['PATH']}"}
+
+    # Отметка свежести записана при golden build, списки удалены при запечатывании
+    subprocess.run(["sh", "-c", apt_update_script()], env=env, check=True)
+    assert not lists.exists()
+    result = subprocess.run(["sh", "-c", apt_update_script()], env=env, capture_output=True, text=True)
+
+    assert APT_LISTS_FRESH not in result.stdout
+    assert (tmp_path / "journal").read_text().splitlines() == ["update -qq"] * 2
+    # Запечатывание удаляет и саму отметку
+    assert f"rm -f {APT_LISTS_STATE}" in GOLDEN_SEAL_SCRIPT
@@ -0,0 +1,219 @@
+"""Property-based tests для индекса шаблонов."""
+
+import sys
+from hypothesis import given, strategies as st, settings
+
+sys.path.insert(0, ".")
+from cli.core.templates import TemplateIndex, parse_aplinfo, parse_template, version_key
+from cli.core.pve import PVE
+from lib.logger import Logger
+from lib.system import CommandResult
+from tests.test_pve import FakeExecutor
+
+
+versions = st.tuples(st.integers(0, 30), st.integers(0, 30), st.integers(1, 5)).map(lambda v: f"{v[0]}.{v[1]}-{v[2]}")
+templates = st.lists(
+    st.tuples(
+        st.sampled_from(["debian", "ubuntu"]),
+        st.sampled_from(["11", "12", "24.04"]),
+        st.sampled_from(["standard", "minimal"]),
+        versions,
+        st.sampled_from(["amd64", "arm64"]),
+    ).map(lambda t: f"local:vztmpl/{t[0]}-{t[1]}-{t[2]}_{t[3]}_{t[4]}.tar.zst"),
+    min_size=1, max_size=30, unique=True
+)
+
+
+# **Feature: template-index, Property 1: Выбирается самая новая подходящая версия**
+@settings(max_examples=100)
+@given(volids=templates, query=st.sampled_from(["debian", "debian-12", "debian-12-standard", "ubuntu-24.04", "deb"]))
+def test_find_returns_newest_match(volids, query):
+    """Результат не зависит от порядка pveam list и совпадает с перебором."""
+    index = TemplateIndex(volids)
+    reverse = TemplateIndex(list(reversed(volids)))
+
+    matching = [
+        parse_template(v) for v in volids
+        if v.split("/")[-1].startswith(query) and "_amd64" in v
+    ]
+    found = index.find(query)
+
+    if not matching:
+        assert found is None
+        return
+    best = max(matching, key=lambda t: (version_key(t.release), version_key(t.version)))
+    assert found.sort_key == best.sort_key
+    assert reverse.find(query).sort_key == found.sort_key
+
+
+def test_parse_template_fields():
+    """Имя шаблона раскладывается на дистрибутив, релиз, вариант, версию и arch."""
+    info = parse_template("pool:vztmpl/centos-9-stream-default_20240828_amd64.tar.xz")
+    assert (info.distro, info.release, info.variant, info.version, info.arch) == (
+        "centos", "9-stream", "default", "20240828", "amd64"
+    )
+    assert version_key("12.10-1") > version_key("12.9-1")
+    assert parse_template("local:vztmpl/custom.tar.gz") is None
+
+
+def test_ensure_template_downloads_missing():
+    """Отсутствующий шаблон скачивается из pveam available, pveam list вызывается один раз на хранилище."""
+    available = (
+        "system          debian-12-standard_12.2-1_amd64.tar.zst\n"
+        "system          debian-12-standard_12.7-1_amd64.tar.zst\n"
+        "turnkeylinux    debian-12-turnkey-core_18.0-1_amd64.tar.gz\n"
+    )
+    downloaded = []
+    executor = FakeExecutor({
+        "pvesh get /storage": CommandResult(0, '[{"storage": "local", "content": "vztmpl"}]', ""),
+        "pveam available": CommandResult(0, available, ""),
+    })
+    original_run = executor.run
+
+    def run(cmd, check=True):
+        if cmd[:2] == ["pveam", "download"]:
+            downloaded.append(cmd[3])
+            executor.calls.append(cmd)
+            return CommandResult(0, "", "")
+        if cmd[:2] == ["pveam", "list"]:
+            executor.calls.append(cmd)
+            rows = "".join(f"local:vztmpl/{name} 120MB\n" for name in downloaded)
+            return CommandResult(0, "NAME SIZE\n" + rows, "")
+        return original_run(cmd, check)
+
+    executor.run = run
+    pve = PVE(Logger(json_output=True), executor=executor)
+
+    assert pve.ensure_template("debian-12-standard") == "local:vztmpl/debian-12-standard_12.7-1_amd64.tar.zst"
+    assert downloaded == ["debian-12-standard_12.7-1_amd64.tar.zst"]
+
+    calls = len(executor.calls)
+    assert pve.ensure_template("debian-12-standard").endswith("12.7-1_amd64.tar.zst")
+    assert pve.find_template("debian")
+    assert len(executor.calls) == calls
+
+
+# **Feature: template-prefetch, Property 1: Одновременные запросы одного шаблона скачиваются один раз**
+@settings(max_examples=10, deadline=None)
+@given(keys=st.lists(st.sampled_from(["a", "b", "c"]), min_size=1, max_size=12))
+def test_download_once_deduplicates_concurrent_requests(keys):
+    """Пока скачивание идёт, повторные запросы ждут его результата."""
+    import threading
+    import time
+    from cli.core.templates import download_once
+
+    started = []
+    release = threading.Event()
+
+    def download(key):
+        started.append(key)
+        release.wait(5)
+        return True
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda k=key: results.append(download_once(("host", k), lambda: download(k))))
+        for key in keys
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(started) == sorted(set(keys))
+    assert results == [True] * len(keys)
+
+
+def test_parse_aplinfo():
+    """sha512 берётся из блока с Location шаблона."""
+    text = (
+        "Package: debian-12-standard\nVersion: 12.7-1\n"
+        "Location: system/debian-12-standard_12.7-1_amd64.tar.zst\n"
+        "Description: Debian 12 Bookworm (standard)\n A small system\n"
+        "sha512sum: ABC123\n\n"
+        "Package: no-checksum\nLocation: system/other_1_amd64.tar.zst\n"
+    )
+    assert parse_aplinfo(text) == {"debian-12-standard_12.7-1_amd64.tar.zst": "abc123"}
+
+
+class TemplateHost(FakeExecutor):
+    """PVE хост с хранилищем шаблонов: pveam download добавляет файл."""
+
+    def __init__(self, name: str, corrupt: set = ()):
+        super().__init__({})
+        self.host = name
+        self.files: dict[str, bytes] = {}
+        self.corrupt = corrupt
+        self.downloads: list[str] = []
+
+    def run(self, cmd, check=True):
+        import hashlib
+        self.calls.append(cmd)
+        if cmd[:3] == ["pvesh", "get", "/storage"]:
+            return CommandResult(0, '[{"storage": "local", "content": "vztmpl"}]', "")
+        if cmd[:2] == ["pveam", "available"]:
+            return CommandResult(0, "".join(f"system  {name}\n" for name in APLINFO), "")
+        if cmd[:2] == ["pveam", "list"]:
+            return CommandResult(0, "NAME SIZE\n" + "".join(f"local:vztmpl/{n} 1MB\n" for n in self.files), "")
+        if cmd[:2] == ["pveam", "download"]:
+            self.downloads.append(cmd[3])
+            self.files[cmd[3]] = b"broken" if cmd[3] in self.corrupt else APLINFO[cmd[3]]
+            return CommandResult(0, " 40%\n100%\n", "")
+        if cmd[:2] == ["pveam", "remove"]:
+            self.files.pop(cmd[2].split("/")[-1], None)
+            return CommandResult(0, "", "")
+        if cmd[:2] == ["sh", "-c"] and "apl-info" in cmd[2]:
+            return CommandResult(0, "\n\n".join(
+                f"Package: x\nLocation: system/{name}\nsha512sum: {hashlib.sha512(data).hexdigest()}"
+                for name, data in APLINFO.items()
+            ), "")
+        if cmd[:2] == ["pvesm", "path"]:
+            return CommandResult(0, f"/var/lib/vz/template/cache/{cmd[2].split('/')[-1]}\n", "")
+        if cmd[0] == "sha512sum":
+            data = self.files[cmd[1].split("/")[-1]]
+            return CommandResult(0, f"{hashlib.sha512(data).hexdigest()}  {cmd[1]}\n", "")
+        return super().run(cmd, check)
+
+
+APLINFO = {
+    "debian-12-standard_12.7-1_amd64.tar.zst": b"debian",
+    "ubuntu-24.04-standard_24.04-2_amd64.tar.zst": b"ubuntu",
+}
+
+
+def test_prefetch_downloads_verifies_and_deduplicates():
+    """Каждый шаблон скачивается на каждый хост один раз и сверяется с sha512."""
+    from unittest.mock import MagicMock
+    from cli.core.prefetch import prefetch_templates
+
+    hosts = {
+        "pve1": TemplateHost("pve1"),
+        "pve2": TemplateHost("pve2", corrupt={"ubuntu-24.04-standard_24.04-2_amd64.tar.zst"}),
+    }
+    hosts["pve1"].files["debian-12-standard_12.7-1_amd64.tar.zst"] = b"debian"
+    manager = MagicMock()
+    manager.get_executor.side_effect = lambda name, **kwargs: hosts[name]
+
+    progress = []
+    items = prefetch_templates(
+        ["pve1", "pve2"], ["debian-12", "debian-12-standard", "ubuntu-24.04"],
+        manager=manager, json_output=True, use_cache=False,
+        on_progress=lambda item: progress.append((item.host, item.status, item.percent))
+    )
+    status = {(item.host, item.template.split("_")[0]): item.status for item in items}
+
+    assert len(items) == 4
+    assert status == {
+        ("pve1", "debian-12-standard"): "present",
+        ("pve1", "ubuntu-24.04-standard"): "downloaded",
+        ("pve2", "debian-12-standard"): "downloaded",
+        ("pve2", "ubuntu-24.04-standard"): "failed",
+    }
+    assert hosts["pve1"].downloads == ["ubuntu-24.04-standard_24.04-2_amd64.tar.zst"]
+    assert sorted(hosts["pve2"].downloads) == sorted(APLINFO)
+    # Файл с неверной контрольной суммой удалён из хранилища
+    assert "ubuntu-24.04-standard_24.04-2_amd64.tar.zst" not in hosts["pve2"].files
+    assert all(item.verified for item in items if item.status == "downloaded")
+    assert ("pve2", "downloading", 100) in progress